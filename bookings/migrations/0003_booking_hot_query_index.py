@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_booking_hkid_number_booking_key_deposit_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['room', 'status', 'move_in_date', 'move_out_date'], name='booking_room_status_dates_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', 'move_out_date'], name='booking_status_move_out_idx'),
+        ),
+    ]
@@ -2,7 +2,7 @@ from django.core.exceptions import ValidationError
 import logging
 
 from django.db import models
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 from properties.models import Room
@@ -160,8 +160,7 @@ class Booking(models.Model):
     def generate_refund_receipt(self):
         """Generate refund receipt PDF"""
         try:
-            from weasyprint import HTML
-            from django.template.loader import render_to_string
+            from notifications.pdf import PDFService
 
             context = {
                 'booking': self,
@@ -171,8 +170,7 @@ class Booking(models.Model):
                 'today': timezone.now().date(),
             }
 
-            html_string = render_to_string('bookings/refund_receipt.html', context)
-            pdf_file = HTML(string=html_string).write_pdf()
+            pdf_file = PDFService.render('bookings/refund_receipt.html', context)
 
             # Save PDF (you might want to store this in a FileField)
             filename = f"refund_receipt_{self.id}_{timezone.now().strftime('%Y%m%d')}.pdf"
@@ -185,6 +183,12 @@ class Booking(models.Model):
 
     class Meta:
         ordering = ['-booking_date']
+        indexes = [
+            # Current/upcoming occupant of a room: room + status equality, then the date range
+            models.Index(fields=['room', 'status', 'move_in_date', 'move_out_date'], name='booking_room_status_dates_idx'),
+            # Upcoming move-outs report
+            models.Index(fields=['status', 'move_out_date'], name='booking_status_move_out_idx'),
+        ]
 
     def __str__(self):
         return f"Booking #{self.id} - {self.tenant.full_name} - {self.room.room_code}"
@@ -234,6 +238,18 @@ class Booking(models.Model):
 def update_room_status_on_booking_change(sender, instance, created, **kwargs):
     """Update room status whenever booking is saved"""
     instance.update_room_status()
+    instance.room.sync_booking_pointers()
+
+    # Booking moved to another room (e.g. temporary stay switch)
+    previous_room_id = getattr(instance, '_previous_room_id', None)
+    if previous_room_id and previous_room_id != instance.room_id:
+        Room.refresh_booking_pointers(Room.objects.filter(pk=previous_room_id))
+
+
+@receiver(post_delete, sender=Booking)
+def refresh_room_pointers_on_booking_delete(sender, instance, **kwargs):
+    """Recompute room booking pointers once a booking is removed"""
+    Room.refresh_booking_pointers(Room.objects.filter(pk=instance.room_id))
 
 
 @receiver(pre_save, sender=Booking)
@@ -242,6 +258,7 @@ def handle_booking_status_change(sender, instance, **kwargs):
     if instance.pk:  # Only for existing instances
         try:
             old_instance = Booking.objects.get(pk=instance.pk)
+            instance._previous_room_id = old_instance.room_id
             today = timezone.now().date()
 
             # Auto-activate booking on move-in date
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Contract
+from .models import Contract, ContractHashIssue, ContractHashSweep
 
 
 @admin.register(Contract)
@@ -50,7 +50,7 @@ class ContractAdmin(admin.ModelAdmin):
             )
         }),
         ('Signature Status', {
-            'fields': ('status', 'signed_date', 'digital_signature')
+            'fields': ('status', 'signed_date', 'signature_image')
         }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
@@ -121,4 +121,21 @@ class ContractAdmin(admin.ModelAdmin):
         updated = queryset.update(is_temporary_stay_active=False)
         self.message_user(request, f"{updated} temporary stays deactivated.")
 
-    deactivate_temporary_stay.short_description = "Deactivate temporary stay"
\ No newline at end of file
+    deactivate_temporary_stay.short_description = "Deactivate temporary stay"
+
+
+class ContractHashIssueInline(admin.TabularInline):
+    model = ContractHashIssue
+    extra = 0
+    raw_id_fields = ['contract']
+    readonly_fields = ['contract', 'issue_type', 'file_name', 'expected_hash', 'actual_hash', 'detail']
+    can_delete = False
+
+
+@admin.register(ContractHashSweep)
+class ContractHashSweepAdmin(admin.ModelAdmin):
+    list_display = ['started_at', 'finished_at', 'incremental', 'checked', 'skipped', 'mismatched', 'missing']
+    list_filter = ['incremental']
+    readonly_fields = ['started_at', 'finished_at', 'incremental', 'checked_since', 'checked', 'skipped',
+                       'mismatched', 'missing']
+    inlines = [ContractHashIssueInline]
@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from contracts.renewals import generate_renewals
+
+
+class Command(BaseCommand):
+    help = 'Create draft renewal contracts for signed contracts ending soon and send them for signature'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=30,
+            help='Renew contracts ending within this many days (default 30)',
+        )
+        parser.add_argument(
+            '--months',
+            type=int,
+            default=None,
+            help='Renewal length in months (defaults to each booking\'s current duration)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='List the contracts that would be renewed without creating anything',
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.now().date()
+        end_date = today + timedelta(days=options['days'])
+        contracts = generate_renewals(today, end_date, duration_months=options['months'], dry_run=options['dry_run'])
+
+        if options['dry_run']:
+            for contract in contracts:
+                self.stdout.write(f'{contract.contract_number}: room {contract.booking.room.room_code}, ends {contract.end_date}')
+            self.stdout.write(self.style.WARNING(f'Would renew {len(contracts)} contracts ending by {end_date}'))
+            return
+
+        self.stdout.write(self.style.SUCCESS(f'Created {len(contracts)} renewal contracts for contracts ending by {end_date}'))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from contracts.integrity import verify_contract_hashes
+
+
+class Command(BaseCommand):
+    help = 'Check stored contract PDFs against their recorded SHA-256 hashes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Check every file, not just those modified since the last sweep',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Hashing threads (defaults to CONTRACT_HASH_WORKERS)',
+        )
+
+    def handle(self, *args, **options):
+        sweep = verify_contract_hashes(incremental=not options['full'], workers=options['workers'])
+
+        for issue in sweep.issues.select_related('contract'):
+            self.stdout.write(self.style.WARNING(
+                f'{issue.get_issue_type_display()}: contract {issue.contract.contract_number} ({issue.file_name})'
+            ))
+
+        style = self.style.WARNING if sweep.mismatched or sweep.missing else self.style.SUCCESS
+        self.stdout.write(style(
+            f'Checked {sweep.checked} contract PDFs ({sweep.skipped} unchanged since the last sweep): '
+            f'{sweep.mismatched} mismatched, {sweep.missing} missing'
+        ))
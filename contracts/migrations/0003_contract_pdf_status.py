@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0002_contract_hot_query_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contract',
+            name='pdf_status',
+            field=models.CharField(choices=[('none', 'Not Generated'), ('pending', 'Generating'), ('ready', 'Ready'), ('failed', 'Failed')], default='none', max_length=20),
+        ),
+    ]
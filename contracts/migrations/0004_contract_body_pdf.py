@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0003_contract_pdf_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contract',
+            name='body_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='contract',
+            name='body_pdf',
+            field=models.FileField(blank=True, null=True, upload_to='contracts/bodies/'),
+        ),
+    ]
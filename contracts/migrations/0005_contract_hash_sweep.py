@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:59
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0004_contract_body_pdf'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContractHashSweep',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('incremental', models.BooleanField(default=True)),
+                ('checked_since', models.DateTimeField(blank=True, null=True)),
+                ('checked', models.PositiveIntegerField(default=0)),
+                ('skipped', models.PositiveIntegerField(default=0)),
+                ('mismatched', models.PositiveIntegerField(default=0)),
+                ('missing', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ContractHashIssue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('issue_type', models.CharField(choices=[('mismatch', 'Hash Mismatch'), ('missing', 'File Missing'), ('unhashed', 'No Stored Hash')], max_length=20)),
+                ('file_name', models.CharField(max_length=255)),
+                ('expected_hash', models.CharField(blank=True, max_length=64)),
+                ('actual_hash', models.CharField(blank=True, max_length=64)),
+                ('detail', models.CharField(blank=True, max_length=255)),
+                ('contract', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hash_issues', to='contracts.contract')),
+                ('sweep', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='issues', to='contracts.contracthashsweep')),
+            ],
+            options={
+                'ordering': ['sweep', 'contract'],
+            },
+        ),
+    ]
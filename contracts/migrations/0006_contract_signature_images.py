@@ -0,0 +1,117 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:11
+
+import base64
+import binascii
+import io
+
+from django.core.files.base import ContentFile
+from django.db import migrations, models
+
+SIGNATURE_FIELDS = [
+    ('digital_signature', 'signature_image', 'contract'),
+    ('digital_signature_tenant', 'tenant_signature_image', 'tenant'),
+    ('digital_signature_staff', 'staff_signature_image', 'staff'),
+]
+
+
+def _png(data_url):
+    """PNG bytes of a stored signature; raises ValueError rather than losing one that cannot be decoded"""
+    from PIL import Image, UnidentifiedImageError
+
+    encoded = data_url.partition(',')[2] if data_url.strip().startswith('data:') else data_url
+    # Stored values may be wrapped over several lines or have lost their padding
+    encoded = ''.join(encoded.split())
+    if not encoded:
+        return None
+    encoded += '=' * (-len(encoded) % 4)
+    try:
+        if '-' in encoded or '_' in encoded:
+            raw = base64.urlsafe_b64decode(encoded)
+        else:
+            raw = base64.b64decode(encoded)
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"Undecodable signature: {e}")
+    if not raw:
+        raise ValueError("Undecodable signature: no data")
+    try:
+        with Image.open(io.BytesIO(raw)) as image:
+            output = io.BytesIO()
+            image.save(output, 'PNG', optimize=True)
+            return output.getvalue()
+    except (UnidentifiedImageError, OSError):
+        return raw
+
+
+def signatures_to_files(apps, schema_editor):
+    Contract = apps.get_model('contracts', 'Contract')
+    has_signature = models.Q()
+    for text_field, _, _ in SIGNATURE_FIELDS:
+        has_signature |= ~models.Q(**{text_field: ''})
+
+    for contract in Contract.objects.filter(has_signature).iterator(chunk_size=200):
+        changed = []
+        for text_field, image_field, role in SIGNATURE_FIELDS:
+            try:
+                png = _png(getattr(contract, text_field)) if getattr(contract, text_field) else None
+            except ValueError as e:
+                # The text columns are dropped below, so stop here rather than lose a signed contract's signature
+                raise ValueError(f"Contract {contract.contract_number} {text_field}: {e}") from e
+            if png:
+                getattr(contract, image_field).save(f"{role}_{contract.contract_number}.png", ContentFile(png), save=False)
+                changed.append(image_field)
+        if changed:
+            contract.save(update_fields=changed)
+
+
+def files_to_signatures(apps, schema_editor):
+    Contract = apps.get_model('contracts', 'Contract')
+    has_image = models.Q()
+    for _, image_field, _ in SIGNATURE_FIELDS:
+        has_image |= (models.Q(**{f'{image_field}__isnull': False}) & ~models.Q(**{image_field: ''}))
+
+    for contract in Contract.objects.filter(has_image).iterator(chunk_size=200):
+        for text_field, image_field, _ in SIGNATURE_FIELDS:
+            field_file = getattr(contract, image_field)
+            if field_file:
+                with field_file.open('rb') as stored:
+                    encoded = base64.b64encode(stored.read()).decode()
+                setattr(contract, text_field, f"data:image/png;base64,{encoded}")
+        contract.save(update_fields=[text_field for text_field, _, _ in SIGNATURE_FIELDS])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0005_contract_hash_sweep'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contract',
+            name='signature_image',
+            field=models.ImageField(blank=True, null=True, upload_to='contracts/signatures/'),
+        ),
+        migrations.AddField(
+            model_name='contract',
+            name='staff_signature_image',
+            field=models.ImageField(blank=True, null=True, upload_to='contracts/signatures/'),
+        ),
+        migrations.AddField(
+            model_name='contract',
+            name='tenant_signature_image',
+            field=models.ImageField(blank=True, null=True, upload_to='contracts/signatures/'),
+        ),
+        migrations.RunPython(signatures_to_files, files_to_signatures),
+        migrations.RemoveField(
+            model_name='contract',
+            name='digital_signature',
+        ),
+        migrations.RemoveField(
+            model_name='contract',
+            name='digital_signature_staff',
+        ),
+        migrations.RemoveField(
+            model_name='contract',
+            name='digital_signature_tenant',
+        ),
+    ]
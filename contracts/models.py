@@ -1,8 +1,9 @@
 import logging
 import random
 
+from django.conf import settings
 from django.core.files.base import ContentFile
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 
 from bookings.models import Booking
@@ -14,6 +15,13 @@ logger = logging.getLogger(__name__)
 
 
 class Contract(models.Model):
+    PDF_STATUS = [
+        ('none', 'Not Generated'),
+        ('pending', 'Generating'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    ]
+
     CONTRACT_STATUS = [
         ('draft', 'Draft'),
         ('sent', 'Sent for Signature'),
@@ -36,7 +44,8 @@ class Contract(models.Model):
     # Status & Signatures
     status = models.CharField(max_length=20, choices=CONTRACT_STATUS, default='draft')
     signed_date = models.DateTimeField(null=True, blank=True)
-    digital_signature = models.TextField(blank=True)  # Store signature data
+    # Signature images live in files (see contracts.signatures); rows only hold the names
+    signature_image = models.ImageField(upload_to='contracts/signatures/', null=True, blank=True)
 
     # Temporary Stay Information
     temporary_room = models.ForeignKey(Room, on_delete=models.SET_NULL, null=True, blank=True,
@@ -49,8 +58,8 @@ class Contract(models.Model):
                                               help_text="Rent for permanent room")
     rent_difference = models.DecimalField(max_digits=10, decimal_places=2, default=0,
                                           help_text="Positive = refund, Negative = additional payment")
-    digital_signature_tenant = models.TextField(blank=True)  # Store tenant's signature data
-    digital_signature_staff = models.TextField(blank=True)  # Store staff signature
+    tenant_signature_image = models.ImageField(upload_to='contracts/signatures/', null=True, blank=True)
+    staff_signature_image = models.ImageField(upload_to='contracts/signatures/', null=True, blank=True)
     tenant_signed_date = models.DateTimeField(null=True, blank=True)
     staff_signed_date = models.DateTimeField(null=True, blank=True)
 
@@ -63,6 +72,10 @@ class Contract(models.Model):
     # Contract generation
     contract_pdf = models.FileField(upload_to='contracts/pdfs/', null=True, blank=True)
     contract_hash = models.CharField(max_length=64, blank=True)  # For integrity verification
+    # Unsigned contract body, rendered once; signatures are stamped onto it (see contracts.stamping)
+    body_pdf = models.FileField(upload_to='contracts/bodies/', null=True, blank=True)
+    body_hash = models.CharField(max_length=64, blank=True)
+    pdf_status = models.CharField(max_length=20, choices=PDF_STATUS, default='none')
 
     # Status Tracking
     is_temporary_stay_active = models.BooleanField(default=False)
@@ -85,8 +98,17 @@ class Contract(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Set from the rendered PDF itself, so it must not change the PDF cache key (see notifications.pdf)
+    pdf_cache_ignore_fields = ('contract_hash', 'body_hash', 'pdf_status')
+    # Rendered into the cached body PDF, which is discarded when any of them change (see contracts.stamping)
+    body_fields = ('booking', 'start_date', 'end_date', 'monthly_rent', 'security_deposit', 'stamp_duty')
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Renewal, move-out and final warning reminders look up signed contracts by end date
+            models.Index(fields=['status', 'end_date'], name='contract_status_end_idx'),
+        ]
 
     def __str__(self):
         return f"Contract {self.contract_number} - {self.booking.tenant.full_name}"
@@ -98,7 +120,29 @@ class Contract(models.Model):
     def save(self, *args, **kwargs):
         if not self.contract_number:
             self.contract_number = f"CONTRACT-{uuid.uuid4().hex[:8].upper()}"
+        stale_body = self._stale_body(kwargs)
         super().save(*args, **kwargs)
+        if stale_body:
+            self.body_pdf.storage.delete(stale_body)
+
+    def _stale_body(self, save_kwargs):
+        """Detach the cached body if its terms changed since it was rendered; returns the old file name"""
+        update_fields = save_kwargs.get('update_fields')
+        if not self.pk or not self.body_pdf:
+            return None
+        if update_fields is not None and not set(update_fields) & set(self.body_fields):
+            return None
+        attnames = [self._meta.get_field(name).attname for name in self.body_fields]
+        stored = Contract.objects.filter(pk=self.pk).values(*attnames).first()
+        if stored is None or all(stored[attname] == getattr(self, attname) for attname in attnames):
+            return None
+
+        stale_body = self.body_pdf.name
+        self.body_pdf = None
+        self.body_hash = ''
+        if update_fields is not None:
+            save_kwargs['update_fields'] = {*update_fields, 'body_pdf', 'body_hash'}
+        return stale_body
 
     def calculate_rent_difference(self):
         """Calculate rent difference between temporary and permanent stays"""
@@ -164,36 +208,51 @@ class Contract(models.Model):
     @property
     def is_fully_signed(self):
         """Check if contract is fully signed by both parties"""
-        return bool(self.digital_signature_tenant and self.digital_signature_staff)
+        return bool(self.tenant_signature_image and self.staff_signature_image)
 
     @property
     def signing_status(self):
         """Get current signing status"""
         if self.is_fully_signed:
             return 'fully_signed'
-        elif self.digital_signature_tenant:
+        elif self.tenant_signature_image:
             return 'tenant_signed'
-        elif self.digital_signature_staff:
+        elif self.staff_signature_image:
             return 'staff_signed'
         else:
             return 'unsigned'
 
+    def set_signature(self, role, data_url):
+        """Store a data-URL signature ('tenant', 'staff' or 'contract') as an image file; the caller saves"""
+        from .signatures import SIGNATURE_FIELDS, signature_png
+
+        field_file = getattr(self, SIGNATURE_FIELDS[role])
+        png = signature_png(data_url)
+        if field_file:
+            field_file.delete(save=False)
+        field_file.save(f"{role}_{self.contract_number}.png", ContentFile(png), save=False)
+
     def generate_contract_pdf(self):
         """Generate PDF version of the contract"""
         try:
-            from weasyprint import HTML
-            from django.template.loader import render_to_string
+            from notifications.pdf import PDFService
+            from .signatures import signature_data_url
+            from .stamping import stamp_contract_pdf
             import hashlib
 
-            context = {
-                'contract': self,
-                'tenant': self.booking.tenant,
-                'room': self.booking.room,
-                'today': timezone.now().date(),
-            }
-
-            html_string = render_to_string('contracts/contract_pdf.html', context)
-            pdf_file = HTML(string=html_string).write_pdf()
+            if getattr(settings, 'CONTRACT_PDF_STAMPING', True):
+                # Cached body plus a pydyf signature page, no layout pass
+                pdf_file = stamp_contract_pdf(self)
+            else:
+                context = {
+                    'contract': self,
+                    'tenant': self.booking.tenant,
+                    'room': self.booking.room,
+                    'today': timezone.now().date(),
+                    'tenant_signature': signature_data_url(self.tenant_signature_image),
+                    'staff_signature': signature_data_url(self.staff_signature_image),
+                }
+                pdf_file = PDFService.render('contracts/contract_pdf.html', context)
 
             # Generate hash for integrity
             contract_hash = hashlib.sha256(pdf_file).hexdigest()
@@ -202,13 +261,33 @@ class Contract(models.Model):
             filename = f"contract_{self.contract_number}_{timezone.now().strftime('%Y%m%d')}.pdf"
             self.contract_pdf.save(filename, ContentFile(pdf_file), save=False)
             self.contract_hash = contract_hash
-            self.save()
+            self.pdf_status = 'ready'
+            # Only the PDF fields, so a background run cannot overwrite a concurrent signature or status change
+            self.save(update_fields=['contract_pdf', 'contract_hash', 'pdf_status', 'updated_at'])
 
             return True
         except Exception as e:
             logger.error(f"Failed to generate contract PDF: {e}")
+            Contract.objects.filter(pk=self.pk).update(pdf_status='failed')
+            self.pdf_status = 'failed'
             return False
 
+    def queue_signed_contract_processing(self):
+        """Render the signed PDF and send the confirmations in a worker once the signature is committed"""
+        from notifications.tasks import process_signed_contract
+
+        pk = self.pk
+
+        def enqueue():
+            try:
+                process_signed_contract.delay(pk)
+            except Exception as e:
+                # Leave a visible failure for the signing page instead of polling forever
+                logger.error(f"Failed to queue signed contract processing for contract {pk}: {e}")
+                Contract.objects.filter(pk=pk, pdf_status='pending').update(pdf_status='failed')
+
+        transaction.on_commit(enqueue)
+
     def send_for_tenant_signature(self):
         from notifications.services import EmailService
 
@@ -230,3 +309,45 @@ class Contract(models.Model):
         except Exception as e:
             logger.error(f"Failed to send contract for signature: {e}")
             return False
+
+
+class ContractHashSweep(models.Model):
+    """One run of the contract PDF integrity check (see contracts.integrity)"""
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    incremental = models.BooleanField(default=True)
+    # Files not modified since this moment were skipped (incremental runs only)
+    checked_since = models.DateTimeField(null=True, blank=True)
+
+    checked = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    mismatched = models.PositiveIntegerField(default=0)
+    missing = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f"Hash sweep {self.started_at:%Y-%m-%d %H:%M} - {self.mismatched} mismatched, {self.missing} missing"
+
+
+class ContractHashIssue(models.Model):
+    ISSUE_TYPES = [
+        ('mismatch', 'Hash Mismatch'),
+        ('missing', 'File Missing'),
+        ('unhashed', 'No Stored Hash'),
+    ]
+
+    sweep = models.ForeignKey(ContractHashSweep, on_delete=models.CASCADE, related_name='issues')
+    contract = models.ForeignKey(Contract, on_delete=models.CASCADE, related_name='hash_issues')
+    issue_type = models.CharField(max_length=20, choices=ISSUE_TYPES)
+    file_name = models.CharField(max_length=255)
+    expected_hash = models.CharField(max_length=64, blank=True)
+    actual_hash = models.CharField(max_length=64, blank=True)
+    detail = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        ordering = ['sweep', 'contract']
+
+    def __str__(self):
+        return f"{self.get_issue_type_display()} - {self.file_name}"
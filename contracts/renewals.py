@@ -0,0 +1,143 @@
+"""Bulk renewal offers for expiring contracts.
+
+``generate_renewals`` selects every signed contract ending in a date window
+with one query and creates the draft renewal ``Booking`` and ``Contract`` rows
+with ``bulk_create`` in one transaction. The signature emails are then handed
+to a single ``send_renewal_offers`` task once the transaction commits, and
+``mark_offered`` flags the old contracts as offered only for the emails that
+were actually delivered.
+
+Contracts that already have a renewal booking (same tenant and room, moving
+in on the contract's end date) are skipped, so re-running a window is safe.
+"""
+import logging
+import random
+import uuid
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+
+def renewal_rent(booking):
+    """Renewal rent: the current rent, or the room's advertised price when that is higher"""
+    post_ad_price = booking.room.post_ad_price
+    if post_ad_price and post_ad_price > booking.monthly_rent:
+        return post_ad_price
+    return booking.monthly_rent
+
+
+def expiring_contracts(start_date, end_date):
+    """Signed contracts ending between the dates that have no renewal booking yet"""
+    from bookings.models import Booking
+    from .models import Contract
+
+    renewal = Booking.objects.filter(
+        tenant_id=OuterRef('booking__tenant_id'),
+        room_id=OuterRef('booking__room_id'),
+        move_in_date=OuterRef('end_date'),
+    ).exclude(status='cancelled')
+
+    return Contract.objects.filter(
+        status='signed',
+        end_date__gte=start_date,
+        end_date__lte=end_date,
+        renewal_status__in=['not_sent', 'sent'],
+    ).exclude(Exists(renewal)).select_related('booking__room').order_by('end_date', 'pk')
+
+
+def mark_offered(renewals):
+    """Flag the contracts the delivered ``renewals`` replace as offered; returns how many were flagged"""
+    from .models import Contract
+
+    renewals = list(renewals)
+    if not renewals:
+        return 0
+    replaced = Q()
+    for renewal in renewals:
+        replaced |= Q(
+            booking__tenant_id=renewal.booking.tenant_id,
+            booking__room_id=renewal.booking.room_id,
+            end_date=renewal.start_date,
+        )
+    now = timezone.now()
+    # Contracts renewed or declined in the meantime keep their answer
+    return Contract.objects.filter(replaced, status='signed', renewal_status='not_sent').update(
+        renewal_status='sent', renewal_sent_date=now, updated_at=now,
+    )
+
+
+def queue_renewal_offers(contract_ids):
+    """Send the renewal contracts for signature once the surrounding transaction commits"""
+    from notifications.tasks import send_renewal_offers
+
+    contract_ids = list(contract_ids)
+
+    def enqueue():
+        try:
+            send_renewal_offers.delay(contract_ids)
+        except Exception as e:
+            # The drafts stay in place; staff can send them from the contract admin
+            logger.error(f"Failed to queue {len(contract_ids)} renewal offers: {e}")
+
+    transaction.on_commit(enqueue)
+
+
+def generate_renewals(start_date, end_date, duration_months=None, dry_run=False):
+    """Create draft renewals for contracts ending between the dates.
+
+    ``duration_months`` defaults to each booking's current duration. Returns the
+    expiring contracts that were (or, with ``dry_run``, would be) renewed.
+    """
+    from bookings.models import Booking
+    from .models import Contract
+
+    expiring = list(expiring_contracts(start_date, end_date))
+    if dry_run or not expiring:
+        return expiring
+
+    bookings = []
+    contracts = []
+    for contract in expiring:
+        old_booking = contract.booking
+        months = duration_months or old_booking.duration_months
+        new_end_date = contract.end_date + timedelta(days=30 * months)
+        rent = renewal_rent(old_booking)
+
+        booking = Booking(
+            tenant_id=old_booking.tenant_id,
+            room_id=old_booking.room_id,
+            move_in_date=contract.end_date,
+            move_out_date=new_end_date,
+            duration_months=months,
+            monthly_rent=rent,
+            status='pending',
+            payment_status='pending',
+        )
+        booking.calculate_total_deposit()
+        bookings.append(booking)
+        contracts.append(Contract(
+            contract_number=f"CONTRACT-{uuid.uuid4().hex[:8].upper()}",
+            start_date=contract.end_date,
+            end_date=new_end_date,
+            monthly_rent=rent,
+            security_deposit=contract.security_deposit,
+            status='draft',
+            email_verification_code=str(random.randint(100000, 999999)),
+            whatsapp_verification_code=str(random.randint(100000, 999999)),
+        ))
+
+    with transaction.atomic():
+        Booking.objects.bulk_create(bookings, batch_size=BATCH_SIZE)
+        for booking, renewal in zip(bookings, contracts):
+            renewal.booking = booking
+        Contract.objects.bulk_create(contracts, batch_size=BATCH_SIZE)
+        queue_renewal_offers(renewal.pk for renewal in contracts)
+
+    logger.info(f"Created {len(contracts)} renewal contracts for contracts ending {start_date} - {end_date}")
+    return expiring
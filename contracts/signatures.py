@@ -0,0 +1,47 @@
+"""Signature images stored as files.
+
+The signing pads post signatures as base64 PNG data URLs. They are decoded,
+re-encoded as optimised PNGs and saved under ``contracts/signatures/`` on the
+contract's ``*_signature_image`` fields, so contract rows only carry a file
+name and the image bytes are read when a PDF or page actually needs them.
+"""
+import base64
+import binascii
+import io
+
+SIGNATURE_FIELDS = {
+    'tenant': 'tenant_signature_image',
+    'staff': 'staff_signature_image',
+    'contract': 'signature_image',
+}
+
+
+def signature_png(data_url):
+    """Optimised PNG bytes of a data-URL (or bare base64) signature"""
+    from PIL import Image, UnidentifiedImageError
+
+    encoded = data_url.partition(',')[2] if data_url.startswith('data:') else data_url
+    try:
+        raw = base64.b64decode(encoded, validate=True)
+        with Image.open(io.BytesIO(raw)) as image:
+            image = image.convert('RGBA') if image.mode not in ('RGBA', 'LA', 'L') else image.copy()
+    except (binascii.Error, UnidentifiedImageError, OSError) as e:
+        raise ValueError(f"Invalid signature image: {e}")
+
+    output = io.BytesIO()
+    image.save(output, 'PNG', optimize=True)
+    return output.getvalue()
+
+
+def read_signature(field_file):
+    """PNG bytes of a stored signature, or b'' when there is none"""
+    if not field_file:
+        return b''
+    with field_file.open('rb') as stored:
+        return stored.read()
+
+
+def signature_data_url(field_file):
+    """Stored signature as a data URL for templates, or '' when there is none"""
+    png = read_signature(field_file)
+    return f"data:image/png;base64,{base64.b64encode(png).decode()}" if png else ''
@@ -0,0 +1,322 @@
+"""Signature pages stamped onto a cached contract body.
+
+The contract body (the terms, without signatures) is rendered once with
+WeasyPrint as an uncompressed PDF and kept on ``Contract.body_pdf``, with its
+SHA-256 in ``Contract.body_hash``. Signing then only builds one extra page
+with pydyf (signature images, names and dates) and appends it to the body as
+a PDF incremental update: the new objects, a new version of the page tree
+root and a cross-reference section that points back at the body's.
+
+The body bytes are an unchanged prefix of every signed PDF, so
+``verify_sections`` can check the body against ``body_hash`` and the whole
+document against ``contract_hash`` separately.
+"""
+import hashlib
+import io
+import logging
+import re
+from dataclasses import dataclass
+
+import pydyf
+from django.core.files.base import ContentFile
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+BODY_TEMPLATE = 'contracts/contract_pdf.html'
+# Used when the body's first page has no MediaBox of its own (A4, in points)
+DEFAULT_PAGE_SIZE = (595, 842)
+# Largest box a signature image is scaled into, in points
+SIGNATURE_BOX = (220, 80)
+MARGIN = 50
+
+TRAILER = re.compile(rb'trailer\s*<<(.*?)>>\s*startxref\s+(\d+)\s*%%EOF', re.S)
+REFERENCE = re.compile(rb'(\d+)\s+0\s+R')
+
+
+@dataclass
+class Signature:
+    label: str
+    name: str
+    image: bytes  # PNG of the drawn signature
+    signed_at: object
+
+
+def _ascii(text):
+    # Helvetica is not embedded, so only WinAnsi text is safe
+    return str(text).encode('ascii', 'replace').decode()
+
+
+def _dictionary_end(pdf, start):
+    """Offset just past the ``>>`` closing the dictionary that opens at ``start``"""
+    depth = 0
+    position = start
+    while position < len(pdf):
+        if pdf.startswith(b'<<', position):
+            depth += 1
+            position += 2
+        elif pdf.startswith(b'>>', position):
+            depth -= 1
+            position += 2
+            if depth == 0:
+                return position
+        else:
+            position += 1
+    raise ValueError("Unterminated PDF dictionary")
+
+
+def _xref_offsets(pdf, xref_offset):
+    """``{object number: offset}`` from the classic cross-reference table at ``xref_offset``"""
+    lines = iter(pdf[xref_offset:].split(b'trailer', 1)[0].splitlines())
+    if next(lines, b'').strip() != b'xref':
+        raise ValueError("No cross-reference table at startxref")
+    offsets = {}
+    for line in lines:
+        fields = line.split()
+        if len(fields) == 2:
+            number = int(fields[0])
+        elif len(fields) == 3:
+            if fields[2] == b'n':
+                offsets[number] = int(fields[0])
+            number += 1
+    return offsets
+
+
+def _object_dictionary(pdf, offsets, number):
+    """Source of the dictionary of indirect object ``number``"""
+    if number not in offsets:
+        raise ValueError(f"PDF object {number} not found")
+    header = re.compile(rb'%d 0 obj\s*<<' % number).match(pdf, offsets[number])
+    if not header:
+        raise ValueError(f"PDF object {number} is not a dictionary")
+    start = header.end() - 2
+    return pdf[start:_dictionary_end(pdf, start)]
+
+
+def _reference(dictionary, key):
+    match = re.search(rb'/' + key + rb'\s+(\d+)\s+0\s+R', dictionary)
+    if not match:
+        raise ValueError(f"PDF dictionary has no /{key.decode()} reference")
+    return int(match.group(1))
+
+
+def _last_trailer(pdf):
+    trailers = list(TRAILER.finditer(pdf))
+    if not trailers:
+        # WeasyPrint's default output keeps its trailer in a compressed xref stream
+        raise ValueError("Contract body must be an uncompressed PDF with a classic trailer")
+    return trailers[-1]
+
+
+def _page_size(pdf, offsets, pages):
+    kids = re.search(rb'/Kids\s*\[([^\]]*)\]', pages)
+    first = REFERENCE.search(kids.group(1)) if kids else None
+    if first:
+        media_box = re.search(rb'/MediaBox\s*\[([^\]]*)\]', _object_dictionary(pdf, offsets, int(first.group(1))))
+        if media_box:
+            x0, y0, x1, y1 = (float(value) for value in media_box.group(1).split())
+            return x1 - x0, y1 - y0
+    return DEFAULT_PAGE_SIZE
+
+
+def _signature_image(png):
+    """(width, height, image XObject) for a PNG signature, flattened onto white"""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(png)) as image:
+        image = image.convert('RGBA')
+        flattened = Image.new('RGB', image.size, 'white')
+        flattened.paste(image, mask=image.getchannel('A'))
+    width, height = flattened.size
+    return width, height, pydyf.Stream([flattened.tobytes()], extra={
+        'Type': '/XObject',
+        'Subtype': '/Image',
+        'Width': width,
+        'Height': height,
+        'ColorSpace': '/DeviceRGB',
+        'BitsPerComponent': 8,
+    }, compress=True)
+
+
+def _text(content, x, y, size, text):
+    content.begin_text()
+    content.set_font_size('F1', size)
+    content.set_text_matrix(1, 0, 0, 1, x, y)
+    content.show_text_string(_ascii(text))
+    content.end_text()
+
+
+def _signature_page(signatures, contract_number, body_hash, page_size, parent, first_number):
+    """Objects of the signature page numbered from ``first_number``, the page dictionary last"""
+    width, height = page_size
+    font = pydyf.Dictionary({
+        'Type': '/Font', 'Subtype': '/Type1', 'BaseFont': '/Helvetica', 'Encoding': '/WinAnsiEncoding',
+    })
+    content = pydyf.Stream(compress=True)
+    images = {}
+
+    _text(content, MARGIN, height - 70, 16, f"Signatures - Contract {contract_number}")
+    y = height - 110
+    for index, signature in enumerate(signatures):
+        label = f"{signature.label}: {signature.name}" if signature.name else signature.label
+        _text(content, MARGIN, y, 12, label)
+        y -= 10
+        try:
+            image_width, image_height, image = _signature_image(signature.image)
+        except Exception as e:
+            logger.error(f"Unreadable {signature.label} signature on contract {contract_number}: {e}")
+        else:
+            scale = min(SIGNATURE_BOX[0] / image_width, SIGNATURE_BOX[1] / image_height)
+            y -= image_height * scale
+            images[f'Im{index}'] = image
+            content.push_state()
+            content.set_matrix(image_width * scale, 0, 0, image_height * scale, MARGIN, y)
+            content.draw_x_object(f'Im{index}')
+            content.pop_state()
+        y -= 18
+        if signature.signed_at:
+            signed_at = timezone.localtime(signature.signed_at)
+            _text(content, MARGIN, y, 10, f"Signed {signed_at:%Y-%m-%d %H:%M %Z}")
+        y -= 40
+
+    _text(content, MARGIN, MARGIN, 8, f"Contract body SHA-256: {body_hash}")
+
+    page = pydyf.Dictionary()
+    objects = [font, content, *images.values(), page]
+    for number, pdf_object in enumerate(objects, start=first_number):
+        pdf_object.number = number
+
+    page.update({
+        'Type': '/Page',
+        'Parent': parent,
+        'MediaBox': pydyf.Array([0, 0, width, height]),
+        'Contents': content.reference,
+        'Resources': pydyf.Dictionary({
+            'Font': pydyf.Dictionary({'F1': font.reference}),
+            'XObject': pydyf.Dictionary({name: image.reference for name, image in images.items()}),
+        }),
+    })
+    return objects
+
+
+def _xref(offsets):
+    """Cross-reference section for ``{object number: offset}``, in consecutive runs"""
+    lines = [b'xref', b'0 1', b'0000000000 65535 f ']
+    numbers = sorted(offsets)
+    start = 0
+    while start < len(numbers):
+        end = start
+        while end + 1 < len(numbers) and numbers[end + 1] == numbers[end] + 1:
+            end += 1
+        lines.append(b'%d %d' % (numbers[start], end - start + 1))
+        lines.extend(b'%010d 00000 n ' % offsets[number] for number in numbers[start:end + 1])
+        start = end + 1
+    return b'\n'.join(lines) + b'\n'
+
+
+def stamp_signatures(body, signatures, contract_number='', body_hash=''):
+    """``body`` plus a signature page, appended as an incremental update"""
+    trailer = _last_trailer(body)
+    trailer_entries, previous_xref = trailer.group(1), int(trailer.group(2))
+    if re.search(rb'/Prev\s+\d+', trailer_entries):
+        raise ValueError("Contract body already has an incremental update")
+    size = int(re.search(rb'/Size\s+(\d+)', trailer_entries).group(1))
+    offsets = _xref_offsets(body, previous_xref)
+    catalog = _object_dictionary(body, offsets, _reference(trailer_entries, b'Root'))
+    pages_number = _reference(catalog, b'Pages')
+    pages = _object_dictionary(body, offsets, pages_number)
+
+    objects = _signature_page(
+        signatures, contract_number, body_hash, _page_size(body, offsets, pages),
+        parent=b'%d 0 R' % pages_number, first_number=size,
+    )
+    page = objects[-1]
+
+    kids = re.search(rb'/Kids\s*\[([^\]]*)\]', pages)
+    count = int(re.search(rb'/Count\s+(\d+)', pages).group(1))
+    new_pages = pages.replace(kids.group(0), b'/Kids [' + kids.group(1).strip() + b' ' + page.reference + b']', 1)
+    new_pages = re.sub(rb'/Count\s+\d+', b'/Count %d' % (count + 1), new_pages, count=1)
+
+    output = bytearray(body)
+    if not output.endswith(b'\n'):
+        output += b'\n'
+    offsets = {pages_number: len(output)}
+    output += b'%d 0 obj\n' % pages_number + new_pages + b'\nendobj\n'
+    for pdf_object in objects:
+        offsets[pdf_object.number] = len(output)
+        output += pdf_object.indirect + b'\n'
+
+    xref_offset = len(output)
+    output += _xref(offsets)
+    entries = re.sub(rb'/(Size|Prev)\s+\d+', b'', trailer_entries).strip()
+    output += b'trailer\n<</Size %d /Prev %d\n' % (size + len(objects), previous_xref) + entries + b'\n>>\n'
+    output += b'startxref\n%d\n%%%%EOF\n' % xref_offset
+    return bytes(output)
+
+
+def split_sections(pdf):
+    """(body, signature update) of a stamped PDF; an unstamped PDF is all body"""
+    trailer = _last_trailer(pdf)
+    previous = re.search(rb'/Prev\s+(\d+)', trailer.group(1))
+    if not previous:
+        return pdf, b''
+    end = pdf.index(b'%%EOF', int(previous.group(1))) + len(b'%%EOF')
+    while end < len(pdf) and pdf[end:end + 1] in b'\r\n':
+        end += 1
+    return pdf[:end], pdf[end:]
+
+
+def contract_signatures(contract):
+    from .signatures import read_signature
+
+    signatures = []
+    if contract.tenant_signature_image:
+        signatures.append(Signature(
+            'Tenant', contract.booking.tenant.full_name,
+            read_signature(contract.tenant_signature_image), contract.tenant_signed_date,
+        ))
+    if contract.staff_signature_image:
+        signatures.append(Signature(
+            'For Wing Kong Property Management', '',
+            read_signature(contract.staff_signature_image), contract.staff_signed_date,
+        ))
+    return signatures
+
+
+def contract_body(contract):
+    """The contract's unsigned body PDF, rendered and stored on first use"""
+    from notifications.pdf import PDFService
+
+    if contract.body_pdf:
+        with contract.body_pdf.open('rb') as stored:
+            body = stored.read()
+        if hashlib.sha256(body).hexdigest() != contract.body_hash:
+            raise ValueError(f"Stored body of contract {contract.contract_number} does not match its hash")
+        return body
+
+    body = PDFService.render(BODY_TEMPLATE, {
+        'contract': contract,
+        'tenant': contract.booking.tenant,
+        'room': contract.booking.room,
+        'today': timezone.now().date(),
+        'body_only': True,
+    }, uncompressed=True)
+    contract.body_pdf.save(f"contract_body_{contract.contract_number}.pdf", ContentFile(body), save=False)
+    contract.body_hash = hashlib.sha256(body).hexdigest()
+    contract.save(update_fields=['body_pdf', 'body_hash', 'updated_at'])
+    return body
+
+
+def stamp_contract_pdf(contract):
+    """Signed contract PDF: the cached body plus a page with the current signatures"""
+    body = contract_body(contract)
+    return stamp_signatures(body, contract_signatures(contract), contract.contract_number, contract.body_hash)
+
+
+def verify_sections(contract, pdf):
+    """Check a contract PDF section by section: ``{'body': bool, 'document': bool}``"""
+    body, _ = split_sections(pdf)
+    return {
+        'body': bool(contract.body_hash) and hashlib.sha256(body).hexdigest() == contract.body_hash,
+        'document': bool(contract.contract_hash) and hashlib.sha256(pdf).hexdigest() == contract.contract_hash,
+    }
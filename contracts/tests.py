@@ -1,3 +1,498 @@
-from django.test import TestCase
+import base64
+import hashlib
+import importlib
+import io
+import json
+import os
+import time
+from datetime import timedelta
 
-# Create your tests here.
+import pydyf
+import pytest
+from PIL import Image, ImageDraw
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.mail import EmailMessage
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from bookings.models import Booking
+from contracts.integrity import verify_contract_hashes
+from contracts.models import Contract, ContractHashSweep
+from contracts.renewals import generate_renewals
+from contracts.signatures import read_signature
+from contracts.stamping import contract_body, split_sections, verify_sections
+from notifications import tasks
+from notifications.services import EmailService
+from notifications.whatsapp_service import WhatsAppService
+from properties.models import Property, Room
+from tenants.models import Tenant
+
+def signature_png():
+    image = Image.new('RGBA', (600, 200), (0, 0, 0, 0))
+    ImageDraw.Draw(image).line((20, 150, 580, 60), fill=(0, 0, 0, 255), width=4)
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(buffer.getvalue()).decode()
+
+
+def plain_pdf(html=None, uncompressed=False, pages=2):
+    """Stand-in for WeasyPrint's uncompressed output (classic xref table)"""
+    pdf = pydyf.PDF()
+    for _ in range(pages):
+        content = pydyf.Stream([b'BT /F1 12 Tf (Clause) Tj ET'])
+        pdf.add_object(content)
+        pdf.add_page(pydyf.Dictionary({
+            'Type': '/Page', 'Parent': pdf.pages.reference,
+            'MediaBox': pydyf.Array([0, 0, 595, 842]), 'Contents': content.reference,
+        }))
+    output = io.BytesIO()
+    pdf.write(output, identifier=True)
+    return output.getvalue()
+
+
+SIGNATURE = signature_png()
+
+
+class SignedContractSetup:
+
+    @pytest.fixture(autouse=True)
+    def pdf_output(self, settings, tmp_path, monkeypatch):
+        settings.MEDIA_ROOT = str(tmp_path)
+        settings.PDF_CACHE_ENABLED = False
+        monkeypatch.setattr('notifications.pdf._render_html', plain_pdf)
+        self.sent = []
+        monkeypatch.setattr(EmailService, 'send_contract_signed_confirmation',
+                            staticmethod(lambda contract: self.sent.append('email')))
+        monkeypatch.setattr(WhatsAppService, 'send_contract_signed_confirmation',
+                            staticmethod(lambda contract: self.sent.append('whatsapp')))
+
+    def setup_method(self):
+        user = User.objects.create_user(username="tenant1", email="t1@example.com", password="pass")
+        tenant = Tenant.objects.create(
+            user=user, full_name="John Doe", nationality="Testland",
+            date_of_birth="1990-01-01", gender="male", phone_number="123456789",
+        )
+        room = Room.objects.create(
+            property=Property.objects.create(name="P1", address="Addr", property_type="apartment", total_rooms=1),
+            room_code="R101", room_number="101", monthly_rent=5000,
+        )
+        today = timezone.now().date()
+        booking = Booking.objects.create(
+            tenant=tenant, room=room, move_in_date=today, move_out_date=today + timedelta(days=365),
+            duration_months=12, monthly_rent=5000,
+        )
+        self.contract = Contract.objects.create(
+            booking=booking, start_date=today, end_date=today + timedelta(days=365), monthly_rent=5000,
+            status='sent',
+        )
+
+    def sign(self, client):
+        return client.post(
+            reverse('contracts:save_tenant_signature', args=[self.contract.id]),
+            data=json.dumps({'signature': SIGNATURE}), content_type='application/json',
+        )
+
+
+@pytest.mark.django_db
+class TestAsyncContractSigning(SignedContractSetup):
+
+    def test_signature_returns_status_url_without_rendering(self, client, django_capture_on_commit_callbacks, monkeypatch):
+        queued = []
+        monkeypatch.setattr(tasks.process_signed_contract, 'delay', queued.append)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = self.sign(client)
+
+        assert response.status_code == 202
+        data = response.json()
+        assert data['success']
+        assert data['status_url'] == reverse('contracts:contract_pdf_status', args=[self.contract.id])
+        assert queued == [self.contract.id]
+        self.contract.refresh_from_db()
+        assert self.contract.tenant_signature_image.name.startswith('contracts/signatures/tenant_')
+        assert read_signature(self.contract.tenant_signature_image).startswith(b'\x89PNG')
+        assert self.contract.pdf_status == 'pending'
+        assert not self.contract.contract_pdf
+        assert self.sent == []
+
+        status = client.get(data['status_url']).json()
+        assert status == {'status': 'pending', 'ready': False, 'contract_hash': '', 'contract_url': ''}
+
+    def test_worker_renders_hashes_and_confirms(self, client, monkeypatch):
+        monkeypatch.setattr(tasks.process_signed_contract, 'delay', lambda pk: None)
+        self.sign(client)
+
+        assert tasks.process_signed_contract(self.contract.id) is True
+
+        self.contract.refresh_from_db()
+        assert self.contract.pdf_status == 'ready'
+        with self.contract.contract_pdf.open('rb') as signed:
+            assert self.contract.contract_hash == hashlib.sha256(signed.read()).hexdigest()
+        assert self.sent == ['email', 'whatsapp']
+
+        status = client.get(reverse('contracts:contract_pdf_status', args=[self.contract.id])).json()
+        assert status['ready']
+        assert status['contract_hash'] == self.contract.contract_hash
+        assert status['contract_url'] == reverse('website:tenant_contract_view', args=[self.contract.id])
+
+    def test_render_failure_is_reported_and_skips_confirmations(self, client, monkeypatch):
+        monkeypatch.setattr(tasks.process_signed_contract, 'delay', lambda pk: None)
+        monkeypatch.setattr('notifications.pdf._render_html', lambda html, uncompressed=False: 1 / 0)
+        self.sign(client)
+
+        assert tasks.process_signed_contract(self.contract.id) is False
+
+        self.contract.refresh_from_db()
+        assert self.contract.pdf_status == 'failed'
+        assert self.sent == []
+
+    def test_broker_outage_marks_pdf_failed(self, client, django_capture_on_commit_callbacks, monkeypatch):
+        def broker_down(pk):
+            raise ConnectionError("broker unavailable")
+        monkeypatch.setattr(tasks.process_signed_contract, 'delay', broker_down)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = self.sign(client)
+
+        assert response.status_code == 202
+        self.contract.refresh_from_db()
+        assert self.contract.pdf_status == 'failed'
+
+
+@pytest.mark.django_db
+class TestSignatureFiles(SignedContractSetup):
+
+    def test_signatures_are_stored_as_files_and_replaced(self):
+        self.contract.set_signature('staff', SIGNATURE)
+        self.contract.save()
+        folder = os.path.dirname(self.contract.staff_signature_image.path)
+
+        self.contract.set_signature('staff', SIGNATURE)
+        self.contract.save()
+
+        assert os.listdir(folder) == [os.path.basename(self.contract.staff_signature_image.name)]
+        assert len(read_signature(self.contract.staff_signature_image)) < len(SIGNATURE)
+        assert self.contract.signing_status == 'staff_signed'
+        # Only the file name is kept on the row
+        row = Contract.objects.values('staff_signature_image').get(pk=self.contract.pk)
+        assert row['staff_signature_image'] == self.contract.staff_signature_image.name
+
+    def test_invalid_signature_is_rejected(self, client):
+        response = client.post(
+            reverse('contracts:save_tenant_signature', args=[self.contract.id]),
+            data=json.dumps({'signature': 'data:image/png;base64,bm90IGFuIGltYWdl'}), content_type='application/json',
+        )
+
+        assert response.json()['success'] is False
+        self.contract.refresh_from_db()
+        assert not self.contract.tenant_signature_image
+        assert self.contract.tenant_signed_date is None
+
+
+class TestSignatureMigration:
+    migration = importlib.import_module('contracts.migrations.0006_contract_signature_images')
+
+    def test_wrapped_and_unpadded_signatures_are_decoded(self):
+        header, encoded = SIGNATURE.split(',', 1)
+        wrapped = header + ',\n' + '\r\n'.join(encoded[i:i + 76] for i in range(0, len(encoded), 76)) + '\n'
+
+        expected = self.migration._png(SIGNATURE)
+        assert self.migration._png(wrapped) == expected
+        assert self.migration._png(encoded.rstrip('=')) == expected
+
+    def test_undecodable_signature_aborts_the_migration(self):
+        with pytest.raises(ValueError):
+            self.migration._png('data:image/png;base64,A')
+
+
+@pytest.mark.django_db
+class TestSignatureStamping(SignedContractSetup):
+
+    def read_pdf(self):
+        self.contract.refresh_from_db()
+        with self.contract.contract_pdf.open('rb') as signed:
+            return signed.read()
+
+    def test_body_is_rendered_once_and_kept_byte_identical(self, monkeypatch):
+        renders = []
+        monkeypatch.setattr('notifications.pdf._render_html',
+                            lambda html, uncompressed=False: renders.append(uncompressed) or plain_pdf())
+        now = timezone.now()
+        self.contract.set_signature('tenant', SIGNATURE)
+        self.contract.tenant_signed_date = now
+        self.contract.save()
+
+        assert self.contract.generate_contract_pdf()
+        tenant_signed = self.read_pdf()
+
+        self.contract.set_signature('staff', SIGNATURE)
+        self.contract.staff_signed_date = now
+        self.contract.save()
+        assert self.contract.generate_contract_pdf()
+        fully_signed = self.read_pdf()
+
+        # One uncompressed body render; both signings only stamped a page onto it
+        assert renders == [True]
+        body = plain_pdf()
+        assert self.contract.body_hash == hashlib.sha256(body).hexdigest()
+        assert tenant_signed.startswith(body) and fully_signed.startswith(body)
+        assert split_sections(fully_signed)[0] == body
+        assert fully_signed.count(b'/Subtype /Image') == 2
+        assert b'/Count 3' in split_sections(fully_signed)[1]
+        assert verify_sections(self.contract, fully_signed) == {'body': True, 'document': True}
+
+    def test_changed_terms_discard_the_cached_body(self, monkeypatch):
+        renders = []
+        monkeypatch.setattr('notifications.pdf._render_html',
+                            lambda html, uncompressed=False: renders.append(html) or plain_pdf())
+        contract_body(self.contract)
+        first_body = self.contract.body_pdf.path
+
+        self.contract.pdf_status = 'ready'
+        self.contract.save(update_fields=['pdf_status', 'updated_at'])
+        self.contract.save()
+        assert self.contract.body_pdf and len(renders) == 1
+
+        self.contract.monthly_rent = 5500
+        self.contract.save(update_fields=['monthly_rent', 'updated_at'])
+
+        self.contract.refresh_from_db()
+        assert not self.contract.body_pdf and self.contract.body_hash == ''
+        assert not os.path.exists(first_body)
+        contract_body(self.contract)
+        assert len(renders) == 2
+
+    def test_verify_sections_pinpoints_tampering(self):
+        self.contract.set_signature('tenant', SIGNATURE)
+        self.contract.tenant_signed_date = timezone.now()
+        self.contract.save()
+        assert self.contract.generate_contract_pdf()
+        signed = self.read_pdf()
+        body, update = split_sections(signed)
+
+        forged_page = body + update.replace(b'/Count 3', b'/Count 2')
+        assert verify_sections(self.contract, forged_page) == {'body': True, 'document': False}
+
+        forged_body = body.replace(b'(Clause)', b'(Klause)', 1) + update
+        assert verify_sections(self.contract, forged_body) == {'body': False, 'document': False}
+
+    def test_full_render_mode(self, settings, monkeypatch):
+        settings.CONTRACT_PDF_STAMPING = False
+        monkeypatch.setattr('notifications.pdf._render_html', lambda html, uncompressed=False: b'%PDF-1.7 full render')
+
+        assert self.contract.generate_contract_pdf()
+
+        assert self.read_pdf() == b'%PDF-1.7 full render'
+        assert not self.contract.body_pdf
+
+
+@pytest.mark.django_db
+class TestContractHashSweep:
+
+    @pytest.fixture(autouse=True)
+    def media_root(self, settings, tmp_path):
+        settings.MEDIA_ROOT = str(tmp_path)
+
+    def setup_method(self):
+        room = Room.objects.create(
+            property=Property.objects.create(name="P1", address="Addr", property_type="apartment", total_rooms=3),
+            room_code="R101", room_number="101", monthly_rent=5000,
+        )
+        today = timezone.now().date()
+        self.contracts = []
+        for index in range(3):
+            tenant = Tenant.objects.create(
+                full_name=f"Tenant {index}", nationality="Testland",
+                date_of_birth="1990-01-01", gender="male", phone_number="123456789",
+            )
+            booking = Booking.objects.create(
+                tenant=tenant, room=room, move_in_date=today, move_out_date=today + timedelta(days=365),
+                duration_months=12, monthly_rent=5000,
+            )
+            self.contracts.append(Contract.objects.create(
+                booking=booking, start_date=today, end_date=today + timedelta(days=365), monthly_rent=5000,
+            ))
+
+    def store_pdf(self, contract, content, recorded_hash=None):
+        contract.contract_pdf.save(f"contract_{contract.pk}.pdf", ContentFile(content), save=False)
+        contract.contract_hash = hashlib.sha256(recorded_hash or content).hexdigest()
+        contract.save()
+
+    def age_everything(self):
+        """Push files and rows into the past so the next incremental sweep sees them as unchanged"""
+        past = timezone.now() - timedelta(hours=1)
+        Contract.objects.update(updated_at=past)
+        ContractHashSweep.objects.update(started_at=past + timedelta(minutes=30))
+        for contract in Contract.objects.exclude(contract_pdf=''):
+            if os.path.exists(contract.contract_pdf.path):
+                os.utime(contract.contract_pdf.path, (past.timestamp(), past.timestamp()))
+
+    def test_sweep_records_mismatches_and_missing_files(self):
+        intact, tampered, lost = self.contracts
+        self.store_pdf(intact, b'%PDF-1.7 intact')
+        self.store_pdf(tampered, b'%PDF-1.7 tampered', recorded_hash=b'%PDF-1.7 original')
+        self.store_pdf(lost, b'%PDF-1.7 lost')
+        os.remove(lost.contract_pdf.path)
+
+        sweep = verify_contract_hashes(incremental=False, workers=2)
+
+        assert (sweep.checked, sweep.mismatched, sweep.missing) == (3, 1, 1)
+        assert sweep.finished_at is not None
+        issues = {issue.contract_id: issue for issue in sweep.issues.all()}
+        assert set(issues) == {tampered.pk, lost.pk}
+        assert issues[tampered.pk].issue_type == 'mismatch'
+        assert issues[tampered.pk].actual_hash == hashlib.sha256(b'%PDF-1.7 tampered').hexdigest()
+        assert issues[lost.pk].issue_type == 'missing'
+
+    def test_incremental_sweep_only_rehashes_changed_files(self):
+        for contract in self.contracts:
+            self.store_pdf(contract, f'%PDF-1.7 {contract.pk}'.encode())
+        verify_contract_hashes(incremental=False)
+        self.age_everything()
+
+        sweep = verify_contract_hashes()
+        assert (sweep.checked, sweep.skipped) == (0, 3)
+
+        # Modified on disk after the last sweep (e.g. replaced by hand)
+        changed = self.contracts[0]
+        with open(changed.contract_pdf.path, 'wb') as pdf_file:
+            pdf_file.write(b'%PDF-1.7 edited')
+        future = time.time() + 60
+        os.utime(changed.contract_pdf.path, (future, future))
+
+        sweep = verify_contract_hashes()
+        assert (sweep.checked, sweep.skipped, sweep.mismatched) == (1, 2, 1)
+        assert sweep.checked_since is not None
+        assert list(sweep.issues.values_list('contract_id', flat=True)) == [changed.pk]
+
+    def test_command_reports_issues(self):
+        self.store_pdf(self.contracts[0], b'%PDF-1.7 a', recorded_hash=b'%PDF-1.7 b')
+        output = io.StringIO()
+
+        call_command('verify_contract_hashes', '--full', stdout=output)
+
+        assert 'Hash Mismatch' in output.getvalue()
+        assert '1 mismatched, 0 missing' in output.getvalue()
+
+
+@pytest.mark.django_db
+class TestBulkRenewals:
+
+    def setup_method(self):
+        prop = Property.objects.create(name="P1", address="Addr", property_type="apartment", total_rooms=3)
+        self.today = timezone.now().date()
+        self.contracts = []
+        for index in range(6):
+            room = Room.objects.create(
+                property=prop, room_code=f"R{index}", room_number=str(index), monthly_rent=5000,
+                post_ad_price=5500 if index == 0 else 4500,
+            )
+            tenant = Tenant.objects.create(
+                full_name=f"Tenant {index}", nationality="Testland",
+                date_of_birth="1990-01-01", gender="male", phone_number="123456789",
+            )
+            end_date = self.today + timedelta(days=10 + index)
+            booking = Booking.objects.create(
+                tenant=tenant, room=room, move_in_date=end_date - timedelta(days=180), move_out_date=end_date,
+                duration_months=6, monthly_rent=5000, status='active',
+            )
+            self.contracts.append(Contract.objects.create(
+                booking=booking, start_date=booking.move_in_date, end_date=end_date,
+                monthly_rent=5000, security_deposit=10000, status='signed',
+            ))
+        # Outside the window / not signed
+        Contract.objects.filter(pk=self.contracts[5].pk).update(end_date=self.today + timedelta(days=60))
+        Contract.objects.filter(pk=self.contracts[4].pk).update(status='terminated')
+
+    def renewal_of(self, contract):
+        return Contract.objects.select_related('booking').get(
+            booking__tenant=contract.booking.tenant, start_date=contract.end_date,
+        )
+
+    def test_creates_draft_renewals_in_bulk_and_queues_one_batch(self, django_capture_on_commit_callbacks, monkeypatch):
+        queued = []
+        monkeypatch.setattr(tasks.send_renewal_offers, 'delay', queued.append)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                renewed = generate_renewals(self.today, self.today + timedelta(days=30))
+
+        assert [c.pk for c in renewed] == [c.pk for c in self.contracts[:4]]
+        # Select, two bulk inserts, one update (plus savepoint bookkeeping) regardless of batch size
+        assert len(queries) <= 6
+
+        first = self.renewal_of(self.contracts[0])
+        assert first.status == 'draft'
+        assert first.monthly_rent == 5500  # post_ad_price is higher
+        assert first.booking.monthly_rent == 5500
+        assert first.booking.status == 'pending'
+        assert first.end_date == self.contracts[0].end_date + timedelta(days=180)
+        assert first.contract_number.startswith('CONTRACT-')
+        assert len(first.email_verification_code) == 6
+        assert self.renewal_of(self.contracts[1]).monthly_rent == 5000  # post_ad_price is lower
+
+        assert len(queued) == 1
+        assert sorted(queued[0]) == sorted(self.renewal_of(c).pk for c in self.contracts[:4])
+        # Offered only once the task has delivered the email
+        assert set(Contract.objects.filter(pk__in=[c.pk for c in self.contracts[:4]]).values_list(
+            'renewal_status', flat=True)) == {'not_sent'}
+
+    def test_rerun_skips_contracts_already_renewed(self, monkeypatch):
+        monkeypatch.setattr(tasks.send_renewal_offers, 'delay', lambda ids: None)
+        generate_renewals(self.today, self.today + timedelta(days=30))
+
+        assert generate_renewals(self.today, self.today + timedelta(days=30)) == []
+        assert Contract.objects.filter(status='draft').count() == 4
+
+    def test_dry_run_command_creates_nothing(self):
+        output = io.StringIO()
+
+        call_command('generate_renewals', '--days', '30', '--dry-run', stdout=output)
+
+        assert 'Would renew 4 contracts' in output.getvalue()
+        assert not Contract.objects.filter(status='draft').exists()
+
+    def test_task_sends_each_offer(self, monkeypatch, mailoutbox):
+        monkeypatch.setattr(tasks.send_renewal_offers, 'delay', lambda ids: None)
+        generate_renewals(self.today, self.today + timedelta(days=30))
+        undeliverable = self.renewal_of(self.contracts[3])
+
+        def message(contract):
+            if contract.pk == undeliverable.pk:
+                raise ValueError("No address")
+            return EmailMessage(subject=contract.contract_number, to=["t@example.com"])
+
+        monkeypatch.setattr(EmailService, 'contract_for_signature_message', message)
+
+        drafts = Contract.objects.filter(status='draft').exclude(pk=undeliverable.pk)
+        assert tasks.send_renewal_offers(list(drafts.values_list('pk', flat=True)) + [undeliverable.pk]) == 3
+        assert sorted(message.subject for message in mailoutbox) == sorted(drafts.values_list('contract_number', flat=True))
+        assert all(drafts.values_list('tenant_email_verified', flat=True))
+        statuses = dict(Contract.objects.filter(pk__in=[c.pk for c in self.contracts[:4]]).values_list(
+            'pk', 'renewal_status'))
+        assert statuses == {**{c.pk: 'sent' for c in self.contracts[:3]}, self.contracts[3].pk: 'not_sent'}
+
+    def test_tenant_choice_sets_the_offered_renewal_length(self, client, monkeypatch):
+        monkeypatch.setattr(tasks.send_renewal_offers, 'delay', lambda ids: None)
+        generate_renewals(self.today, self.today + timedelta(days=30))
+        contract = self.contracts[0]
+        tenant = contract.booking.tenant
+        tenant.user = User.objects.create_user(username="renewer", email="renewer@example.com", password="pass")
+        tenant.save()
+        client.force_login(tenant.user)
+
+        response = client.post(
+            reverse('website:tenant_renewal_response', args=[contract.pk]),
+            {'renewal_response': 'yes', 'new_duration_months': '12'},
+        )
+
+        offered = self.renewal_of(contract)
+        assert response.url == reverse('website:tenant_contract_view', args=[offered.pk])
+        assert offered.end_date == contract.end_date + timedelta(days=360)
+        assert (offered.booking.duration_months, offered.booking.move_out_date) == (12, offered.end_date)
+        contract.refresh_from_db()
+        assert contract.renewal_status == 'renewed'
@@ -1,11 +1,11 @@
 import logging
 
+from django.conf import settings
 from django.contrib import messages
+from django.urls import reverse
 from django.utils import timezone
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_GET, require_POST
 
-from notifications.services import EmailService
-from notifications.whatsapp_service import WhatsAppService
 from reports.views import staff_required
 from .models import Contract
 from django.shortcuts import render, get_object_or_404, redirect
@@ -65,18 +65,19 @@ def save_tenant_signature(request, contract_id):
             signature_data = data.get('signature')
 
             if signature_data:
-                contract.digital_signature_tenant = signature_data
+                contract.set_signature('tenant', signature_data)
                 contract.tenant_signed_date = timezone.now()
+                contract.pdf_status = 'pending'
                 contract.save()
 
-                # Generate PDF version
-                contract.generate_contract_pdf()
-
-                # Send confirmation
-                EmailService.send_contract_signed_confirmation(contract)
-                WhatsAppService.send_contract_signed_confirmation(contract)
+                # PDF rendering, hashing and confirmations run in a worker; the page polls status_url
+                contract.queue_signed_contract_processing()
 
-                return JsonResponse({'success': True, 'message': 'Signature saved successfully'})
+                return JsonResponse({
+                    'success': True,
+                    'message': 'Signature saved successfully',
+                    'status_url': reverse('contracts:contract_pdf_status', args=[contract.id]),
+                }, status=202)
 
         except Exception as e:
             logger.error(f"Failed to save signature: {e}")
@@ -85,6 +86,20 @@ def save_tenant_signature(request, contract_id):
     return JsonResponse({'success': False, 'error': 'Invalid request'})
 
 
+@require_GET
+def contract_pdf_status(request, contract_id):
+    """Progress of the signed contract PDF, polled by the signing page"""
+    contract = get_object_or_404(Contract, id=contract_id)
+    ready = contract.pdf_status == 'ready'
+
+    return JsonResponse({
+        'status': contract.pdf_status,
+        'ready': ready,
+        'contract_hash': contract.contract_hash if ready else '',
+        'contract_url': reverse('website:tenant_contract_view', args=[contract.id]) if ready else '',
+    })
+
+
 @login_required
 def staff_sign_contract(request, contract_id):
     """Staff interface to sign contract"""
@@ -94,12 +109,20 @@ def staff_sign_contract(request, contract_id):
         signature_data = request.POST.get('signature')
 
         if signature_data:
-            contract.digital_signature_staff = signature_data
+            try:
+                contract.set_signature('staff', signature_data)
+            except ValueError as e:
+                messages.error(request, str(e))
+                return redirect('contracts:staff_sign_contract', contract_id=contract.id)
             contract.staff_signed_date = timezone.now()
             contract.staff_signed_by = request.user
             contract.status = 'signed'
             contract.save()
 
+            # Stamping the staff signature onto the cached body takes milliseconds
+            if getattr(settings, 'CONTRACT_PDF_STAMPING', True) and contract.body_pdf:
+                contract.generate_contract_pdf()
+
             # Update booking status
             booking = contract.booking
             booking.status = 'confirmed'
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenance', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='maintenanceticket',
+            index=models.Index(fields=['status', 'estimated_completion_date'], name='ticket_status_eta_idx'),
+        ),
+    ]
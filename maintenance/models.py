@@ -70,6 +70,9 @@ class MaintenanceTicket(models.Model):
 
     class Meta:
         ordering = ['-reported_date']
+        indexes = [
+            models.Index(fields=['status', 'estimated_completion_date'], name='ticket_status_eta_idx'),
+        ]
 
     def __str__(self):
         return f"Ticket {self.ticket_number} - {self.title}"
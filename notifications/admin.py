@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import NotificationLog
+from .models import NotificationLog, RenderedPDF, ScheduledEvent
 
 
 @admin.register(NotificationLog)
@@ -30,7 +30,9 @@ class NotificationLogAdmin(admin.ModelAdmin):
     readonly_fields = [
         'created_at',
         'updated_at',
-        'sent_at'
+        'sent_at',
+        'claimed_until',
+        'email_payload'
     ]
 
     fieldsets = (
@@ -61,6 +63,14 @@ class NotificationLogAdmin(admin.ModelAdmin):
             ),
             'classes': ('collapse',)
         }),
+        ('Outbox', {
+            'fields': (
+                'attempts',
+                'claimed_until',
+                'email_payload'
+            ),
+            'classes': ('collapse',)
+        }),
         ('System Information', {
             'fields': (
                 'created_at',
@@ -80,4 +90,20 @@ class NotificationLogAdmin(admin.ModelAdmin):
             'tenant',
             'related_booking',
             'related_payment'
-        )
\ No newline at end of file
+        )
+
+@admin.register(RenderedPDF)
+class RenderedPDFAdmin(admin.ModelAdmin):
+    list_display = ['template_name', 'key', 'size', 'hit_count', 'created_at', 'last_used_at']
+    list_filter = ['template_name', 'created_at']
+    search_fields = ['key', 'template_name']
+    readonly_fields = ['key', 'template_name', 'file', 'size', 'hit_count', 'created_at', 'last_used_at']
+
+
+@admin.register(ScheduledEvent)
+class ScheduledEventAdmin(admin.ModelAdmin):
+    list_display = ['event_type', 'fire_date', 'contract', 'payment', 'outcome', 'attempts', 'fired_at']
+    list_filter = ['event_type', 'outcome', 'fire_date']
+    search_fields = ['contract__contract_number', 'payment__receipt_number']
+    raw_id_fields = ['contract', 'payment']
+    readonly_fields = ['fired_at', 'outcome', 'attempts', 'created_at']
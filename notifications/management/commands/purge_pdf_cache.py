@@ -0,0 +1,79 @@
+import os
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+from django.utils import timezone
+
+from notifications.models import RenderedPDF
+
+CACHE_DIR = 'pdf_cache'
+
+
+class Command(BaseCommand):
+    help = 'Purge orphaned and stale entries from the rendered PDF cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=30,
+            help='Also drop cached PDFs not used for this many days (0 keeps them)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report what would be removed',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        prefix = '[dry run] Would remove' if dry_run else 'Removed'
+
+        # Rows whose file has gone missing
+        missing_ids = [
+            entry.pk for entry in RenderedPDF.objects.only('pk', 'file')
+            if not entry.file or not default_storage.exists(entry.file.name)
+        ]
+
+        stale = RenderedPDF.objects.none()
+        if options['days']:
+            cutoff = timezone.now() - timedelta(days=options['days'])
+            stale = RenderedPDF.objects.filter(last_used_at__lt=cutoff).exclude(pk__in=missing_ids)
+
+        # Files on disk that no row points at
+        known_files = set(RenderedPDF.objects.exclude(pk__in=stale.values('pk')).values_list('file', flat=True))
+        orphan_files = [path for path in self.cache_files() if path not in known_files]
+
+        stats = RenderedPDF.objects.aggregate(hits=Sum('hit_count'))
+        self.stdout.write(
+            f"Cache holds {RenderedPDF.objects.count()} PDFs with {stats['hits'] or 0} hits recorded."
+        )
+
+        if not dry_run:
+            RenderedPDF.objects.filter(pk__in=missing_ids).delete()
+            stale_count = stale.count()
+            stale.delete()
+            for path in orphan_files:
+                default_storage.delete(path)
+        else:
+            stale_count = stale.count()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {len(missing_ids)} entries with missing files, {stale_count} stale entries "
+            f"and {len(orphan_files)} orphaned files."
+        ))
+
+    def cache_files(self):
+        """Every file under the cache directory in storage"""
+        if not default_storage.exists(CACHE_DIR):
+            return []
+        paths = []
+        pending = [CACHE_DIR]
+        while pending:
+            directory = pending.pop()
+            subdirs, files = default_storage.listdir(directory)
+            paths.extend(os.path.join(directory, name) for name in files)
+            pending.extend(os.path.join(directory, name) for name in subdirs)
+        return paths
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:01
+
+import django.utils.timezone
+import notifications.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RenderedPDF',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('template_name', models.CharField(max_length=200)),
+                ('file', models.FileField(upload_to=notifications.models.rendered_pdf_path)),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Rendered PDF',
+                'verbose_name_plural': 'Rendered PDF Cache',
+                'ordering': ['-last_used_at'],
+            },
+        ),
+    ]
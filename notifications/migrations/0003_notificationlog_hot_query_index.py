@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_rendered_pdf_cache'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notificationlog',
+            index=models.Index(fields=['created_at', 'notification_type', 'status'], name='notification_created_type_idx'),
+        ),
+    ]
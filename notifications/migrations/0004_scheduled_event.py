@@ -0,0 +1,78 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:18
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def schedule_existing_reminders(apps, schema_editor):
+    """Upcoming reminders of existing contracts and rent; earlier ones were the old tasks' job"""
+    Contract = apps.get_model('contracts', 'Contract')
+    Payment = apps.get_model('payments', 'Payment')
+    ScheduledEvent = apps.get_model('notifications', 'ScheduledEvent')
+    today = timezone.now().date()
+
+    events = []
+    contracts = Contract.objects.filter(status='signed', end_date__gte=today + timedelta(days=7)).only(
+        'pk', 'end_date', 'renewal_status', 'move_out_notice_sent',
+    )
+    for contract in contracts.iterator(chunk_size=2000):
+        dates = []
+        if contract.renewal_status == 'not_sent':
+            dates.append(('contract_renewal', contract.end_date - timedelta(days=21)))
+        if contract.renewal_status in ('not_sent', 'sent', 'declined'):
+            dates.append(('contract_final_warning', contract.end_date - timedelta(days=7)))
+        if not contract.move_out_notice_sent:
+            dates.append(('contract_move_out', contract.end_date - timedelta(days=21)))
+        events.extend(
+            ScheduledEvent(event_type=event_type, fire_date=fire_date, contract_id=contract.pk)
+            for event_type, fire_date in dates if fire_date >= today
+        )
+
+    payments = Payment.objects.filter(
+        payment_type='rent', status='pending', due_date__gte=today - timedelta(days=14),
+    ).only('pk', 'due_date')
+    for payment in payments.iterator(chunk_size=2000):
+        dates = [('rent_due_soon', payment.due_date - timedelta(days=3))]
+        dates += [('rent_overdue', payment.due_date + timedelta(days=days)) for days in (1, 7, 14)]
+        dates += [('late_fee_invoice', payment.due_date + timedelta(days=7)),
+                  ('court_notice', payment.due_date + timedelta(days=14))]
+        events.extend(
+            ScheduledEvent(event_type=event_type, fire_date=fire_date, payment_id=payment.pk)
+            for event_type, fire_date in dates if fire_date >= today
+        )
+
+    ScheduledEvent.objects.bulk_create(events, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0006_contract_signature_images'),
+        ('notifications', '0003_notificationlog_hot_query_index'),
+        ('payments', '0008_payment_hot_query_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('rent_due_soon', 'Rent Due Soon'), ('rent_overdue', 'Rent Overdue'), ('late_fee_invoice', 'Late Fee Invoice'), ('court_notice', 'Court Notice'), ('contract_renewal', 'Contract Renewal Reminder'), ('contract_move_out', 'Move Out Reminder'), ('contract_final_warning', 'Final Move Out Warning')], max_length=30)),
+                ('fire_date', models.DateField()),
+                ('fired_at', models.DateTimeField(blank=True, null=True)),
+                ('outcome', models.CharField(blank=True, choices=[('sent', 'Sent'), ('failed', 'Failed'), ('skipped', 'Skipped')], max_length=20)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('contract', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='scheduled_events', to='contracts.contract')),
+                ('payment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='scheduled_events', to='payments.payment')),
+            ],
+            options={
+                'ordering': ['fire_date', 'pk'],
+                'indexes': [models.Index(condition=models.Q(('fired_at__isnull', True)), fields=['fire_date', 'event_type'], name='scheduled_event_due_idx')],
+            },
+        ),
+        migrations.RunPython(schedule_existing_reminders, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_booking_hot_query_index'),
+        ('notifications', '0004_scheduled_event'),
+        ('payments', '0008_payment_hot_query_index'),
+        ('tenants', '0002_tenant_birthday_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationlog',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='notificationlog',
+            name='claim_token',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='notificationlog',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='notificationlog',
+            name='email_payload',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AlterField(
+            model_name='notificationlog',
+            name='notification_type',
+            field=models.CharField(choices=[('rent_reminder', 'Rent Reminder'), ('contract_reminder', 'Contract Reminder'), ('birthday_wish', 'Birthday Wish'), ('late_fee_invoice', 'Late Fee Invoice'), ('move_out_reminder', 'Move Out Reminder'), ('rent_increase', 'Rent Increase Notice'), ('utility_bill', 'Utility Bill'), ('utility_reminder', 'Utility Reminder'), ('maintenance_alert', 'Maintenance Alert'), ('temp_stay_cleanup', 'Temporary Stay Cleanup'), ('temp_stay_switch', 'Temporary Stay Switch'), ('test_notification', 'Test Notification')], max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='notificationlog',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['scheduled_for'], name='notification_outbox_idx'),
+        ),
+    ]
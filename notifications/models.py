@@ -1,4 +1,10 @@
-from django.db import models
+import uuid
+from datetime import timedelta
+
+from django.db import connection, models, transaction
+from django.db.models import Q
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from tenants.models import Tenant
 from bookings.models import Booking
 from payments.models import Payment
@@ -13,6 +19,11 @@ class NotificationLog(models.Model):
         ('late_fee_invoice', 'Late Fee Invoice'),
         ('move_out_reminder', 'Move Out Reminder'),
         ('rent_increase', 'Rent Increase Notice'),
+        ('utility_bill', 'Utility Bill'),
+        ('utility_reminder', 'Utility Reminder'),
+        ('maintenance_alert', 'Maintenance Alert'),
+        ('temp_stay_cleanup', 'Temporary Stay Cleanup'),
+        ('temp_stay_switch', 'Temporary Stay Switch'),
         ('test_notification', 'Test Notification'),
     ]
 
@@ -31,6 +42,9 @@ class NotificationLog(models.Model):
     tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, null=True, blank=True)
     related_booking = models.ForeignKey(Booking, on_delete=models.SET_NULL, null=True, blank=True)
     related_payment = models.ForeignKey(Payment, on_delete=models.SET_NULL, null=True, blank=True)
+    # Reminder that queued this email; its delivery is written back to it (see notifications.schedule)
+    scheduled_event = models.ForeignKey('ScheduledEvent', on_delete=models.SET_NULL, null=True, blank=True,
+                                        related_name='notifications')
 
     # Content and tracking
     message = models.TextField(blank=True)
@@ -40,6 +54,12 @@ class NotificationLog(models.Model):
     scheduled_for = models.DateTimeField(null=True, blank=True)
     sent_at = models.DateTimeField(null=True, blank=True)
 
+    # Outbox: the rendered email and its delivery bookkeeping (see notifications.outbox)
+    email_payload = models.JSONField(default=dict, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    claim_token = models.CharField(max_length=32, blank=True)
+
     # System fields
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -48,6 +68,15 @@ class NotificationLog(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Notification Log'
         verbose_name_plural = 'Notification Logs'
+        indexes = [
+            # Dashboards and the daily report take a created_at range, then split it by type and status
+            models.Index(fields=['created_at', 'notification_type', 'status'], name='notification_created_type_idx'),
+            # Dispatchers only read queued emails that are due
+            models.Index(fields=['scheduled_for'], condition=Q(status='pending'), name='notification_outbox_idx'),
+        ]
+
+    # How long a dispatcher may hold a claimed batch before another one can take it over
+    OUTBOX_LEASE = timedelta(minutes=10)
 
     def __str__(self):
         tenant_name = self.tenant.full_name if self.tenant else "System"
@@ -64,6 +93,35 @@ class NotificationLog(models.Model):
 
         super().save(*args, **kwargs)
 
+    @staticmethod
+    def outbox_claimable_q(now):
+        """Queued emails that are due and not claimed, or whose claim has expired"""
+        return Q(status='pending', scheduled_for__lte=now) & ~Q(email_payload={}) & (
+            Q(claimed_until__isnull=True) | Q(claimed_until__lt=now)
+        )
+
+    @classmethod
+    def claim_outbox(cls, limit=100):
+        """Lease up to ``limit`` due outbox rows to the calling dispatcher, oldest first.
+
+        Same scheme as ``Payment.claim_receipts``: SKIP LOCKED where supported,
+        and a conditional UPDATE so two dispatchers cannot claim the same row.
+        """
+        now = timezone.now()
+        token = uuid.uuid4().hex
+        candidates = cls.objects.filter(cls.outbox_claimable_q(now))
+
+        with transaction.atomic():
+            if connection.features.has_select_for_update_skip_locked:
+                candidates = candidates.select_for_update(skip_locked=True)
+            ids = list(candidates.order_by('scheduled_for', 'pk').values_list('pk', flat=True)[:limit])
+            cls.objects.filter(cls.outbox_claimable_q(now), pk__in=ids).update(
+                claimed_until=now + cls.OUTBOX_LEASE,
+                claim_token=token,
+            )
+
+        return list(cls.objects.filter(claim_token=token, status='pending').order_by('scheduled_for', 'pk'))
+
     @property
     def is_successful(self):
         return self.status == 'sent'
@@ -72,4 +130,93 @@ class NotificationLog(models.Model):
     def days_ago(self):
         if self.sent_at:
             return (timezone.now() - self.sent_at).days
-        return None
\ No newline at end of file
+        return None
+
+def rendered_pdf_path(instance, filename):
+    return f"pdf_cache/{instance.key[:2]}/{instance.key}.pdf"
+
+
+class RenderedPDF(models.Model):
+    """A rendered PDF stored under the hash of (template, template mtime, context).
+
+    Used by notifications.pdf.PDFService to skip re-rendering identical documents.
+    """
+    key = models.CharField(max_length=64, unique=True)
+    template_name = models.CharField(max_length=200)
+    file = models.FileField(upload_to=rendered_pdf_path)
+    size = models.PositiveIntegerField(default=0)
+    hit_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ['-last_used_at']
+        verbose_name = 'Rendered PDF'
+        verbose_name_plural = 'Rendered PDF Cache'
+
+    def __str__(self):
+        return f"{self.template_name} ({self.key[:12]})"
+
+
+class ScheduledEvent(models.Model):
+    """A reminder due on ``fire_date`` for a contract or payment (see notifications.schedule)"""
+    EVENT_TYPES = [
+        ('rent_due_soon', 'Rent Due Soon'),
+        ('rent_overdue', 'Rent Overdue'),
+        ('late_fee_invoice', 'Late Fee Invoice'),
+        ('court_notice', 'Court Notice'),
+        ('contract_renewal', 'Contract Renewal Reminder'),
+        ('contract_move_out', 'Move Out Reminder'),
+        ('contract_final_warning', 'Final Move Out Warning'),
+    ]
+
+    OUTCOMES = [
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+        ('skipped', 'Skipped'),
+    ]
+
+    event_type = models.CharField(max_length=30, choices=EVENT_TYPES)
+    fire_date = models.DateField()
+    contract = models.ForeignKey('contracts.Contract', on_delete=models.CASCADE, null=True, blank=True,
+                                 related_name='scheduled_events')
+    payment = models.ForeignKey(Payment, on_delete=models.CASCADE, null=True, blank=True,
+                                related_name='scheduled_events')
+
+    fired_at = models.DateTimeField(null=True, blank=True)
+    outcome = models.CharField(max_length=20, choices=OUTCOMES, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['fire_date', 'pk']
+        indexes = [
+            # The daily reminder tasks only read unfired events due by today
+            models.Index(
+                fields=['fire_date', 'event_type'],
+                condition=models.Q(fired_at__isnull=True),
+                name='scheduled_event_due_idx',
+            ),
+        ]
+
+    def __str__(self):
+        target = f"contract {self.contract_id}" if self.contract_id else f"payment {self.payment_id}"
+        return f"{self.get_event_type_display()} for {target} on {self.fire_date}"
+
+
+@receiver(post_save, sender='contracts.Contract')
+def schedule_contract_reminders(sender, instance, update_fields=None, **kwargs):
+    """Keep the contract's reminder events in line with its end date and status"""
+    from .schedule import CONTRACT_FIELDS, schedule_contract_events
+
+    if update_fields is None or CONTRACT_FIELDS & set(update_fields):
+        schedule_contract_events([instance])
+
+
+@receiver(post_save, sender=Payment)
+def schedule_payment_reminders(sender, instance, update_fields=None, **kwargs):
+    """Keep the payment's reminder events in line with its due date and status"""
+    from .schedule import PAYMENT_FIELDS, schedule_payment_events
+
+    if update_fields is None or PAYMENT_FIELDS & set(update_fields):
+        schedule_payment_events([instance])
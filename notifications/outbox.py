@@ -0,0 +1,191 @@
+"""Durable email outbox on top of ``NotificationLog``.
+
+Producers render their emails up front and ``enqueue`` them as ``pending``
+log rows in one bulk insert, so everything that has to go out is on disk
+before SMTP is touched. ``dispatch`` (the ``dispatch_notifications`` task, run
+from beat and after each enqueue) claims due rows in batches, sends them
+through ``EmailService.send_batch`` behind a token bucket and writes the
+outcomes back with bulk updates.
+
+Claims are leases, so any number of dispatchers can run side by side, and
+rows held by a dispatcher that died are picked up again once the lease runs
+out. Delivery is therefore at least once. The rate limit applies per
+dispatcher. Failed sends are retried after ``RETRY_DELAY`` until
+``MAX_ATTEMPTS``. Outcomes of reminder emails are also passed on to their
+``ScheduledEvent`` (see notifications.schedule).
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3
+RETRY_DELAY = timedelta(minutes=15)
+
+
+class TokenBucket:
+    """Allows ``rate`` takes per second on average, in bursts of up to ``capacity``"""
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = self.capacity
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self):
+        """Wait until a token is available, then use it"""
+        self._refill()
+        if self.tokens < 1:
+            self.sleep((1 - self.tokens) / self.rate)
+            self._refill()
+        self.tokens -= 1
+
+
+def outbox_entry(message, notification_type, tenant=None, booking=None, payment=None, scheduled_for=None):
+    """Unsaved pending ``NotificationLog`` carrying ``message``, or None without a message.
+
+    The booking defaults to the payment's and the tenant to the booking's.
+    """
+    from .models import NotificationLog
+
+    if message is None:
+        return None
+    if message.attachments:
+        raise ValueError("Outbox emails cannot carry attachments")
+
+    booking = booking or (payment.booking if payment else None)
+    tenant = tenant or (booking.tenant if booking else None)
+    return NotificationLog(
+        notification_type=notification_type,
+        status='pending',
+        subject=message.subject[:200],
+        message=message.body,
+        recipient_email=message.to[0] if message.to else '',
+        tenant=tenant,
+        related_booking=booking,
+        related_payment=payment,
+        scheduled_for=scheduled_for or timezone.now(),
+        email_payload={
+            'subject': message.subject,
+            'body': message.body,
+            'from_email': message.from_email,
+            'to': list(message.to),
+            'cc': list(message.cc),
+            'bcc': list(message.bcc),
+            'reply_to': list(message.reply_to),
+            'alternatives': [list(alternative) for alternative in getattr(message, 'alternatives', [])],
+        },
+    )
+
+
+def message_for(log):
+    """Rebuild the email stored on an outbox row"""
+    payload = log.email_payload
+    message = EmailMultiAlternatives(
+        subject=payload['subject'],
+        body=payload['body'],
+        from_email=payload['from_email'],
+        to=payload['to'],
+        cc=payload['cc'],
+        bcc=payload['bcc'],
+        reply_to=payload['reply_to'],
+    )
+    for content, mimetype in payload['alternatives']:
+        message.attach_alternative(content, mimetype)
+    return message
+
+
+def queue_dispatch():
+    """Start a dispatcher once the surrounding transaction commits"""
+    from .tasks import dispatch_notifications
+
+    def start():
+        try:
+            dispatch_notifications.delay()
+        except Exception as e:
+            # The rows stay pending; the next beat run sends them
+            logger.error(f"Failed to queue notification dispatch: {e}")
+
+    transaction.on_commit(start)
+
+
+def enqueue(entries):
+    """Insert the outbox entries (None ones are dropped) and return the saved rows"""
+    from .models import NotificationLog
+
+    entries = [entry for entry in entries if entry is not None]
+    if not entries:
+        return []
+    created = NotificationLog.objects.bulk_create(entries, batch_size=500)
+    queue_dispatch()
+    logger.info(f"Queued {len(created)} notification emails")
+    return created
+
+
+def _record(logs, results, counts):
+    from .models import NotificationLog
+    from .schedule import record_delivery
+
+    now = timezone.now()
+    claimed = NotificationLog.objects.filter(claim_token=logs[0].claim_token)
+    sent = [log.pk for log, success in zip(logs, results) if success]
+    failed = [log.pk for log, success in zip(logs, results) if not success]
+    release = {'attempts': F('attempts') + 1, 'claimed_until': None, 'claim_token': '', 'updated_at': now}
+
+    gave_up = []
+    if sent:
+        counts['sent'] += claimed.filter(pk__in=sent).update(status='sent', sent_at=now, **release)
+    if failed:
+        gave_up = list(claimed.filter(pk__in=failed, attempts__gte=MAX_ATTEMPTS - 1).values_list('pk', flat=True))
+        counts['failed'] += claimed.filter(pk__in=gave_up).update(status='failed', **release)
+        counts['retry'] += claimed.filter(pk__in=failed).update(scheduled_for=now + RETRY_DELAY, **release)
+    if any(log.scheduled_event_id for log in logs):
+        record_delivery(sent, gave_up)
+
+
+def dispatch(limit=None, batch_size=None, rate=None):
+    """Claim and send due outbox rows until none are left (or ``limit`` were handled).
+
+    ``rate`` is emails per second, defaulting to ``NOTIFICATION_RATE_PER_SECOND``;
+    0 sends without a limit. Returns ``{outcome: count}``.
+    """
+    from .models import NotificationLog
+    from .services import EmailService
+
+    batch_size = batch_size or getattr(settings, 'EMAIL_BATCH_SIZE', 100)
+    rate = getattr(settings, 'NOTIFICATION_RATE_PER_SECOND', 10) if rate is None else rate
+    throttle = TokenBucket(rate).take if rate else None
+
+    counts = {'sent': 0, 'failed': 0, 'retry': 0}
+    handled = 0
+    while limit is None or handled < limit:
+        logs = NotificationLog.claim_outbox(batch_size if limit is None else min(batch_size, limit - handled))
+        if not logs:
+            break
+        handled += len(logs)
+
+        messages = []
+        for log in logs:
+            try:
+                messages.append(message_for(log))
+            except (KeyError, TypeError, ValueError) as e:
+                logger.error(f"Unreadable outbox email {log.pk}: {e}")
+                messages.append(None)
+
+        _record(logs, EmailService.send_batch(messages, batch_size=batch_size, throttle=throttle), counts)
+
+    return counts
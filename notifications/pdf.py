@@ -0,0 +1,323 @@
+"""WeasyPrint PDF rendering, in-process or across a pool of warm worker processes.
+
+Templates are always rendered to HTML in the calling process (they need the
+ORM); only the HTML -> PDF layout, which is the expensive CPU-bound part, is
+shipped to the pool. Each worker loads WeasyPrint, the font configuration and
+``settings.PDF_STYLESHEETS`` once, and is replaced after
+``settings.PDF_RENDER_MAX_DOCUMENTS_PER_WORKER`` documents to cap memory.
+
+multiprocessing refuses to start children from daemonic processes, which is
+what Celery's prefork workers are, so there the pool is built with billiard
+(Celery's own multiprocessing fork) instead. A job that does not finish
+within ``settings.PDF_RENDER_TIMEOUT`` seconds counts as a broken pool, and
+the remaining documents are rendered in-process.
+
+Rendered documents are cached in ``RenderedPDF`` under a SHA-256 of the
+template name, the mtimes of the template and every template it extends or
+includes by name, ``settings.PDF_CACHE_VERSION`` and a normalised copy of the
+context, so rendering the same receipt twice in one flow only runs WeasyPrint
+once. Model instances in the context are normalised to their concrete field
+values plus their forward relations (loaded if needed, three levels deep),
+leaving out ``auto_now`` timestamps, file fields and any names in the model's
+``pdf_cache_ignore_fields``.
+
+``uncompressed=True`` asks WeasyPrint for a plain PDF (classic xref table, no
+object streams) that can later be extended with an incremental update, as
+``contracts.stamping`` does for signature pages.
+"""
+import atexit
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.template.loader import get_template
+
+logger = logging.getLogger(__name__)
+
+# Per-process WeasyPrint state (font configuration and compiled stylesheets)
+_worker_state = {}
+_pool = None
+
+
+def _worker_config():
+    return (list(getattr(settings, 'PDF_STYLESHEETS', [])),)
+
+
+def _init_worker(stylesheet_paths):
+    """Load WeasyPrint, fonts and shared CSS once per process"""
+    from weasyprint import CSS, HTML
+    from weasyprint.text.fonts import FontConfiguration
+
+    font_config = FontConfiguration()
+    stylesheets = [CSS(filename=path, font_config=font_config) for path in stylesheet_paths]
+    # A throwaway render fills the fontconfig/Pango caches before the first real document
+    HTML(string='<p>warm-up</p>').write_pdf(font_config=font_config)
+
+    _worker_state.update(font_config=font_config, stylesheets=stylesheets)
+
+
+def _render_html(html, uncompressed=False):
+    from weasyprint import HTML
+
+    if not _worker_state:
+        _init_worker(*_worker_config())
+    return HTML(string=html).write_pdf(
+        stylesheets=_worker_state['stylesheets'],
+        font_config=_worker_state['font_config'],
+        uncompressed_pdf=uncompressed,
+    )
+
+
+class _BilliardFuture:
+
+    def __init__(self, async_result):
+        self._async_result = async_result
+
+    def result(self):
+        from billiard.exceptions import TimeoutError, WorkerLostError
+
+        try:
+            return self._async_result.get(timeout=getattr(settings, 'PDF_RENDER_TIMEOUT', 120))
+        except (TimeoutError, WorkerLostError) as e:
+            raise BrokenProcessPool(f"PDF render worker lost: {e!r}")
+
+
+class _BilliardPool:
+    """The ``submit``/``shutdown`` subset of ProcessPoolExecutor over a billiard pool"""
+
+    def __init__(self):
+        import billiard
+
+        self._pool = billiard.get_context('spawn').Pool(
+            processes=settings.PDF_RENDER_WORKERS,
+            initializer=_init_worker,
+            initargs=_worker_config(),
+            maxtasksperchild=settings.PDF_RENDER_MAX_DOCUMENTS_PER_WORKER,
+        )
+
+    def submit(self, fn, *args, **kwargs):
+        return _BilliardFuture(self._pool.apply_async(fn, args, kwargs))
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        if cancel_futures:
+            self._pool.terminate()
+        else:
+            self._pool.close()
+        if wait:
+            self._pool.join()
+
+
+def _in_daemon():
+    return multiprocessing.current_process().daemon
+
+
+def _get_pool():
+    global _pool
+    if _pool is None and _in_daemon():
+        _pool = _BilliardPool()
+    elif _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.PDF_RENDER_WORKERS,
+            # spawn: workers only need WeasyPrint, not a copy of the Django process
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=_worker_config(),
+            max_tasks_per_child=settings.PDF_RENDER_MAX_DOCUMENTS_PER_WORKER,
+        )
+    return _pool
+
+
+def _normalise(value, depth=3):
+    """JSON-friendly, order-independent form of a template context value"""
+    if isinstance(value, models.Model):
+        ignored = set(getattr(value, 'pdf_cache_ignore_fields', ()))
+        fields = {}
+        for field in value._meta.concrete_fields:
+            if field.name in ignored or isinstance(field, models.FileField) or getattr(field, 'auto_now', False):
+                continue
+            fields[field.attname] = getattr(value, field.attname)
+            # Templates reach through foreign keys (payment.booking.room.property), so those
+            # objects' fields are part of the document even when the caller did not load them
+            if depth > 0 and field.is_relation and fields[field.attname] is not None:
+                fields[field.name] = _normalise(getattr(value, field.name), depth - 1)
+        if depth > 0:
+            for name, related in value._state.fields_cache.items():
+                fields.setdefault(name, _normalise(related, depth - 1))
+        return {'model': value._meta.label, 'pk': value.pk, 'fields': fields}
+    if isinstance(value, models.QuerySet):
+        return [_normalise(item, depth) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _normalise(item, depth) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalise(item, depth) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((_normalise(item, depth) for item in value), key=repr)
+    return value
+
+
+def _template_mtimes(template):
+    """{name: mtime} of a template and of everything it extends or includes by a literal name"""
+    from django.template import TemplateDoesNotExist
+    from django.template.loader_tags import ExtendsNode, IncludeNode
+
+    mtimes = {}
+    pending = [getattr(template, 'template', template)]
+    while pending:
+        compiled = pending.pop()
+        name = compiled.origin.template_name
+        if name in mtimes:
+            continue
+        origin = compiled.origin.name
+        mtimes[name] = os.path.getmtime(origin) if origin and os.path.exists(origin) else 0
+        for node in compiled.nodelist.get_nodes_by_type((ExtendsNode, IncludeNode)):
+            expression = node.parent_name if isinstance(node, ExtendsNode) else node.template
+            # A quoted name resolves to a string at parse time; variables are left to PDF_CACHE_VERSION
+            if isinstance(expression.var, str):
+                try:
+                    pending.append(compiled.engine.get_template(expression.var))
+                except TemplateDoesNotExist:
+                    pass
+    return mtimes
+
+
+def cache_key(template, context, uncompressed=False):
+    """Content address of a (template, context) render"""
+    parts = [
+        template.origin.template_name,
+        _template_mtimes(template),
+        getattr(settings, 'PDF_CACHE_VERSION', ''),
+        _normalise(context),
+    ]
+    if uncompressed:
+        parts.append('uncompressed')
+    payload = json.dumps(parts, sort_keys=True, cls=DjangoJSONEncoder, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _cache_enabled():
+    return getattr(settings, 'PDF_CACHE_ENABLED', True)
+
+
+def _cache_lookup(key):
+    """Cached PDF bytes for ``key``, or None; counts the hit"""
+    from django.db.models import F
+    from django.utils import timezone
+    from .models import RenderedPDF
+
+    try:
+        entry = RenderedPDF.objects.filter(key=key).first()
+        if entry is None:
+            return None
+        with entry.file.open('rb') as cached:
+            pdf_file = cached.read()
+        RenderedPDF.objects.filter(pk=entry.pk).update(hit_count=F('hit_count') + 1, last_used_at=timezone.now())
+        logger.info(f"PDF cache hit for {entry.template_name} ({key[:12]})")
+        return pdf_file
+    except Exception as e:
+        logger.error(f"PDF cache lookup failed for {key[:12]}: {e}")
+        return None
+
+
+def _cache_store(key, template_name, pdf_file):
+    from django.core.files.base import ContentFile
+    from django.db import IntegrityError, transaction
+    from .models import RenderedPDF
+
+    try:
+        with transaction.atomic():
+            entry = RenderedPDF(key=key, template_name=template_name, size=len(pdf_file))
+            entry.file.save(f"{key}.pdf", ContentFile(pdf_file), save=False)
+            entry.save()
+    except IntegrityError:
+        # Rendered concurrently by another process; its copy wins
+        entry.file.delete(save=False)
+    except Exception as e:
+        logger.error(f"Failed to cache rendered PDF {key[:12]}: {e}")
+
+
+def _can_use_pool(job_count):
+    return job_count > 1 and settings.PDF_RENDER_WORKERS > 1
+
+
+class PDFService:
+    @staticmethod
+    def render(template_name, context, uncompressed=False):
+        """Render one template to PDF bytes in this process (reusing its warm fonts)"""
+        result = PDFService.render_many([(template_name, context)], use_pool=False, uncompressed=uncompressed)[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    @staticmethod
+    def render_many(jobs, use_pool=True, uncompressed=False):
+        """Render many (template_name, context) jobs to PDF, in parallel where possible.
+
+        Returns a list in job order holding the PDF bytes, or the exception
+        raised for that job, so one bad document does not fail the batch.
+        Cached documents are returned without rendering.
+        """
+        jobs = list(jobs)
+        results = []
+        html_jobs = {}
+        keys = {}
+        for index, (template_name, context) in enumerate(jobs):
+            results.append(None)
+            try:
+                template = get_template(template_name)
+                if _cache_enabled():
+                    keys[index] = cache_key(template, context, uncompressed)
+                    cached = _cache_lookup(keys[index])
+                    if cached is not None:
+                        results[index] = cached
+                        continue
+                html_jobs[index] = template.render(context)
+            except Exception as e:
+                results[index] = e
+
+        if use_pool and _can_use_pool(len(html_jobs)):
+            try:
+                futures = {
+                    index: _get_pool().submit(_render_html, html, uncompressed) for index, html in html_jobs.items()
+                }
+                for index, future in futures.items():
+                    try:
+                        results[index] = future.result()
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        results[index] = e
+            except BrokenProcessPool as e:
+                logger.error(f"PDF render pool broke, rendering the rest in-process: {e}")
+                PDFService.shutdown()
+
+        for index, html in html_jobs.items():
+            if results[index] is not None:
+                continue
+            try:
+                results[index] = _render_html(html, uncompressed)
+            except Exception as e:
+                results[index] = e
+
+        for index in html_jobs:
+            if index in keys and isinstance(results[index], bytes):
+                _cache_store(keys[index], jobs[index][0], results[index])
+
+        return results
+
+    @staticmethod
+    def shutdown():
+        """Stop the worker pool (it is recreated on the next batch)"""
+        global _pool
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+atexit.register(PDFService.shutdown)
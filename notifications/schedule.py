@@ -0,0 +1,228 @@
+"""Precomputed reminder schedule for contracts and rent payments.
+
+Whenever a contract or payment is saved, its upcoming reminders are written
+as ``ScheduledEvent`` rows (fire date, event type, contract or payment). The
+daily reminder tasks then read only unfired events due by today through a
+partial index, instead of matching exact dates such as ``end_date = today +
+21`` or rescanning every pending payment. An event missed because a beat run
+did not happen is still unfired the next day, so it is caught up.
+
+Events are derived from the object's current state, and each due event is
+checked against that state again before it fires, so a contract that was
+renewed or a payment that was paid in the meantime is skipped rather than
+reminded. Scheduling only moves events that are still in the future; due ones
+are left to the tasks.
+
+Firing an event only queues its email in the outbox. The outbox row points
+back at the event, and ``record_delivery`` applies the event's effect on the
+contract (renewal reminder or move-out notice sent) once the email has gone
+out. An email the outbox gives up on re-arms its event for the next run,
+until the event has used up ``MAX_ATTEMPTS``.
+"""
+import logging
+from datetime import timedelta
+
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Days before the contract end date
+RENEWAL_REMINDER_DAYS = 21
+MOVE_OUT_REMINDER_DAYS = 21
+FINAL_WARNING_DAYS = 7
+# Days before / after the rent due date
+RENT_DUE_SOON_DAYS = 3
+RENT_OVERDUE_DAYS = (1, 7, 14)
+LATE_FEE_INVOICE_DAYS = 7
+COURT_NOTICE_DAYS = 14
+# Failed sends are retried on the next runs, then given up
+MAX_ATTEMPTS = 3
+
+# Saves touching none of these fields cannot change the schedule
+CONTRACT_FIELDS = {'status', 'end_date', 'renewal_status', 'move_out_notice_sent'}
+PAYMENT_FIELDS = {'payment_type', 'status', 'due_date'}
+
+
+def delivered_contract_updates(now):
+    """{event type: (contract filter, contract fields)} applied once the event's email is delivered"""
+    return {
+        'contract_renewal': ({'renewal_status': 'not_sent'}, {'renewal_status': 'sent', 'renewal_sent_date': now}),
+        'contract_move_out': ({}, {'move_out_notice_sent': True, 'move_out_notice_sent_date': now}),
+    }
+
+
+def contract_event_dates(contract):
+    """{(event type, fire date)} the contract should be reminded on"""
+    if contract.status != 'signed' or not contract.end_date:
+        return set()
+    events = set()
+    if contract.renewal_status == 'not_sent':
+        events.add(('contract_renewal', contract.end_date - timedelta(days=RENEWAL_REMINDER_DAYS)))
+    if not contract.move_out_notice_sent:
+        events.add(('contract_move_out', contract.end_date - timedelta(days=MOVE_OUT_REMINDER_DAYS)))
+    if contract.renewal_status in ('not_sent', 'sent', 'declined'):
+        events.add(('contract_final_warning', contract.end_date - timedelta(days=FINAL_WARNING_DAYS)))
+    return events
+
+
+def payment_event_dates(payment):
+    """{(event type, fire date)} the payment should be reminded on"""
+    if payment.payment_type != 'rent' or payment.status != 'pending' or not payment.due_date:
+        return set()
+    events = {('rent_due_soon', payment.due_date - timedelta(days=RENT_DUE_SOON_DAYS))}
+    events.update(('rent_overdue', payment.due_date + timedelta(days=days)) for days in RENT_OVERDUE_DAYS)
+    events.add(('late_fee_invoice', payment.due_date + timedelta(days=LATE_FEE_INVOICE_DAYS)))
+    events.add(('court_notice', payment.due_date + timedelta(days=COURT_NOTICE_DAYS)))
+    return events
+
+
+def _schedule(objects, field, event_dates):
+    from .models import ScheduledEvent
+
+    objects = [obj for obj in objects if obj.pk is not None]
+    if not objects:
+        return 0
+    today = timezone.now().date()
+
+    existing = {}
+    for event in ScheduledEvent.objects.filter(**{f'{field}__in': [obj.pk for obj in objects]}).only(
+        'pk', 'event_type', 'fire_date', 'fired_at', f'{field}_id',
+    ):
+        existing.setdefault(getattr(event, f'{field}_id'), []).append(event)
+
+    stale = []
+    new_events = []
+    for obj in objects:
+        wanted = event_dates(obj)
+        events = existing.get(obj.pk, [])
+        known = {(event.event_type, event.fire_date) for event in events}
+        stale.extend(
+            event.pk for event in events
+            if event.fired_at is None and event.fire_date > today
+            and (event.event_type, event.fire_date) not in wanted
+        )
+        new_events.extend(
+            ScheduledEvent(event_type=event_type, fire_date=fire_date, **{field: obj})
+            for event_type, fire_date in sorted(wanted - known)
+        )
+
+    if stale:
+        ScheduledEvent.objects.filter(pk__in=stale).delete()
+    if new_events:
+        ScheduledEvent.objects.bulk_create(new_events, batch_size=500)
+    return len(new_events)
+
+
+def schedule_contract_events(contracts):
+    """Create and drop the contracts' future reminder events; returns the number created"""
+    return _schedule(contracts, 'contract', contract_event_dates)
+
+
+def schedule_payment_events(payments):
+    """Create and drop the payments' future reminder events; returns the number created"""
+    return _schedule(payments, 'payment', payment_event_dates)
+
+
+def due_events(event_types, today=None):
+    """Unfired events of ``event_types`` due by ``today``, oldest first"""
+    from .models import ScheduledEvent
+
+    today = today or timezone.now().date()
+    return ScheduledEvent.objects.filter(
+        fired_at__isnull=True, fire_date__lte=today, event_type__in=event_types,
+    ).select_related(
+        'contract__booking__tenant', 'contract__booking__room',
+        'payment__booking__tenant', 'payment__booking__room',
+    ).order_by('fire_date', 'pk')
+
+
+def fire_due_events(event_types, build, today=None):
+    """Queue an email for every due event and record the outcomes.
+
+    ``build(event)`` returns the event's outbox entry (see notifications.outbox),
+    or None when there is nothing to send. The entries are enqueued together.
+    Of several due events of one type for the same object (missed days), only
+    the latest is queued. Returns ``{outcome: count}``, where ``sent`` means
+    queued; what delivery changes is applied later by ``record_delivery``.
+    """
+    from .models import ScheduledEvent
+    from .outbox import enqueue
+
+    today = today or timezone.now().date()
+    events = list(due_events(event_types, today))
+    latest = {}
+    for event in events:
+        latest[(event.event_type, event.contract_id, event.payment_id)] = event
+
+    counts = {'sent': 0, 'failed': 0, 'skipped': 0, 'retry': 0}
+    skipped = [event.pk for event in events if latest[(event.event_type, event.contract_id, event.payment_id)] is not event]
+
+    live = []
+    entries = []
+    for event in latest.values():
+        target = event.contract or event.payment
+        dates = contract_event_dates(target) if event.contract_id else payment_event_dates(target)
+        # Renewed, paid or re-dated since it was scheduled, or caught up too late to matter
+        if (event.event_type, event.fire_date) not in dates or (event.contract_id and target.end_date <= today):
+            skipped.append(event.pk)
+            continue
+        try:
+            entry = build(event)
+        except Exception as e:
+            logger.error(f"Failed to build {event}: {e}")
+            entry = None
+        if entry is not None:
+            entry.scheduled_event = event
+        live.append(event)
+        entries.append(entry)
+
+    enqueue(entries)
+
+    now = timezone.now()
+    for event, entry in zip(live, entries):
+        queued = entry is not None
+        attempts = event.attempts + 1
+        if queued:
+            outcome = 'sent'
+        elif attempts >= MAX_ATTEMPTS:
+            outcome = 'failed'
+        else:
+            counts['retry'] += 1
+            ScheduledEvent.objects.filter(pk=event.pk).update(attempts=attempts)
+            continue
+        counts[outcome] += 1
+        ScheduledEvent.objects.filter(pk=event.pk).update(fired_at=now, outcome=outcome, attempts=attempts)
+
+    if skipped:
+        ScheduledEvent.objects.filter(pk__in=skipped).update(fired_at=now, outcome='skipped')
+        counts['skipped'] += len(skipped)
+    return counts
+
+
+def record_delivery(sent, gave_up):
+    """Write outbox outcomes back to the events that queued them.
+
+    ``sent`` and ``gave_up`` are ``NotificationLog`` pks. Delivered events
+    update their contract; events whose email was given up are re-armed for
+    the next run, or failed once they are out of attempts.
+    """
+    from contracts.models import Contract
+    from .models import ScheduledEvent
+
+    now = timezone.now()
+    if sent:
+        delivered = {}
+        for event_type, contract_id in ScheduledEvent.objects.filter(
+            notifications__pk__in=sent, contract__isnull=False,
+        ).values_list('event_type', 'contract_id'):
+            delivered.setdefault(event_type, set()).add(contract_id)
+        for event_type, (conditions, fields) in delivered_contract_updates(now).items():
+            if event_type in delivered:
+                Contract.objects.filter(pk__in=delivered[event_type], **conditions).update(**fields, updated_at=now)
+
+    if gave_up:
+        events = ScheduledEvent.objects.filter(notifications__pk__in=gave_up, outcome='sent')
+        rearmed = events.filter(attempts__lt=MAX_ATTEMPTS).update(fired_at=None, outcome='')
+        failed = events.filter(attempts__gte=MAX_ATTEMPTS).update(outcome='failed')
+        if rearmed or failed:
+            logger.warning(f"Undelivered reminders: {rearmed} re-armed, {failed} given up")
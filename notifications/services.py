@@ -1,4 +1,4 @@
-from django.core.mail import EmailMultiAlternatives
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.template.loader import render_to_string
 from django.utils import timezone
 from django.utils.html import strip_tags
@@ -7,6 +7,7 @@ from datetime import datetime, timedelta
 import logging
 
 from contracts.models import Contract
+from payments.late_fees import get_policy
 from payments.models import Payment
 
 logger = logging.getLogger(__name__)
@@ -14,52 +15,97 @@ logger = logging.getLogger(__name__)
 
 class EmailService:
     @staticmethod
-    def send_rent_reminder(payment):
-        """Send rent reminder email (Requirement #9a)"""
-        try:
-            tenant = payment.booking.tenant
-            room = payment.booking.room
-            today = datetime.now().date()
+    def send_batch(messages, batch_size=None, throttle=None):
+        """Send prepared messages over one SMTP connection per ``batch_size`` messages.
+
+        ``messages`` may contain None for items with nothing to send. ``throttle``
+        is called before each send, e.g. to wait on a rate limiter. Returns one
+        boolean per message, in order, so callers can record each outcome.
+        """
+        batch_size = batch_size or getattr(settings, 'EMAIL_BATCH_SIZE', 100)
+        messages = list(messages)
+        results = [False] * len(messages)
+        pending = [(index, message) for index, message in enumerate(messages) if message is not None]
+
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            connection = get_connection()
+            try:
+                connection.open()
+                for index, message in chunk:
+                    if throttle:
+                        throttle()
+                    try:
+                        # One message per call so a refused recipient only fails its own message
+                        results[index] = connection.send_messages([message]) == 1
+                    except Exception as e:
+                        logger.error(f"Failed to send '{message.subject}' to {', '.join(message.to)}: {e}")
+                        # The server may have dropped the session; carry on over a fresh one
+                        connection.close()
+                        connection.open()
+            except Exception as e:
+                logger.error(f"Email batch of {len(chunk)} messages aborted: {e}")
+            finally:
+                connection.close()
+
+        logger.info(f"Email batch sent {sum(results)} of {len(pending)} messages")
+        return results
 
-            # Calculate days and fees
-            days_until_due = (payment.due_date - today).days if payment.due_date else 0
-            days_overdue = (today - payment.due_date).days if payment.due_date and payment.due_date < today else 0
-            late_fee = days_overdue * 100  # HK$100 per day
-            total_amount_due = payment.amount + late_fee
-
-            context = {
-                'tenant_name': tenant.full_name,
-                'room_code': room.room_code,
-                'due_date': payment.due_date.strftime('%Y-%m-%d') if payment.due_date else 'Not set',
-                'amount_due': payment.amount,
-                'late_fee': late_fee,
-                'total_amount_due': total_amount_due,
-                'days_until_due': max(0, days_until_due),
-                'days_overdue': max(0, days_overdue),
-                'payment_url': f"https://wing-kong.com/payments/{payment.id}",
-            }
+    @staticmethod
+    def rent_reminder_message(payment):
+        """Rent reminder email (Requirement #9a), built but not sent"""
+        tenant = payment.booking.tenant
+        room = payment.booking.room
+        today = datetime.now().date()
+
+        # Calculate days and fees
+        days_until_due = (payment.due_date - today).days if payment.due_date else 0
+        policy = get_policy()
+        days_overdue = policy.days_overdue(payment.due_date, today)
+        late_fee = policy.fee_for(days_overdue)
+        total_amount_due = payment.amount + late_fee
+
+        context = {
+            'tenant_name': tenant.full_name,
+            'room_code': room.room_code,
+            'due_date': payment.due_date.strftime('%Y-%m-%d') if payment.due_date else 'Not set',
+            'amount_due': payment.amount,
+            'late_fee': late_fee,
+            'total_amount_due': total_amount_due,
+            'days_until_due': max(0, days_until_due),
+            'days_overdue': max(0, days_overdue),
+            'late_fee_daily': policy.daily_amount,
+            'payment_url': f"https://wing-kong.com/payments/{payment.id}",
+        }
+
+        subject = f"Rent Reminder - {room.room_code}"
+        if days_overdue > 0:
+            subject = f"URGENT: Rent Overdue {days_overdue} Days - {room.room_code}"
+            if days_overdue >= 14:
+                subject = f"COURT NOTICE: Rent Overdue {days_overdue} Days - {room.room_code}"
 
-            subject = f"Rent Reminder - {room.room_code}"
-            if days_overdue > 0:
-                subject = f"URGENT: Rent Overdue {days_overdue} Days - {room.room_code}"
-                if days_overdue >= 14:
-                    subject = f"COURT NOTICE: Rent Overdue {days_overdue} Days - {room.room_code}"
+        html_content = render_to_string('emails/rent_reminder.html', context)
+        text_content = strip_tags(html_content)
 
-            html_content = render_to_string('emails/rent_reminder.html', context)
-            text_content = strip_tags(html_content)
+        email = EmailMultiAlternatives(
+            subject=subject,
+            body=text_content,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[tenant.user.email] if tenant.user and tenant.user.email else [settings.TO_EMAIL],
+            # to=[tenant.user.email],
+            reply_to=['accounts@wing-kong.com']
+        )
+        email.attach_alternative(html_content, "text/html")
+        return email
 
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[tenant.user.email] if tenant.user and tenant.user.email else [settings.TO_EMAIL],
-                # to=[tenant.user.email],
-                reply_to=['accounts@wing-kong.com']
-            )
-            email.attach_alternative(html_content, "text/html")
+    @staticmethod
+    def send_rent_reminder(payment):
+        """Send rent reminder email (Requirement #9a)"""
+        try:
+            email = EmailService.rent_reminder_message(payment)
             email.send()
 
-            logger.info(f"Rent reminder sent to {tenant.full_name} for {room.room_code}")
+            logger.info(f"Rent reminder sent to {payment.booking.tenant.full_name} for {payment.booking.room.room_code}")
             return True
 
         except Exception as e:
@@ -111,28 +157,34 @@ class EmailService:
             logger.error(f"Failed to send contract reminder: {e}")
             return False
 
+    @staticmethod
+    def birthday_wish_message(tenant):
+        """Birthday wish to tenant (Requirement #19), built but not sent"""
+        context = {
+            'tenant_name': tenant.full_name,
+        }
+
+        subject = "🎉 Happy Birthday from Wing Kong Properties!"
+
+        html_content = render_to_string('emails/birthday_wish.html', context)
+        text_content = strip_tags(html_content)
+
+        email = EmailMultiAlternatives(
+            subject=subject,
+            body=text_content,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            # to=[tenant.user.email]
+            to=[tenant.user.email] if tenant.user and tenant.user.email else [settings.TO_EMAIL],
+            reply_to=['info@wing-kong.com']
+        )
+        email.attach_alternative(html_content, "text/html")
+        return email
+
     @staticmethod
     def send_birthday_wish(tenant):
         """Send birthday wish to tenant (Requirement #19)"""
         try:
-            context = {
-                'tenant_name': tenant.full_name,
-            }
-
-            subject = "🎉 Happy Birthday from Wing Kong Properties!"
-
-            html_content = render_to_string('emails/birthday_wish.html', context)
-            text_content = strip_tags(html_content)
-
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                # to=[tenant.user.email]
-                to=[tenant.user.email] if tenant.user and tenant.user.email else [settings.TO_EMAIL],
-                reply_to=['info@wing-kong.com']
-            )
-            email.attach_alternative(html_content, "text/html")
+            email = EmailService.birthday_wish_message(tenant)
             email.send()
 
             logger.info(f"Birthday wish sent to {tenant.full_name}")
@@ -144,70 +196,77 @@ class EmailService:
 
     # notifications/services.py - UPDATE send_late_fee_invoice METHOD:
 
+    @staticmethod
+    def late_fee_invoice_message(payment, is_court_notice=False):
+        """Automatic late fee invoice (Requirement #9b), built but not sent"""
+        tenant = payment.booking.tenant
+        room = payment.booking.room
+        today = timezone.now().date()
+
+        # Calculate total amounts
+        policy = get_policy()
+        if payment.payment_type == 'late_fee':
+            # This is the accruing late fee itself
+            late_fee_amount = payment.amount
+            days_overdue = payment.late_fee_days
+            rent_payment = payment.late_fee_for
+            original_amount = rent_payment.amount if rent_payment else 0
+        else:
+            # This is a rent payment with late fees
+            days_overdue = policy.days_overdue(payment.due_date, today)
+            late_fee_amount = policy.fee_for(days_overdue)
+            original_amount = payment.amount
+
+        total_amount_due = original_amount + late_fee_amount
+        # What the balance becomes if still unpaid tomorrow (stops growing at the cap)
+        tomorrow_total = original_amount + policy.fee_for(days_overdue + 1)
+
+        context = {
+            'tenant_name': tenant.full_name,
+            'room_code': room.room_code,
+            'original_amount': original_amount,
+            'late_fee': late_fee_amount,
+            'total_amount_due': total_amount_due,
+            'days_overdue': days_overdue,
+            'chargeable_days': policy.chargeable_days(days_overdue),
+            'late_fee_daily': policy.daily_amount,
+            'tomorrow_total': tomorrow_total,
+            'due_date': payment.due_date.strftime('%Y-%m-%d'),
+            'invoice_date': today.strftime('%Y-%m-%d'),
+            'payment_url': f"https://wing-kong.com/payments/{payment.id}",
+            'is_court_notice': is_court_notice,
+        }
+
+        if is_court_notice:
+            subject = f"COURT NOTICE: Rent Overdue {days_overdue} Days - {room.room_code}"
+        elif days_overdue >= 14:
+            subject = f"FINAL NOTICE: Rent Overdue {days_overdue} Days - {room.room_code}"
+        elif days_overdue >= 7:
+            subject = f"URGENT: Rent Overdue {days_overdue} Days - {room.room_code}"
+        else:
+            subject = f"Late Fee Invoice - {room.room_code}"
+
+        html_content = render_to_string('emails/late_fee_invoice.html', context)
+        text_content = strip_tags(html_content)
+
+        email = EmailMultiAlternatives(
+            subject=subject,
+            body=text_content,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[tenant.user.email] if tenant.user and tenant.user.email else [settings.TO_EMAIL],
+            reply_to=['accounts@wing-kong.com']
+        )
+        email.attach_alternative(html_content, "text/html")
+        return email
+
     @staticmethod
     def send_late_fee_invoice(payment, is_court_notice=False):
         """Send automatic late fee invoice (Requirement #9b) - UPDATED"""
         try:
-            tenant = payment.booking.tenant
-            room = payment.booking.room
-            today = timezone.now().date()
-
-            # Calculate total amounts
-            if payment.payment_type == 'late_fee':
-                # This is a late fee payment itself
-                late_fee_amount = payment.amount
-                days_overdue = payment.late_fee_days
-                # Find the original rent payment
-                rent_payment = Payment.objects.filter(
-                    booking=payment.booking,
-                    payment_type='rent',
-                    due_date=payment.payment_date - timedelta(days=days_overdue)
-                ).first()
-                original_amount = rent_payment.amount if rent_payment else 0
-            else:
-                # This is a rent payment with late fees
-                days_overdue = (today - payment.due_date).days
-                late_fee_amount = days_overdue * 100
-                original_amount = payment.amount
-
-            total_amount_due = original_amount + late_fee_amount
-
-            context = {
-                'tenant_name': tenant.full_name,
-                'room_code': room.room_code,
-                'original_amount': original_amount,
-                'late_fee': late_fee_amount,
-                'total_amount_due': total_amount_due,
-                'days_overdue': days_overdue,
-                'due_date': payment.due_date.strftime('%Y-%m-%d'),
-                'invoice_date': today.strftime('%Y-%m-%d'),
-                'payment_url': f"https://wing-kong.com/payments/{payment.id}",
-                'is_court_notice': is_court_notice,
-            }
-
-            if is_court_notice:
-                subject = f"COURT NOTICE: Rent Overdue {days_overdue} Days - {room.room_code}"
-            elif days_overdue >= 14:
-                subject = f"FINAL NOTICE: Rent Overdue {days_overdue} Days - {room.room_code}"
-            elif days_overdue >= 7:
-                subject = f"URGENT: Rent Overdue {days_overdue} Days - {room.room_code}"
-            else:
-                subject = f"Late Fee Invoice - {room.room_code}"
-
-            html_content = render_to_string('emails/late_fee_invoice.html', context)
-            text_content = strip_tags(html_content)
-
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[tenant.user.email] if tenant.user and tenant.user.email else [settings.TO_EMAIL],
-                reply_to=['accounts@wing-kong.com']
-            )
-            email.attach_alternative(html_content, "text/html")
+            email = EmailService.late_fee_invoice_message(payment, is_court_notice)
             email.send()
 
-            logger.info(f"Late fee invoice sent to {tenant.full_name} for {room.room_code}")
+            logger.info(f"Late fee invoice sent to {payment.booking.tenant.full_name} for {payment.booking.room.room_code}")
             return True
 
         except Exception as e:
@@ -215,46 +274,54 @@ class EmailService:
             return False
 
 
+    @staticmethod
+    def rent_increase_notice_message(tenant, room, new_rent_amount=None):
+        """Rent increase notice (Requirement #17), or None without an ending contract"""
+        # Get current contract ending soon
+        today = timezone.now().date()
+        current_contract = Contract.objects.filter(
+            booking__tenant=tenant,
+            booking__room=room,
+            end_date__lte=today + timedelta(days=30),
+            status='signed'
+        ).first()
+
+        if not current_contract:
+            logger.error(f"No ending contract found for tenant {tenant.id} in room {room.room_code}")
+            return None
+
+        context = {
+            'tenant_name': tenant.full_name,
+            'room_code': room.room_code,
+            'current_rent': room.monthly_rent,
+            'proposed_rent': new_rent_amount or room.post_ad_price,
+            'contract_end_date': current_contract.end_date.strftime('%Y-%m-%d'),
+            'days_until_end': (current_contract.end_date - today).days,
+            'renewal_url': f"https://wing-kong.com/contracts/{current_contract.id}/renew",
+        }
+
+        subject = f"Rent Increase Notice - {room.room_code}"
+
+        html_content = render_to_string('emails/rent_increase_notice.html', context)
+        text_content = strip_tags(html_content)
+
+        email = EmailMultiAlternatives(
+            subject=subject,
+            body=text_content,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[tenant.user.email] if tenant.user and tenant.user.email else [settings.TO_EMAIL],
+            reply_to=['leasing@wing-kong.com']
+        )
+        email.attach_alternative(html_content, "text/html")
+        return email
+
     @staticmethod
     def send_rent_increase_notice(tenant, room, new_rent_amount=None):
         """Send rent increase notice (Requirement #17)"""
         try:
-            # Get current contract ending soon
-            today = timezone.now().date()
-            current_contract = Contract.objects.filter(
-                booking__tenant=tenant,
-                booking__room=room,
-                end_date__lte=today + timedelta(days=30),
-                status='signed'
-            ).first()
-
-            if not current_contract:
-                logger.error(f"No ending contract found for tenant {tenant.id} in room {room.room_code}")
+            email = EmailService.rent_increase_notice_message(tenant, room, new_rent_amount)
+            if email is None:
                 return False
-
-            context = {
-                'tenant_name': tenant.full_name,
-                'room_code': room.room_code,
-                'current_rent': room.monthly_rent,
-                'proposed_rent': new_rent_amount or room.post_ad_price,
-                'contract_end_date': current_contract.end_date.strftime('%Y-%m-%d'),
-                'days_until_end': (current_contract.end_date - today).days,
-                'renewal_url': f"https://wing-kong.com/contracts/{current_contract.id}/renew",
-            }
-
-            subject = f"Rent Increase Notice - {room.room_code}"
-
-            html_content = render_to_string('emails/rent_increase_notice.html', context)
-            text_content = strip_tags(html_content)
-
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[tenant.user.email] if tenant.user and tenant.user.email else [settings.TO_EMAIL],
-                reply_to=['leasing@wing-kong.com']
-            )
-            email.attach_alternative(html_content, "text/html")
             email.send()
 
             logger.info(f"Rent increase notice sent to {tenant.full_name} for {room.room_code}")
@@ -265,118 +332,136 @@ class EmailService:
             return False
 
 
+    @staticmethod
+    def contract_renewal_reminder_message(contract):
+        """Contract renewal reminder (Requirement #11), built but not sent"""
+        tenant = contract.booking.tenant
+        room = contract.booking.room
+
+        context = {
+            'tenant_name': tenant.full_name,
+            'room_code': room.room_code,
+            'current_rent': contract.monthly_rent,
+            'contract_end_date': contract.end_date.strftime('%Y-%m-%d'),
+            'days_until_end': contract.days_until_expiry,
+            'renewal_deadline': (contract.end_date - timedelta(days=7)).strftime('%Y-%m-%d'),
+            'renewal_url': f"https://wing-kong.com/contracts/{contract.id}/renew",
+            'move_out_url': f"https://wing-kong.com/contracts/{contract.id}/move-out",
+        }
+
+        subject = f"Contract Renewal Reminder - {room.room_code}"
+
+        html_content = render_to_string('emails/contract_renewal_reminder.html', context)
+        text_content = strip_tags(html_content)
+
+        email = EmailMultiAlternatives(
+            subject=subject,
+            body=text_content,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[tenant.user.email] if tenant.user and tenant.user.email else [settings.TO_EMAIL],
+            reply_to=['leasing@wing-kong.com']
+        )
+        email.attach_alternative(html_content, "text/html")
+        return email
+
     @staticmethod
     def send_contract_renewal_reminder(contract):
         """Send contract renewal reminder (Requirement #11)"""
         try:
-            tenant = contract.booking.tenant
-            room = contract.booking.room
-
-            context = {
-                'tenant_name': tenant.full_name,
-                'room_code': room.room_code,
-                'current_rent': contract.monthly_rent,
-                'contract_end_date': contract.end_date.strftime('%Y-%m-%d'),
-                'days_until_end': contract.days_until_expiry,
-                'renewal_deadline': (contract.end_date - timedelta(days=7)).strftime('%Y-%m-%d'),
-                'renewal_url': f"https://wing-kong.com/contracts/{contract.id}/renew",
-                'move_out_url': f"https://wing-kong.com/contracts/{contract.id}/move-out",
-            }
-
-            subject = f"Contract Renewal Reminder - {room.room_code}"
-
-            html_content = render_to_string('emails/contract_renewal_reminder.html', context)
-            text_content = strip_tags(html_content)
-
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[tenant.user.email] if tenant.user and tenant.user.email else [settings.TO_EMAIL],
-                reply_to=['leasing@wing-kong.com']
-            )
-            email.attach_alternative(html_content, "text/html")
+            email = EmailService.contract_renewal_reminder_message(contract)
             email.send()
 
-            logger.info(f"Contract renewal reminder sent to {tenant.full_name}")
+            logger.info(f"Contract renewal reminder sent to {contract.booking.tenant.full_name}")
             return True
 
         except Exception as e:
             logger.error(f"Failed to send contract renewal reminder: {e}")
             return False
 
+    @staticmethod
+    def move_out_reminder_message(contract):
+        """Move out reminder (Requirement #8, #11), built but not sent"""
+        tenant = contract.booking.tenant
+        room = contract.booking.room
+
+        context = {
+            'tenant_name': tenant.full_name,
+            'room_code': room.room_code,
+            'contract_end_date': contract.end_date.strftime('%Y-%m-%d'),
+            'days_until_end': contract.days_until_expiry,
+            'move_out_checklist_url': f"https://wing-kong.com/move-out/checklist",
+            'deposit_refund_info_url': f"https://wing-kong.com/deposit-refund-info",
+        }
+
+        subject = f"Move Out Reminder - {room.room_code}"
+
+        html_content = render_to_string('emails/move_out_reminder.html', context)
+        text_content = strip_tags(html_content)
+
+        email = EmailMultiAlternatives(
+            subject=subject,
+            body=text_content,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[tenant.user.email] if tenant.user and tenant.user.email else [settings.TO_EMAIL],
+            reply_to=['operations@wing-kong.com']
+        )
+        email.attach_alternative(html_content, "text/html")
+        return email
+
     @staticmethod
     def send_move_out_reminder(contract):
         """Send move out reminder (Requirement #8, #11)"""
         try:
-            tenant = contract.booking.tenant
-            room = contract.booking.room
-
-            context = {
-                'tenant_name': tenant.full_name,
-                'room_code': room.room_code,
-                'contract_end_date': contract.end_date.strftime('%Y-%m-%d'),
-                'days_until_end': contract.days_until_expiry,
-                'move_out_checklist_url': f"https://wing-kong.com/move-out/checklist",
-                'deposit_refund_info_url': f"https://wing-kong.com/deposit-refund-info",
-            }
-
-            subject = f"Move Out Reminder - {room.room_code}"
-
-            html_content = render_to_string('emails/move_out_reminder.html', context)
-            text_content = strip_tags(html_content)
-
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[tenant.user.email] if tenant.user and tenant.user.email else [settings.TO_EMAIL],
-                reply_to=['operations@wing-kong.com']
-            )
-            email.attach_alternative(html_content, "text/html")
+            email = EmailService.move_out_reminder_message(contract)
             email.send()
 
-            logger.info(f"Move out reminder sent to {tenant.full_name}")
+            logger.info(f"Move out reminder sent to {contract.booking.tenant.full_name}")
             return True
 
         except Exception as e:
             logger.error(f"Failed to send move out reminder: {e}")
             return False
 
+    @staticmethod
+    def final_move_out_warning_message(contract):
+        """Final move out warning, built but not sent"""
+        tenant = contract.booking.tenant
+        room = contract.booking.room
+
+        context = {
+            'tenant_name': tenant.full_name,
+            'room_code': room.room_code,
+            'contract_end_date': contract.end_date.strftime('%Y-%m-%d'),
+            'days_until_end': contract.days_until_expiry,
+            'urgent_action_required': contract.days_until_expiry <= 3,
+        }
+
+        if contract.days_until_expiry <= 3:
+            subject = f"URGENT: Final Move Out Warning - {room.room_code}"
+        else:
+            subject = f"Final Move Out Warning - {room.room_code}"
+
+        html_content = render_to_string('emails/final_move_out_warning.html', context)
+        text_content = strip_tags(html_content)
+
+        email = EmailMultiAlternatives(
+            subject=subject,
+            body=text_content,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[tenant.user.email] if tenant.user and tenant.user.email else [settings.TO_EMAIL],
+            reply_to=['operations@wing-kong.com']
+        )
+        email.attach_alternative(html_content, "text/html")
+        return email
+
     @staticmethod
     def send_final_move_out_warning(contract):
         """Send final move out warning"""
         try:
-            tenant = contract.booking.tenant
-            room = contract.booking.room
-
-            context = {
-                'tenant_name': tenant.full_name,
-                'room_code': room.room_code,
-                'contract_end_date': contract.end_date.strftime('%Y-%m-%d'),
-                'days_until_end': contract.days_until_expiry,
-                'urgent_action_required': contract.days_until_expiry <= 3,
-            }
-
-            if contract.days_until_expiry <= 3:
-                subject = f"URGENT: Final Move Out Warning - {room.room_code}"
-            else:
-                subject = f"Final Move Out Warning - {room.room_code}"
-
-            html_content = render_to_string('emails/final_move_out_warning.html', context)
-            text_content = strip_tags(html_content)
-
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[tenant.user.email] if tenant.user and tenant.user.email else [settings.TO_EMAIL],
-                reply_to=['operations@wing-kong.com']
-            )
-            email.attach_alternative(html_content, "text/html")
+            email = EmailService.final_move_out_warning_message(contract)
             email.send()
 
-            logger.info(f"Final move out warning sent to {tenant.full_name}")
+            logger.info(f"Final move out warning sent to {contract.booking.tenant.full_name}")
             return True
 
         except Exception as e:
@@ -385,40 +470,46 @@ class EmailService:
 
 
 
+    @staticmethod
+    def utility_bill_notification_message(payment, utility_bill):
+        """Utility bill notification to tenant, built but not sent"""
+        tenant = payment.booking.tenant
+        room = payment.booking.room
+
+        context = {
+            'tenant_name': tenant.full_name,
+            'room_code': room.room_code,
+            'utility_type': utility_bill.get_bill_type_display(),
+            'amount_due': payment.amount,
+            'due_date': payment.due_date.strftime('%Y-%m-%d'),
+            'bill_period': f"{utility_bill.bill_date} to {utility_bill.due_date}",
+            'payment_url': f"https://wing-kong.com/payments/{payment.id}",
+            'utility_bill_url': f"https://wing-kong.com/utilities/{utility_bill.id}",
+        }
+
+        subject = f"Utility Bill - {utility_bill.get_bill_type_display()} - {room.room_code}"
+
+        html_content = render_to_string('emails/utility_bill_notification.html', context)
+        text_content = strip_tags(html_content)
+
+        email = EmailMultiAlternatives(
+            subject=subject,
+            body=text_content,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[tenant.user.email] if tenant.user and tenant.user.email else [settings.TO_EMAIL],
+            reply_to=['utilities@wing-kong.com']
+        )
+        email.attach_alternative(html_content, "text/html")
+        return email
+
     @staticmethod
     def send_utility_bill_notification(payment, utility_bill):
         """Send utility bill notification to tenant"""
         try:
-            tenant = payment.booking.tenant
-            room = payment.booking.room
-
-            context = {
-                'tenant_name': tenant.full_name,
-                'room_code': room.room_code,
-                'utility_type': utility_bill.get_bill_type_display(),
-                'amount_due': payment.amount,
-                'due_date': payment.due_date.strftime('%Y-%m-%d'),
-                'bill_period': f"{utility_bill.bill_date} to {utility_bill.due_date}",
-                'payment_url': f"https://wing-kong.com/payments/{payment.id}",
-                'utility_bill_url': f"https://wing-kong.com/utilities/{utility_bill.id}",
-            }
-
-            subject = f"Utility Bill - {utility_bill.get_bill_type_display()} - {room.room_code}"
-
-            html_content = render_to_string('emails/utility_bill_notification.html', context)
-            text_content = strip_tags(html_content)
-
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[tenant.user.email] if tenant.user and tenant.user.email else [settings.TO_EMAIL],
-                reply_to=['utilities@wing-kong.com']
-            )
-            email.attach_alternative(html_content, "text/html")
+            email = EmailService.utility_bill_notification_message(payment, utility_bill)
             email.send()
 
-            logger.info(f"Utility bill notification sent to {tenant.full_name}")
+            logger.info(f"Utility bill notification sent to {payment.booking.tenant.full_name}")
             return True
 
         except Exception as e:
@@ -426,43 +517,49 @@ class EmailService:
             return False
 
 
+    @staticmethod
+    def utility_payment_reminder_message(payment):
+        """Utility payment reminder, built but not sent"""
+        tenant = payment.booking.tenant
+        room = payment.booking.room
+
+        days_overdue = (timezone.now().date() - payment.due_date).days
+
+        context = {
+            'tenant_name': tenant.full_name,
+            'room_code': room.room_code,
+            'amount_due': payment.amount,
+            'original_due_date': payment.due_date.strftime('%Y-%m-%d'),
+            'days_overdue': days_overdue,
+            'payment_url': f"https://wing-kong.com/payments/{payment.id}",
+        }
+
+        if days_overdue > 7:
+            subject = f"URGENT: Utility Payment Overdue {days_overdue} Days - {room.room_code}"
+        else:
+            subject = f"Utility Payment Reminder - {room.room_code}"
+
+        html_content = render_to_string('emails/utility_payment_reminder.html', context)
+        text_content = strip_tags(html_content)
+
+        email = EmailMultiAlternatives(
+            subject=subject,
+            body=text_content,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[tenant.user.email] if tenant.user and tenant.user.email else [settings.TO_EMAIL],
+            reply_to=['utilities@wing-kong.com']
+        )
+        email.attach_alternative(html_content, "text/html")
+        return email
+
     @staticmethod
     def send_utility_payment_reminder(payment):
         """Send utility payment reminder"""
         try:
-            tenant = payment.booking.tenant
-            room = payment.booking.room
-
-            days_overdue = (timezone.now().date() - payment.due_date).days
-
-            context = {
-                'tenant_name': tenant.full_name,
-                'room_code': room.room_code,
-                'amount_due': payment.amount,
-                'original_due_date': payment.due_date.strftime('%Y-%m-%d'),
-                'days_overdue': days_overdue,
-                'payment_url': f"https://wing-kong.com/payments/{payment.id}",
-            }
-
-            if days_overdue > 7:
-                subject = f"URGENT: Utility Payment Overdue {days_overdue} Days - {room.room_code}"
-            else:
-                subject = f"Utility Payment Reminder - {room.room_code}"
-
-            html_content = render_to_string('emails/utility_payment_reminder.html', context)
-            text_content = strip_tags(html_content)
-
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[tenant.user.email] if tenant.user and tenant.user.email else [settings.TO_EMAIL],
-                reply_to=['utilities@wing-kong.com']
-            )
-            email.attach_alternative(html_content, "text/html")
+            email = EmailService.utility_payment_reminder_message(payment)
             email.send()
 
-            logger.info(f"Utility payment reminder sent to {tenant.full_name}")
+            logger.info(f"Utility payment reminder sent to {payment.booking.tenant.full_name}")
             return True
 
         except Exception as e:
@@ -470,117 +567,146 @@ class EmailService:
             return False
 
 
+    @staticmethod
+    def maintenance_update_message(ticket, message):
+        """Maintenance update to tenant, built but not sent"""
+        tenant = ticket.tenant
+        room = ticket.room
+
+        context = {
+            'tenant_name': tenant.full_name,
+            'room_code': room.room_code,
+            'ticket_number': ticket.ticket_number,
+            'ticket_title': ticket.title,
+            'update_message': message,
+            'current_status': ticket.get_status_display(),
+            'priority': ticket.get_priority_display(),
+            'ticket_url': f"https://wing-kong.com/maintenance/{ticket.id}",
+        }
+
+        subject = f"Maintenance Update - {ticket.ticket_number} - {room.room_code}"
+
+        html_content = render_to_string('emails/maintenance_update.html', context)
+        text_content = strip_tags(html_content)
+
+        email = EmailMultiAlternatives(
+            subject=subject,
+            body=text_content,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[tenant.user.email] if tenant.user and tenant.user.email else [settings.TO_EMAIL],
+            reply_to=['maintenance@wing-kong.com']
+        )
+        email.attach_alternative(html_content, "text/html")
+        return email
+
     @staticmethod
     def send_maintenance_update(ticket, message):
         """Send maintenance update to tenant"""
         try:
-            tenant = ticket.tenant
-            room = ticket.room
-
-            context = {
-                'tenant_name': tenant.full_name,
-                'room_code': room.room_code,
-                'ticket_number': ticket.ticket_number,
-                'ticket_title': ticket.title,
-                'update_message': message,
-                'current_status': ticket.get_status_display(),
-                'priority': ticket.get_priority_display(),
-                'ticket_url': f"https://wing-kong.com/maintenance/{ticket.id}",
-            }
-
-            subject = f"Maintenance Update - {ticket.ticket_number} - {room.room_code}"
-
-            html_content = render_to_string('emails/maintenance_update.html', context)
-            text_content = strip_tags(html_content)
-
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[tenant.user.email] if tenant.user and tenant.user.email else [settings.TO_EMAIL],
-                reply_to=['maintenance@wing-kong.com']
-            )
-            email.attach_alternative(html_content, "text/html")
+            email = EmailService.maintenance_update_message(ticket, message)
             email.send()
 
-            logger.info(f"Maintenance update sent to {tenant.full_name} for ticket {ticket.ticket_number}")
+            logger.info(f"Maintenance update sent to {ticket.tenant.full_name} for ticket {ticket.ticket_number}")
             return True
 
         except Exception as e:
             logger.error(f"Failed to send maintenance update: {e}")
             return False
 
+    @staticmethod
+    def maintenance_overdue_alert_message(ticket):
+        """Overdue alert to assigned staff, or None for an unassigned ticket"""
+        if not ticket.assigned_staff:
+            return None
+
+        staff = ticket.assigned_staff
+        room = ticket.room
+
+        context = {
+            'staff_name': staff.get_full_name() or staff.username,
+            'ticket_number': ticket.ticket_number,
+            'ticket_title': ticket.title,
+            'room_code': room.room_code,
+            'days_overdue': (timezone.now().date() - ticket.estimated_completion_date).days,
+            'days_open': ticket.days_open,
+            'ticket_url': f"https://wing-kong.com/crm/maintenance/{ticket.id}",
+        }
+
+        subject = f"OVERDUE: Maintenance Ticket {ticket.ticket_number} - {room.room_code}"
+
+        html_content = render_to_string('emails/maintenance_overdue_alert.html', context)
+        text_content = strip_tags(html_content)
+
+        email = EmailMultiAlternatives(
+            subject=subject,
+            body=text_content,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[staff.email],
+            reply_to=['maintenance@wing-kong.com']
+        )
+        email.attach_alternative(html_content, "text/html")
+        return email
+
     @staticmethod
     def send_maintenance_overdue_alert(ticket):
         """Send overdue alert to assigned staff"""
         try:
-            if not ticket.assigned_staff:
+            email = EmailService.maintenance_overdue_alert_message(ticket)
+            if email is None:
                 return False
-
-            staff = ticket.assigned_staff
-            room = ticket.room
-
-            context = {
-                'staff_name': staff.get_full_name() or staff.username,
-                'ticket_number': ticket.ticket_number,
-                'ticket_title': ticket.title,
-                'room_code': room.room_code,
-                'days_overdue': (timezone.now().date() - ticket.estimated_completion_date).days,
-                'days_open': ticket.days_open,
-                'ticket_url': f"https://wing-kong.com/crm/maintenance/{ticket.id}",
-            }
-
-            subject = f"OVERDUE: Maintenance Ticket {ticket.ticket_number} - {room.room_code}"
-
-            html_content = render_to_string('emails/maintenance_overdue_alert.html', context)
-            text_content = strip_tags(html_content)
-
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[staff.email],
-                reply_to=['maintenance@wing-kong.com']
-            )
-            email.attach_alternative(html_content, "text/html")
             email.send()
 
-            logger.info(f"Maintenance overdue alert sent to {staff.email}")
+            logger.info(f"Maintenance overdue alert sent to {ticket.assigned_staff.email}")
             return True
 
         except Exception as e:
             logger.error(f"Failed to send maintenance overdue alert: {e}")
             return False
 
+    @staticmethod
+    def maintenance_escalation_alert_message(ticket):
+        """Escalation alert to management, built but not sent"""
+        context = {
+            'ticket_number': ticket.ticket_number,
+            'ticket_title': ticket.title,
+            'room_code': ticket.room.room_code,
+            'tenant_name': ticket.tenant.full_name,
+            'days_open': ticket.days_open,
+            'priority': ticket.get_priority_display(),
+            'assigned_staff': ticket.assigned_staff.get_full_name() if ticket.assigned_staff else 'Unassigned',
+            'ticket_url': f"https://wing-kong.com/crm/maintenance/{ticket.id}",
+        }
+
+        subject = f"ESCALATION REQUIRED: Urgent Maintenance Ticket {ticket.ticket_number}"
+
+        html_content = render_to_string('emails/maintenance_escalation_alert.html', context)
+        text_content = strip_tags(html_content)
+
+        # Send to management email (you can add multiple emails)
+        email = EmailMultiAlternatives(
+            subject=subject,
+            body=text_content,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[settings.MANAGEMENT_EMAIL, settings.TO_EMAIL],
+            reply_to=['maintenance@wing-kong.com']
+        )
+        email.attach_alternative(html_content, "text/html")
+        return email
+
+    @staticmethod
+    def maintenance_management_alert_message(ticket):
+        """Alert to management about an overdue ticket open for over a week, built but not sent"""
+        email = EmailService.maintenance_escalation_alert_message(ticket)
+        email.subject = (
+            f"OVERDUE {ticket.days_open} DAYS: Maintenance Ticket {ticket.ticket_number} - {ticket.room.room_code}"
+        )
+        return email
+
     @staticmethod
     def send_maintenance_escalation_alert(ticket):
         """Send escalation alert to management"""
         try:
-            context = {
-                'ticket_number': ticket.ticket_number,
-                'ticket_title': ticket.title,
-                'room_code': ticket.room.room_code,
-                'tenant_name': ticket.tenant.full_name,
-                'days_open': ticket.days_open,
-                'priority': ticket.get_priority_display(),
-                'assigned_staff': ticket.assigned_staff.get_full_name() if ticket.assigned_staff else 'Unassigned',
-                'ticket_url': f"https://wing-kong.com/crm/maintenance/{ticket.id}",
-            }
-
-            subject = f"ESCALATION REQUIRED: Urgent Maintenance Ticket {ticket.ticket_number}"
-
-            html_content = render_to_string('emails/maintenance_escalation_alert.html', context)
-            text_content = strip_tags(html_content)
-
-            # Send to management email (you can add multiple emails)
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[settings.MANAGEMENT_EMAIL, settings.TO_EMAIL],
-                reply_to=['maintenance@wing-kong.com']
-            )
-            email.attach_alternative(html_content, "text/html")
+            email = EmailService.maintenance_escalation_alert_message(ticket)
             email.send()
 
             logger.info(f"Maintenance escalation alert sent for ticket {ticket.ticket_number}")
@@ -591,45 +717,51 @@ class EmailService:
             return False
 
 
+    @staticmethod
+    def contract_for_signature_message(contract):
+        """Contract to tenant for digital signature (Requirement #16), built but not sent"""
+        tenant = contract.booking.tenant
+        room = contract.booking.room
+
+        context = {
+            'tenant_name': tenant.full_name,
+            'room_code': room.room_code,
+            'contract_number': contract.contract_number,
+            'start_date': contract.start_date.strftime('%Y-%m-%d'),
+            'end_date': contract.end_date.strftime('%Y-%m-%d'),
+            'monthly_rent': contract.monthly_rent,
+            'security_deposit': contract.security_deposit,
+            'signing_url': f"https://wing-kong.com/contracts/{contract.id}/sign",
+            'email_verification_code': contract.email_verification_code,
+        }
+
+        subject = f"Tenancy Agreement for Signature - Room {room.room_code}"
+
+        html_content = render_to_string('emails/contract_for_signature.html', context)
+        text_content = strip_tags(html_content)
+
+        email = EmailMultiAlternatives(
+            subject=subject,
+            body=text_content,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[tenant.user.email] if tenant.user and tenant.user.email else [settings.TO_EMAIL],
+            reply_to=['contracts@wing-kong.com']
+        )
+        email.attach_alternative(html_content, "text/html")
+        return email
+
     @staticmethod
     def send_contract_for_signature(contract):
         """Send contract to tenant for digital signature (Requirement #16)"""
         try:
-            tenant = contract.booking.tenant
-            room = contract.booking.room
-
-            context = {
-                'tenant_name': tenant.full_name,
-                'room_code': room.room_code,
-                'contract_number': contract.contract_number,
-                'start_date': contract.start_date.strftime('%Y-%m-%d'),
-                'end_date': contract.end_date.strftime('%Y-%m-%d'),
-                'monthly_rent': contract.monthly_rent,
-                'security_deposit': contract.security_deposit,
-                'signing_url': f"https://wing-kong.com/contracts/{contract.id}/sign",
-                'email_verification_code': contract.email_verification_code,
-            }
-
-            subject = f"Tenancy Agreement for Signature - Room {room.room_code}"
-
-            html_content = render_to_string('emails/contract_for_signature.html', context)
-            text_content = strip_tags(html_content)
-
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[tenant.user.email] if tenant.user and tenant.user.email else [settings.TO_EMAIL],
-                reply_to=['contracts@wing-kong.com']
-            )
-            email.attach_alternative(html_content, "text/html")
+            email = EmailService.contract_for_signature_message(contract)
             email.send()
 
             # Mark email as verified after sending
             contract.tenant_email_verified = True
             contract.save()
 
-            logger.info(f"Contract sent for signature to {tenant.full_name}")
+            logger.info(f"Contract sent for signature to {contract.booking.tenant.full_name}")
             return True
 
         except Exception as e:
@@ -795,45 +927,51 @@ class EmailService:
             return False
 
 
+    @staticmethod
+    def payment_receipt_message(payment):
+        """Payment receipt to tenant (Requirement #10), built but not sent"""
+        tenant = payment.booking.tenant
+        room = payment.booking.room
+
+        context = {
+            'tenant_name': tenant.full_name,
+            'room_code': room.room_code,
+            'receipt_number': payment.receipt_number,
+            'payment_date': payment.payment_date.strftime('%Y-%m-%d'),
+            'payment_type': payment.get_payment_type_display(),
+            'amount': payment.amount,
+            'payment_method': payment.get_payment_method_display(),
+            'receipt_url': f"https://wing-kong.com/payments/{payment.id}/receipt",
+        }
+
+        subject = f"Payment Receipt - {payment.receipt_number} - {room.room_code}"
+
+        html_content = render_to_string('emails/payment_receipt.html', context)
+        text_content = strip_tags(html_content)
+
+        email = EmailMultiAlternatives(
+            subject=subject,
+            body=text_content,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[tenant.user.email] if tenant.user and tenant.user.email else [settings.TO_EMAIL],
+            reply_to=['accounts@wing-kong.com']
+        )
+
+        # Attach PDF receipt if available
+        if payment.receipt_pdf:
+            email.attach_file(payment.receipt_pdf.path)
+
+        email.attach_alternative(html_content, "text/html")
+        return email
+
     @staticmethod
     def send_payment_receipt(payment):
         """Send payment receipt to tenant (Requirement #10)"""
         try:
-            tenant = payment.booking.tenant
-            room = payment.booking.room
-
-            context = {
-                'tenant_name': tenant.full_name,
-                'room_code': room.room_code,
-                'receipt_number': payment.receipt_number,
-                'payment_date': payment.payment_date.strftime('%Y-%m-%d'),
-                'payment_type': payment.get_payment_type_display(),
-                'amount': payment.amount,
-                'payment_method': payment.get_payment_method_display(),
-                'receipt_url': f"https://wing-kong.com/payments/{payment.id}/receipt",
-            }
-
-            subject = f"Payment Receipt - {payment.receipt_number} - {room.room_code}"
-
-            html_content = render_to_string('emails/payment_receipt.html', context)
-            text_content = strip_tags(html_content)
-
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[tenant.user.email] if tenant.user and tenant.user.email else [settings.TO_EMAIL],
-                reply_to=['accounts@wing-kong.com']
-            )
-
-            # Attach PDF receipt if available
-            if payment.receipt_pdf:
-                email.attach_file(payment.receipt_pdf.path)
-
-            email.attach_alternative(html_content, "text/html")
+            email = EmailService.payment_receipt_message(payment)
             email.send()
 
-            logger.info(f"Payment receipt sent to {tenant.full_name}")
+            logger.info(f"Payment receipt sent to {payment.booking.tenant.full_name}")
             return True
 
         except Exception as e:
@@ -1155,40 +1293,46 @@ class EmailService:
             logger.error(f"Failed to send job application notification: {e}")
             return False
 
+    @staticmethod
+    def temp_stay_cleanup_notification_message(contract):
+        """Cleanup notice to operations for an ended temporary stay, built but not sent"""
+        tenant = contract.booking.tenant
+        temp_room = contract.temporary_room
+        permanent_room = contract.booking.room
+
+        context = {
+            'tenant_name': tenant.full_name,
+            'temp_room_code': temp_room.room_code if temp_room else 'N/A',
+            'permanent_room_code': permanent_room.room_code,
+            'temp_stay_end': contract.temporary_stay_end.strftime('%Y-%m-%d') if contract.temporary_stay_end else 'N/A',
+            'property_name': permanent_room.property.name,
+            'property_address': permanent_room.property.address,
+            'contract_number': contract.contract_number,
+        }
+
+        subject = f"Room Cleanup Required - {temp_room.room_code if temp_room else 'N/A'} - Temp Stay Ended"
+
+        html_content = render_to_string('emails/temp_stay_cleanup.html', context)
+        text_content = strip_tags(html_content)
+
+        email = EmailMultiAlternatives(
+            subject=subject,
+            body=text_content,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[settings.TO_EMAIL],
+            reply_to=['operations@wing-kong.com']
+        )
+        email.attach_alternative(html_content, "text/html")
+        return email
+
     @staticmethod
     def send_temp_stay_cleanup_notification(contract):
         """Notify operations that a temporary stay room needs cleanup"""
         try:
-            tenant = contract.booking.tenant
-            temp_room = contract.temporary_room
-            permanent_room = contract.booking.room
-
-            context = {
-                'tenant_name': tenant.full_name,
-                'temp_room_code': temp_room.room_code if temp_room else 'N/A',
-                'permanent_room_code': permanent_room.room_code,
-                'temp_stay_end': contract.temporary_stay_end.strftime('%Y-%m-%d') if contract.temporary_stay_end else 'N/A',
-                'property_name': permanent_room.property.name,
-                'property_address': permanent_room.property.address,
-                'contract_number': contract.contract_number,
-            }
-
-            subject = f"Room Cleanup Required - {temp_room.room_code if temp_room else 'N/A'} - Temp Stay Ended"
-
-            html_content = render_to_string('emails/temp_stay_cleanup.html', context)
-            text_content = strip_tags(html_content)
-
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[settings.TO_EMAIL],
-                reply_to=['operations@wing-kong.com']
-            )
-            email.attach_alternative(html_content, "text/html")
+            email = EmailService.temp_stay_cleanup_notification_message(contract)
             email.send()
 
-            logger.info(f"Temp stay cleanup notification sent for {tenant.full_name}")
+            logger.info(f"Temp stay cleanup notification sent for {contract.booking.tenant.full_name}")
             return True
 
         except Exception as e:
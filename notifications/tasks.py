@@ -3,105 +3,61 @@ from celery import shared_task
 from django.utils import timezone
 from datetime import timedelta
 from django.core.mail import send_mail
+from django.db import transaction
 from bookings.models import Booking
 from payments.models import Payment
 from contracts.models import Contract
 from tenants.models import Tenant
 from .services import EmailService
 from .models import NotificationLog
+from .outbox import enqueue, outbox_entry
 
 logger = logging.getLogger(__name__)
 
 
+def _build_messages(build, items):
+    """``build(item)`` for each item, with None where building it failed"""
+    messages = []
+    for item in items:
+        try:
+            messages.append(build(item))
+        except Exception as e:
+            logger.error(f"Failed to build {build.__name__} for {item!r}: {e}")
+            messages.append(None)
+    return messages
+
+
 @shared_task
 def send_rent_reminders():
     """Send automated rent reminders (Requirement #9a)"""
-    today = timezone.now().date()
-    logger.info("Starting rent reminder task...")
-
-    # Rent due in 3 days
-    due_soon_date = today + timedelta(days=3)
-    due_soon_payments = Payment.objects.filter(
-        payment_type='rent',
-        status='pending',
-        due_date=due_soon_date
-    ).select_related('booking__tenant', 'booking__room')
-
-    for payment in due_soon_payments:
-        try:
-            success = EmailService.send_rent_reminder(payment)
-            NotificationLog.objects.create(
-                tenant=payment.booking.tenant,
-                notification_type='rent_reminder',
-                status='sent' if success else 'failed',
-                subject=f'Rent Due Soon - {payment.booking.room.room_code}',
-                related_booking=payment.booking,
-                related_payment=payment,
-                sent_at=timezone.now() if success else None
-            )
-        except Exception as e:
-            logger.error(f"Failed to send rent reminder for {payment.id}: {e}")
+    from .schedule import fire_due_events
 
-    # Overdue rent (due yesterday)
-    overdue_payments = Payment.objects.filter(
-        payment_type='rent',
-        status='pending',
-        due_date__lt=today
-    ).select_related('booking__tenant', 'booking__room')
+    logger.info("Starting rent reminder task...")
 
-    for payment in overdue_payments:
-        try:
-            success = EmailService.send_rent_reminder(payment)
-            NotificationLog.objects.create(
-                tenant=payment.booking.tenant,
-                notification_type='rent_reminder',
-                status='sent' if success else 'failed',
-                subject=f'Rent Overdue - {payment.booking.room.room_code}',
-                related_booking=payment.booking,
-                related_payment=payment,
-                sent_at=timezone.now() if success else None
-            )
-        except Exception as e:
-            logger.error(f"Failed to send overdue reminder for {payment.id}: {e}")
+    def build(event):
+        return outbox_entry(EmailService.rent_reminder_message(event.payment), 'rent_reminder', payment=event.payment)
 
-    logger.info(
-        f"Rent reminder task completed. Processed {due_soon_payments.count() + overdue_payments.count()} payments.")
+    counts = fire_due_events(['rent_due_soon', 'rent_overdue'], build)
+    logger.info(f"Rent reminder task completed: {counts}")
+    return counts['sent']
 
 
 @shared_task
 def send_contract_reminders():
     """Send contract renewal reminders (Enhanced for Requirement #11)"""
-    today = timezone.now().date()
-
-    # Contracts ending in 21 days (3 weeks) - for renewal reminders
-    renewal_contracts = Contract.objects.filter(
-        end_date=today + timedelta(days=21),
-        status='signed',
-        renewal_status='not_sent'
-    ).select_related('booking__tenant', 'booking__room')
-
-    logger.info(f"Found {renewal_contracts.count()} contracts needing renewal reminders.")
+    from .schedule import fire_due_events
 
-    for contract in renewal_contracts:
-        try:
-            success = EmailService.send_contract_renewal_reminder(contract)
-
-            if success:
-                contract.renewal_status = 'sent'
-                contract.renewal_sent_date = timezone.now()
-                contract.save()
-
-            NotificationLog.objects.create(
-                tenant=contract.booking.tenant,
-                notification_type='contract_reminder',
-                status='sent' if success else 'failed',
-                subject=f'Contract Renewal Reminder - {contract.booking.room.room_code}',
-                related_booking=contract.booking,
-                sent_at=timezone.now() if success else None
-            )
+    def build(event):
+        contract = event.contract
+        return outbox_entry(
+            EmailService.contract_renewal_reminder_message(contract), 'contract_reminder', booking=contract.booking
+        )
 
-        except Exception as e:
-            logger.error(f"Failed to send contract reminder for {contract.id}: {e}")
+    # Renewal reminders go out 3 weeks before the end date; the contract is
+    # marked as reminded once the email is delivered (notifications.schedule)
+    counts = fire_due_events(['contract_renewal'], build)
+    logger.info(f"Contract renewal reminders: {counts}")
+    return counts['sent']
 
 
 @shared_task
@@ -111,8 +67,8 @@ def send_birthday_wishes():
 
     # Get current tenants with birthdays today
     current_tenants = Tenant.objects.filter(
-        date_of_birth__month=today.month,
-        date_of_birth__day=today.day
+        birth_month=today.month,
+        birth_day=today.day
     )
 
     # Filter only tenants with active bookings
@@ -129,75 +85,30 @@ def send_birthday_wishes():
 
     logger.info(f"Found {len(birthday_tenants)} tenants with birthdays today.")
 
-    for tenant in birthday_tenants:
-        try:
-            success = EmailService.send_birthday_wish(tenant)
-            NotificationLog.objects.create(
-                tenant=tenant,
-                notification_type='birthday_wish',
-                status='sent' if success else 'failed',
-                subject='Happy Birthday from Wing Kong Properties!',
-                sent_at=timezone.now() if success else None
-            )
-        except Exception as e:
-            logger.error(f"Failed to send birthday wish to {tenant.id}: {e}")
-
+    enqueue(_build_messages(
+        lambda tenant: outbox_entry(EmailService.birthday_wish_message(tenant), 'birthday_wish', tenant=tenant),
+        birthday_tenants,
+    ))
 
 
 @shared_task
 def process_late_fees():
     """Process automatic late fees and send invoices (Requirement #9b) - UPDATED"""
-    today = timezone.now().date()
+    from .schedule import fire_due_events
 
     # First, create any missing late fee payments
     create_late_fee_payments()
 
-    # Now send notifications for overdue payments
-    # Payments overdue by 7 days (send invoice)
-    seven_days_overdue = today - timedelta(days=7)
-    weekly_overdue = Payment.objects.filter(
-        payment_type='rent',
-        status='pending',
-        due_date__lte=seven_days_overdue  # FIXED: Changed = to __lte
-    ).select_related('booking__tenant', 'booking__room')
+    # Late fee invoices a week after the due date, court notices after two (notifications.schedule)
+    def invoice(event):
+        payment = event.payment
+        message = EmailService.late_fee_invoice_message(payment, is_court_notice=event.event_type == 'court_notice')
+        return outbox_entry(message, 'late_fee_invoice', payment=payment)
 
-    for payment in weekly_overdue:
-        try:
-            success = EmailService.send_late_fee_invoice(payment)
-            NotificationLog.objects.create(
-                tenant=payment.booking.tenant,
-                notification_type='late_fee_invoice',
-                status='sent' if success else 'failed',
-                subject=f'Late Fee Invoice - {payment.booking.room.room_code}',
-                related_booking=payment.booking,
-                related_payment=payment,
-                sent_at=timezone.now() if success else None
-            )
-        except Exception as e:
-            logger.error(f"Failed to send weekly late fee invoice for {payment.id}: {e}")
-
-    # Payments overdue by 14 days (send court notice)
-    fourteen_days_overdue = today - timedelta(days=14)
-    court_notice_overdue = Payment.objects.filter(
-        payment_type='rent',
-        status='pending',
-        due_date__lte=fourteen_days_overdue  # FIXED: Changed = to __lte
-    ).select_related('booking__tenant', 'booking__room')
+    counts = fire_due_events(['late_fee_invoice', 'court_notice'], invoice)
+    logger.info(f"Late fee notices: {counts}")
+    return counts['sent']
 
-    for payment in court_notice_overdue:
-        try:
-            success = EmailService.send_late_fee_invoice(payment, is_court_notice=True)
-            NotificationLog.objects.create(
-                tenant=payment.booking.tenant,
-                notification_type='late_fee_invoice',
-                status='sent' if success else 'failed',
-                subject=f'Court Notice - Rent Overdue - {payment.booking.room.room_code}',
-                related_booking=payment.booking,
-                related_payment=payment,
-                sent_at=timezone.now() if success else None
-            )
-        except Exception as e:
-            logger.error(f"Failed to send court notice for {payment.id}: {e}")
 
 @shared_task
 def detect_rent_increases():
@@ -208,6 +119,7 @@ def detect_rent_increases():
     logger.info("Starting rent increase detection task...")
 
     rooms_needing_increase = []
+    notices = []
     threshold = 1500  # HK$1500
 
     # Get all rooms with post_ad_price below threshold
@@ -235,31 +147,15 @@ def detect_rent_increases():
                 'rent_difference': room.post_ad_price - room.monthly_rent
             })
 
-            for contract in ending_contracts:
-                try:
-                    success = EmailService.send_rent_increase_notice(
-                        contract.booking.tenant,
-                        room,
-                        room.post_ad_price
-                    )
-                    # Log the notification
-                    NotificationLog.objects.create(
-                        tenant=contract.booking.tenant,
-                        notification_type='rent_increase',
-                        status='sent' if success else 'failed',
-                        subject=f'Rent Increase Notice - {room.room_code}',
-                        related_booking=contract.booking,
-                        sent_at=timezone.now() if success else None
-                    )
-
-                    if success:
-                        logger.info(
-                            f"Rent increase notice sent for {room.room_code} to {contract.booking.tenant.full_name}")
-                    else:
-                        logger.error(f"Failed to send rent increase notice for {room.room_code}")
-
-                except Exception as e:
-                    logger.error(f"Error sending rent increase notice: {e}")
+            notices.extend((contract, room) for contract in ending_contracts)
+
+    def build(notice):
+        contract, room = notice
+        message = EmailService.rent_increase_notice_message(contract.booking.tenant, room, room.post_ad_price)
+        return outbox_entry(message, 'rent_increase', booking=contract.booking)
+
+    queued = enqueue(_build_messages(build, notices))
+    logger.info(f"Queued {len(queued)} of {len(notices)} rent increase notices")
 
     logger.info(
         f"Rent increase detection completed. Found {len(rooms_needing_increase)} rooms needing increase notices.")
@@ -278,133 +174,228 @@ def sync_room_status():
 
 
 @shared_task
-def create_late_fee_payments():
-    """Automatically create late fee payment records (Requirement #9)"""
-    from payments.models import Payment
-    from datetime import timedelta
+def refresh_room_booking_pointers():
+    """Daily date-rollover refresh of Room.current_booking / next_booking"""
+    from properties.models import Room
 
-    today = timezone.now().date()
-    logger.info("Starting automatic late fee payment creation...")
+    try:
+        updated = Room.refresh_booking_pointers()
+        logger.info(f"Room booking pointers refreshed for {updated} rooms.")
+        return updated
+    except Exception as e:
+        logger.error(f"Failed to refresh room booking pointers: {e}")
+        return 0
 
-    # Find all overdue rent payments
-    overdue_rent_payments = Payment.objects.filter(
-        payment_type='rent',
-        status='pending',
-        due_date__lt=today
-    ).select_related('booking__tenant', 'booking__room')
 
-    total_late_fees_created = 0
+@shared_task
+def generate_image_renditions(model_label, pk):
+    """Generate responsive WebP/JPEG renditions for a room or property photo"""
+    from django.apps import apps
+    from properties.images import delete_renditions, generate_renditions, rendition_paths
+
+    model = apps.get_model(model_label)
+    photo = model.objects.filter(pk=pk).first()
+    if not photo or not photo.image:
+        return False
 
-    for rent_payment in overdue_rent_payments:
-        try:
-            # Calculate days overdue and late fee amount
-            days_overdue = (today - rent_payment.due_date).days
-            late_fee_amount = days_overdue * 100  # HK$100 per day
+    try:
+        previous = photo.renditions
+        renditions = generate_renditions(photo.image)
+        # Queryset update so the post_save upload hook is not re-triggered
+        if not model.objects.filter(pk=pk, image=photo.image.name).update(renditions=renditions):
+            # Replaced again while rendering; the newer upload has its own task
+            delete_renditions(photo, renditions)
+            return False
+        # The files rendered from a replaced image are no longer referenced
+        delete_renditions(photo, previous, keep=rendition_paths(renditions))
+        logger.info(f"Generated image renditions for {model_label} {pk}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to generate image renditions for {model_label} {pk}: {e}")
+        return False
 
-            # Skip if no late fees or already created for today
-            if late_fee_amount <= 0:
-                continue
 
-            # Check if late fee already exists for this period
-            existing_late_fee = Payment.objects.filter(
-                booking=rent_payment.booking,
-                payment_type='late_fee',
-                payment_date=today,
-                status='pending'
-            ).exists()
-
-            if not existing_late_fee:
-                # Create late fee payment record
-                late_fee_payment = Payment.objects.create(
-                    booking=rent_payment.booking,
-                    payment_type='late_fee',
-                    amount=late_fee_amount,
-                    payment_date=today,
-                    due_date=today,
-                    status='pending',
-                    receipt_number=f"LATE-{today.strftime('%Y%m%d')}-{rent_payment.booking.id}",
-                    late_fee_days=days_overdue,
-                    late_fee_amount=late_fee_amount
-                )
+@shared_task
+def compute_proof_hash(payment_id):
+    """Store the perceptual hash of a payment's proof for duplicate detection"""
+    from payments.proof_hash import update_proof_hash
 
-                total_late_fees_created += 1
-                logger.info(
-                    f"Created late fee payment HK${late_fee_amount} for {rent_payment.booking.tenant.full_name}")
+    payment = Payment.objects.filter(pk=payment_id).only('pk', 'proof_of_payment').first()
+    if not payment:
+        return False
+
+    try:
+        update_proof_hash(payment)
+        logger.info(f"Hashed payment proof for payment {payment_id}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to hash payment proof for payment {payment_id}: {e}")
+        return False
 
-                # Send late fee invoice email
-                EmailService.send_late_fee_invoice(late_fee_payment)
 
+@shared_task
+def process_signed_contract(contract_id):
+    """Render and hash a contract's PDF after the tenant signs, then send the signed confirmations"""
+    from .whatsapp_service import WhatsAppService
+
+    contract = Contract.objects.select_related(
+        'booking__tenant__user', 'booking__room__property'
+    ).filter(pk=contract_id).first()
+    if not contract:
+        return False
+
+    if not contract.generate_contract_pdf():
+        return False
+    logger.info(f"Generated signed PDF for contract {contract.contract_number}")
+
+    try:
+        EmailService.send_contract_signed_confirmation(contract)
+        WhatsAppService.send_contract_signed_confirmation(contract)
+    except Exception as e:
+        logger.error(f"Failed to send signed confirmations for contract {contract.contract_number}: {e}")
+    return True
+
+
+@shared_task
+def send_renewal_offers(contract_ids):
+    """Send a batch of draft renewal contracts to their tenants for signature"""
+    from contracts.renewals import mark_offered
+    from .whatsapp_service import WhatsAppService
+
+    contracts = list(Contract.objects.filter(pk__in=contract_ids).select_related(
+        'booking__tenant__user', 'booking__room'
+    ).order_by('pk'))
+
+    results = EmailService.send_batch(_build_messages(EmailService.contract_for_signature_message, contracts))
+    delivered = [contract for contract, success in zip(contracts, results) if success]
+    Contract.objects.filter(pk__in=[contract.pk for contract in delivered]).update(
+        tenant_email_verified=True, updated_at=timezone.now()
+    )
+    # Only now are the contracts being replaced offered, so undelivered ones keep their renewal reminders
+    mark_offered(delivered)
+
+    sent = 0
+    for contract in delivered:
+        try:
+            if contract.booking.tenant.whatsapp_number:
+                WhatsAppService.send_verification_code(contract)
+            sent += 1
         except Exception as e:
-            logger.error(f"Failed to create late fee for payment {rent_payment.id}: {e}")
+            logger.error(f"Failed to send renewal offer for contract {contract.contract_number}: {e}")
 
-    logger.info(f"Late fee creation completed: {total_late_fees_created} late fees created")
-    return total_late_fees_created
+    logger.info(f"Sent {sent} of {len(contract_ids)} renewal offers")
+    return sent
 
 
 @shared_task
-def send_move_out_reminders():
-    """Send move out reminders (Requirement #8, #11)"""
-    today = timezone.now().date()
+def dispatch_notifications(limit=None):
+    """Send due emails from the NotificationLog outbox (see notifications.outbox)"""
+    from .outbox import dispatch
 
-    # Contracts ending in 21 days - for move out reminders
-    move_out_contracts = Contract.objects.filter(
-        end_date=today + timedelta(days=21),
-        status='signed',
-        move_out_notice_sent=False
-    ).select_related('booking__tenant', 'booking__room')
+    counts = dispatch(limit=limit)
+    logger.info(f"Notification outbox dispatch: {counts}")
+    return counts['sent']
 
-    logger.info(f"Found {move_out_contracts.count()} contracts needing move out reminders.")
 
-    for contract in move_out_contracts:
-        try:
-            success = EmailService.send_move_out_reminder(contract)
-
-            if success:
-                contract.move_out_notice_sent = True
-                contract.move_out_notice_sent_date = timezone.now()
-                contract.save()
-
-            NotificationLog.objects.create(
-                tenant=contract.booking.tenant,
-                notification_type='move_out_reminder',
-                status='sent' if success else 'failed',
-                subject=f'Move Out Reminder - {contract.booking.room.room_code}',
-                related_booking=contract.booking,
-                sent_at=timezone.now() if success else None
-            )
+@shared_task
+def verify_contract_hashes(incremental=True):
+    """Re-hash stored contract PDFs and record mismatches and missing files"""
+    from contracts.integrity import verify_contract_hashes as verify
 
-        except Exception as e:
-            logger.error(f"Failed to send move out reminder for {contract.id}: {e}")
+    try:
+        sweep = verify(incremental=incremental)
+        return sweep.mismatched + sweep.missing
+    except Exception as e:
+        logger.error(f"Failed to verify contract hashes: {e}")
+        return 0
 
 
 @shared_task
-def send_final_move_out_warnings():
-    """Send final warnings for contracts ending in 7 days"""
+def refresh_pricing_snapshot():
+    """Recompute the cached rent/sqft pricing analytics used by the pricing report"""
+    from reports.pricing import refresh_pricing_snapshot as refresh
+
+    try:
+        count = refresh()
+        logger.info(f"Pricing snapshot refreshed for {count} rooms.")
+        return count
+    except Exception as e:
+        logger.error(f"Failed to refresh pricing snapshot: {e}")
+        return 0
+
+
+@shared_task
+def generate_rent_invoices():
+    """Create next month's pending rent payments for active/confirmed bookings"""
     today = timezone.now().date()
+    next_month = (today.replace(day=1) + timedelta(days=32)).replace(day=1)
 
-    final_warning_contracts = Contract.objects.filter(
-        end_date=today + timedelta(days=7),
-        status='signed',
-        renewal_status__in=['not_sent', 'sent', 'declined']
-    ).select_related('booking__tenant', 'booking__room')
+    try:
+        created = Payment.generate_rent_invoices(next_month)
+        logger.info(f"Rent invoice generation completed: {len(created)} payments for {next_month:%Y-%m}")
+        return len(created)
+    except Exception as e:
+        logger.error(f"Failed to generate rent invoices for {next_month:%Y-%m}: {e}")
+        return 0
 
-    logger.info(f"Found {final_warning_contracts.count()} contracts needing final warnings.")
 
-    for contract in final_warning_contracts:
-        try:
-            success = EmailService.send_final_move_out_warning(contract)
-
-            NotificationLog.objects.create(
-                tenant=contract.booking.tenant,
-                notification_type='move_out_reminder',
-                status='sent' if success else 'failed',
-                subject=f'FINAL: Move Out Warning - {contract.booking.room.room_code}',
-                related_booking=contract.booking,
-                sent_at=timezone.now() if success else None
-            )
+@shared_task
+def create_late_fee_payments():
+    """Accrue late fees on overdue rent and invoice newly opened fees (Requirement #9)"""
+    from payments.late_fees import accrue_late_fees
 
-        except Exception as e:
-            logger.error(f"Failed to send final move out warning for {contract.id}: {e}")
+    logger.info("Starting late fee accrual...")
+    try:
+        created_ids, updated = accrue_late_fees()
+    except Exception as e:
+        logger.error(f"Failed to accrue late fees: {e}")
+        return 0
+
+    new_fees = Payment.objects.filter(pk__in=created_ids).select_related(
+        'booking__tenant', 'booking__room', 'late_fee_for'
+    )
+    enqueue(_build_messages(
+        lambda payment: outbox_entry(
+            EmailService.late_fee_invoice_message(payment), 'late_fee_invoice', payment=payment
+        ),
+        new_fees,
+    ))
+
+    logger.info(f"Late fee accrual completed: {len(created_ids)} late fees created, {updated} updated")
+    return len(created_ids)
+
+
+@shared_task
+def send_move_out_reminders():
+    """Send move out reminders (Requirement #8, #11)"""
+    from .schedule import fire_due_events
+
+    def build(event):
+        contract = event.contract
+        return outbox_entry(
+            EmailService.move_out_reminder_message(contract), 'move_out_reminder', booking=contract.booking
+        )
+
+    # move_out_notice_sent is set once the email is delivered (notifications.schedule)
+    counts = fire_due_events(['contract_move_out'], build)
+    logger.info(f"Move out reminders: {counts}")
+    return counts['sent']
+
+
+@shared_task
+def send_final_move_out_warnings():
+    """Send final warnings for contracts ending in 7 days"""
+    from .schedule import fire_due_events
+
+    def build(event):
+        contract = event.contract
+        return outbox_entry(
+            EmailService.final_move_out_warning_message(contract), 'move_out_reminder', booking=contract.booking
+        )
+
+    counts = fire_due_events(['contract_final_warning'], build)
+    logger.info(f"Final move out warnings: {counts}")
+    return counts['sent']
 
 
 @shared_task
@@ -419,32 +410,58 @@ def allocate_utility_bills():
     unallocated_bills = UtilityBill.objects.filter(
         is_allocated=False,
         due_date__lte=today + timedelta(days=7)  # Allocate bills due in next 7 days
-    ).select_related('property')
-
-    total_allocated = 0
-    total_payments_created = 0
-
-    for bill in unallocated_bills:
-        try:
-            created_payments = bill.create_utility_payments()
-            total_payments_created += len(created_payments)
+    ).select_related('property_obj')
 
-            if created_payments:
-                total_allocated += 1
-                logger.info(f"Allocated utility bill {bill.id} to {len(created_payments)} tenants")
+    try:
+        allocations = UtilityBill.allocate_bills(unallocated_bills)
+    except Exception as e:
+        logger.error(f"Failed to allocate utility bills: {e}")
+        return 0
 
-                # Send notifications to tenants
-                for payment in created_payments:
-                    EmailService.send_utility_bill_notification(payment, bill)
+    total_allocated = len(allocations)
+    total_payments_created = sum(len(payments) for payments in allocations.values())
+    for bill_id, payments in allocations.items():
+        logger.info(f"Allocated utility bill {bill_id} to {len(payments)} tenants")
 
+    # Send notifications to tenants as one background batch
+    notifications = [[payment.id, bill_id] for bill_id, payments in allocations.items() for payment in payments]
+    if notifications:
+        try:
+            send_utility_bill_notifications.delay(notifications)
         except Exception as e:
-            logger.error(f"Failed to allocate utility bill {bill.id}: {e}")
+            logger.error(f"Failed to queue utility bill notifications, sending inline: {e}")
+            send_utility_bill_notifications(notifications)
 
     logger.info(
         f"Utility allocation completed: {total_allocated} bills allocated, {total_payments_created} payments created")
     return total_allocated
 
 
+@shared_task
+def send_utility_bill_notifications(notifications):
+    """Email tenants their new utility payments; ``notifications`` is a list of [payment_id, bill_id]"""
+    from payments.models import Payment, UtilityBill
+
+    payments = Payment.objects.select_related('booking__tenant__user', 'booking__room').in_bulk(
+        [payment_id for payment_id, _ in notifications]
+    )
+    bills = UtilityBill.objects.in_bulk({bill_id for _, bill_id in notifications})
+
+    pairs = [
+        (payments[payment_id], bills[bill_id]) for payment_id, bill_id in notifications
+        if payment_id in payments and bill_id in bills
+    ]
+    queued = enqueue(_build_messages(
+        lambda pair: outbox_entry(
+            EmailService.utility_bill_notification_message(*pair), 'utility_bill', payment=pair[0]
+        ),
+        pairs,
+    ))
+
+    logger.info(f"Utility bill notifications queued: {len(queued)} of {len(notifications)}")
+    return len(queued)
+
+
 @shared_task
 def send_utility_payment_reminders():
     """Send reminders for overdue utility payments"""
@@ -456,25 +473,16 @@ def send_utility_payment_reminders():
         status='pending',
         due_date__lt=today
     ).select_related('booking__tenant', 'booking__room')
+    overdue_utility_payments = list(overdue_utility_payments)
 
-    logger.info(f"Found {overdue_utility_payments.count()} overdue utility payments")
+    logger.info(f"Found {len(overdue_utility_payments)} overdue utility payments")
 
-    for payment in overdue_utility_payments:
-        try:
-            success = EmailService.send_utility_payment_reminder(payment)
-
-            NotificationLog.objects.create(
-                tenant=payment.booking.tenant,
-                notification_type='utility_reminder',
-                status='sent' if success else 'failed',
-                subject=f'Utility Payment Overdue - {payment.booking.room.room_code}',
-                related_booking=payment.booking,
-                related_payment=payment,
-                sent_at=timezone.now() if success else None
-            )
-
-        except Exception as e:
-            logger.error(f"Failed to send utility reminder for {payment.id}: {e}")
+    enqueue(_build_messages(
+        lambda payment: outbox_entry(
+            EmailService.utility_payment_reminder_message(payment), 'utility_reminder', payment=payment
+        ),
+        overdue_utility_payments,
+    ))
 
 
 # notifications/tasks.py - ADD MAINTENANCE TASKS:
@@ -490,55 +498,63 @@ def check_maintenance_overdue():
         estimated_completion_date__lt=timezone.now().date(),
         status__in=['open', 'in_progress']
     ).select_related('tenant', 'room', 'assigned_staff')
+    overdue_tickets = list(overdue_tickets)
 
-    for ticket in overdue_tickets:
-        try:
-            # Send alert to assigned staff
-            if ticket.assigned_staff:
-                EmailService.send_maintenance_overdue_alert(ticket)
-
-            # Notify management about severely overdue tickets
-            if ticket.days_open > 7:
-                EmailService.send_maintenance_management_alert(ticket)
-
-            logger.info(f"Overdue maintenance alert sent for ticket {ticket.ticket_number}")
-
-        except Exception as e:
-            logger.error(f"Failed to send overdue alert for ticket {ticket.id}: {e}")
+    # Alerts to the assigned staff, and to management for tickets open over a week, are queued together.
+    # They are internal, so the rows carry no tenant and stay out of the tenant's notification history.
+    staff_alerts = _build_messages(
+        lambda ticket: outbox_entry(EmailService.maintenance_overdue_alert_message(ticket), 'maintenance_alert'),
+        [ticket for ticket in overdue_tickets if ticket.assigned_staff]
+    )
+    management_alerts = _build_messages(
+        lambda ticket: outbox_entry(EmailService.maintenance_management_alert_message(ticket), 'maintenance_alert'),
+        [ticket for ticket in overdue_tickets if ticket.days_open > 7]
+    )
+    queued = enqueue(staff_alerts + management_alerts)
 
-    logger.info(f"Maintenance overdue check completed: {overdue_tickets.count()} overdue tickets")
-    return overdue_tickets.count()
+    logger.info(f"Maintenance overdue check completed: {len(overdue_tickets)} overdue tickets, {len(queued)} alerts")
+    return len(overdue_tickets)
 
 
 @shared_task
 def send_maintenance_updates_to_tenants():
     """Automatically send updates to tenants for tickets needing communication"""
-    from maintenance.models import MaintenanceTicket
+    from maintenance.models import MaintenanceTicket, MaintenanceUpdate
 
     logger.info("Sending maintenance updates to tenants...")
 
-    tickets_needing_updates = MaintenanceTicket.objects.filter(
-        status__in=['open', 'in_progress'],
-        tenant_notified=False
-    ).select_related('tenant', 'room')
-
-    update_count = 0
-
-    for ticket in tickets_needing_updates:
-        try:
-            # Only send updates for tickets open more than 2 days
-            if ticket.days_open >= 2:
-                message = f"Your maintenance request for {ticket.room.room_code} is currently {ticket.get_status_display().lower()}. We will update you once there are developments."
-
-                success = ticket.update_tenant(message)
-                if success:
-                    update_count += 1
-
-        except Exception as e:
-            logger.error(f"Failed to send update for ticket {ticket.id}: {e}")
+    # Only send updates for tickets open more than 2 days
+    tickets = [
+        ticket for ticket in MaintenanceTicket.objects.filter(
+            status__in=['open', 'in_progress'],
+            tenant_notified=False
+        ).select_related('tenant__user', 'room')
+        if ticket.days_open >= 2
+    ]
+    updates = {
+        ticket.pk: f"Your maintenance request for {ticket.room.room_code} is currently "
+                   f"{ticket.get_status_display().lower()}. We will update you once there are developments."
+        for ticket in tickets
+    }
+
+    # One batch over shared SMTP connections, then the bookkeeping in bulk for the delivered ones
+    results = EmailService.send_batch(_build_messages(
+        lambda ticket: EmailService.maintenance_update_message(ticket, updates[ticket.pk]), tickets
+    ))
+    notified = [ticket for ticket, sent in zip(tickets, results) if sent]
+
+    if notified:
+        with transaction.atomic():
+            MaintenanceTicket.objects.filter(pk__in=[ticket.pk for ticket in notified]).update(
+                tenant_notified=True, last_tenant_update=timezone.now(),
+            )
+            MaintenanceUpdate.objects.bulk_create([
+                MaintenanceUpdate(ticket=ticket, message=updates[ticket.pk], communicated_to_tenant=True)
+                for ticket in notified
+            ])
 
-    logger.info(f"Maintenance updates sent: {update_count} tickets updated")
-    return update_count
+    logger.info(f"Maintenance updates sent: {len(notified)} tickets updated")
+    return len(notified)
 
 
 @shared_task
@@ -554,15 +570,15 @@ def escalate_high_priority_tickets():
         status__in=['open', 'in_progress'],
         reported_date__lt=timezone.now() - timedelta(days=3)
     ).select_related('tenant', 'room')
+    urgent_stuck_tickets = list(urgent_stuck_tickets)
 
-    for ticket in urgent_stuck_tickets:
-        try:
-            EmailService.send_maintenance_escalation_alert(ticket)
-            logger.info(f"Escalated urgent ticket {ticket.ticket_number}")
-        except Exception as e:
-            logger.error(f"Failed to escalate ticket {ticket.id}: {e}")
+    queued = enqueue(_build_messages(
+        lambda ticket: outbox_entry(EmailService.maintenance_escalation_alert_message(ticket), 'maintenance_alert'),
+        urgent_stuck_tickets,
+    ))
+    logger.info(f"Escalated {len(queued)} of {len(urgent_stuck_tickets)} urgent tickets")
 
-    return urgent_stuck_tickets.count()
+    return len(urgent_stuck_tickets)
 
 
 @shared_task
@@ -572,32 +588,8 @@ def generate_payment_receipts():
 
     logger.info("Starting automatic receipt generation...")
 
-    # Find completed payments without receipts
-    completed_payments = Payment.objects.filter(
-        status='completed',
-        receipt_generated=False
-    ).select_related('booking__tenant', 'booking__room')
-
-    receipts_generated = 0
-    emails_sent = 0
-
-    for payment in completed_payments:
-        try:
-            # Generate PDF receipt
-            receipt_generated = payment.generate_receipt_pdf()
-
-            if receipt_generated:
-                receipts_generated += 1
-
-                # Send receipt email
-                email_sent = payment.send_receipt_email()
-                if email_sent:
-                    emails_sent += 1
-
-                logger.info(f"Generated receipt for payment {payment.receipt_number}")
-
-        except Exception as e:
-            logger.error(f"Failed to generate receipt for payment {payment.id}: {e}")
+    # Completed payments without receipts, claimed in batches so overlapping runs never share one
+    receipts_generated, emails_sent = _generate_claimed_receipts(Payment.objects.all())
 
     logger.info(f"Receipt generation completed: {receipts_generated} receipts generated, {emails_sent} emails sent")
     return receipts_generated
@@ -611,20 +603,70 @@ def process_pending_receipts():
     # Find payments completed in the last hour that need receipts
     one_hour_ago = timezone.now() - timedelta(hours=1)
 
-    recent_payments = Payment.objects.filter(
-        status='completed',
-        received_date__gte=one_hour_ago,
-        receipt_generated=False
-    ).select_related('booking__tenant', 'booking__room')
+    recent_payments = Payment.objects.filter(received_date__gte=one_hour_ago)
+
+    receipts_generated, _ = _generate_claimed_receipts(recent_payments)
+    return receipts_generated
+
+
+def _generate_claimed_receipts(queryset, batch_size=50):
+    """Claim and process receipt batches until none are left for this worker"""
+    from payments.models import Payment
+
+    receipts_generated = 0
+    emails_sent = 0
+    attempted = []
+    while True:
+        # Failed receipts release their claim; skip them for the rest of this run
+        payments = Payment.claim_receipts(queryset.exclude(pk__in=attempted), limit=batch_size)
+        if not payments:
+            break
+        attempted.extend(payment.pk for payment in payments)
+        generated, sent = _generate_receipts(payments)
+        receipts_generated += generated
+        emails_sent += sent
+    return receipts_generated, emails_sent
+
+
+def _generate_receipts(payments):
+    """Render receipt PDFs as one parallel batch, store them, then email the stored ones as one batch"""
+    from .pdf import PDFService
+    from .services import EmailService
+
+    stored = []
+    pdfs = PDFService.render_many([payment.receipt_pdf_job() for payment in payments])
+    for payment, pdf_file in zip(payments, pdfs):
+        if isinstance(pdf_file, Exception):
+            logger.error(f"Failed to generate receipt for payment {payment.id}: {pdf_file}")
+            payment.release_receipt_claim()
+            continue
+
+        try:
+            if not payment.save_receipt_pdf(pdf_file):
+                continue
+            stored.append(payment)
+            logger.info(f"Generated receipt for payment {payment.receipt_number}")
+        except Exception as e:
+            logger.error(f"Failed to process receipt for payment {payment.id}: {e}")
+            if not payment.receipt_generated:
+                payment.release_receipt_claim()
 
-    for payment in recent_payments:
+    messages = []
+    for payment in stored:
         try:
-            payment.generate_receipt_pdf()
-            payment.send_receipt_email()
+            messages.append(EmailService.payment_receipt_message(payment))
         except Exception as e:
-            logger.error(f"Failed to process receipt for recent payment {payment.id}: {e}")
+            logger.error(f"Failed to build receipt email for payment {payment.id}: {e}")
+            messages.append(None)
+
+    # Shared SMTP connections instead of one per receipt
+    results = EmailService.send_batch(messages)
+    for payment, sent in zip(stored, results):
+        if sent:
+            logger.info(f"Receipt email sent for payment {payment.receipt_number}")
+
+    return len(stored), sum(results)
 
-    return recent_payments.count()
 
 def send_test_email():
     """Test task to verify email setup"""
@@ -657,14 +699,20 @@ def check_temp_stay_switches():
         temporary_stay_end__lte=today,
         status='signed'
     ).select_related('booking__tenant', 'booking__room', 'temporary_room')
+    contracts_needing_switch = list(contracts_needing_switch)
+
+    # Queue notifications to operations team about room cleanup; staff-facing, so kept off the tenant's history
+    enqueue(_build_messages(
+        lambda contract: outbox_entry(
+            EmailService.temp_stay_cleanup_notification_message(contract), 'temp_stay_cleanup',
+        ),
+        contracts_needing_switch,
+    ))
 
     switch_count = 0
 
     for contract in contracts_needing_switch:
         try:
-            # Send notification to operations team about room cleanup
-            EmailService.send_temp_stay_cleanup_notification(contract)
-
             # Auto-switch to permanent room
             switched = contract.switch_to_permanent_room()
 
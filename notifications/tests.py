@@ -1,3 +1,465 @@
-from django.test import TestCase
+import os
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core import mail
+from django.core.mail import EmailMessage, EmailMultiAlternatives
+from django.core.management import call_command
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+from django.utils import timezone
 
-# Create your tests here.
+from bookings.models import Booking
+from contracts.models import Contract
+from maintenance.models import MaintenanceTicket, MaintenanceUpdate
+from notifications import pdf, tasks
+from notifications.models import NotificationLog, RenderedPDF, ScheduledEvent
+from notifications.outbox import TokenBucket, enqueue, outbox_entry
+from notifications.pdf import PDFService, _cache_store, cache_key
+from notifications.services import EmailService
+from payments.models import Payment
+from properties.models import Property, Room
+from tenants.models import Tenant
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    return tmp_path
+
+
+@pytest.mark.django_db
+class TestRenderedPDFCache:
+
+    def setup_method(self):
+        user = User.objects.create_user(username="tenant1", email="t1@example.com", password="pass")
+        tenant = Tenant.objects.create(
+            user=user, full_name="John Doe", nationality="Testland",
+            date_of_birth="1990-01-01", gender="male", phone_number="123456789",
+        )
+        room = Room.objects.create(
+            property=Property.objects.create(name="P1", address="Addr", property_type="apartment", total_rooms=1),
+            room_code="R101", room_number="101", monthly_rent=5000,
+        )
+        today = timezone.now().date()
+        booking = Booking.objects.create(
+            tenant=tenant, room=room, move_in_date=today, move_out_date=today + timedelta(days=30),
+            duration_months=1, monthly_rent=5000,
+        )
+        self.payment = Payment.objects.create(
+            booking=booking, payment_type='rent', amount=5000,
+            payment_method='cash', payment_date=today,
+        )
+        self.template = get_template('payments/receipt_pdf.html')
+
+    def key(self):
+        return cache_key(self.template, self.payment.receipt_pdf_job()[1])
+
+    def test_key_ignores_receipt_bookkeeping_but_not_content(self):
+        key = self.key()
+
+        self.payment.receipt_generated = True
+        self.payment.receipt_generated_date = timezone.now()
+        self.payment.save()
+        assert self.key() == key
+
+        self.payment.amount = 5100
+        assert self.key() != key
+
+    def test_key_follows_relations_the_caller_did_not_load(self):
+        payment = Payment.objects.get(pk=self.payment.pk)
+        key = cache_key(self.template, {'payment': payment})
+
+        Property.objects.update(name="Renamed")
+        assert cache_key(self.template, {'payment': Payment.objects.get(pk=self.payment.pk)}) != key
+
+    def test_key_changes_when_an_extended_or_included_template_changes(self, settings, tmp_path):
+        (tmp_path / "base.html").write_text("{% block body %}{% endblock %}")
+        (tmp_path / "partial.html").write_text("partial")
+        (tmp_path / "doc.html").write_text(
+            '{% extends "base.html" %}{% block body %}{% include "partial.html" %}{% endblock %}'
+        )
+        settings.TEMPLATES = [{'BACKEND': 'django.template.backends.django.DjangoTemplates', 'DIRS': [str(tmp_path)]}]
+        template = get_template("doc.html")
+        key = cache_key(template, {})
+
+        os.utime(tmp_path / "base.html", (1, 1))
+        assert cache_key(template, {}) != key
+        key = cache_key(template, {})
+        os.utime(tmp_path / "partial.html", (1, 1))
+        assert cache_key(template, {}) != key
+
+        key = cache_key(template, {})
+        settings.PDF_CACHE_VERSION = "2"
+        assert cache_key(template, {}) != key
+
+    def test_identical_render_is_served_from_cache(self, media_root):
+        _cache_store(self.key(), 'payments/receipt_pdf.html', b'%PDF-cached')
+
+        template_name, context = self.payment.receipt_pdf_job()
+        assert PDFService.render(template_name, context) == b'%PDF-cached'
+        assert PDFService.render_many([(template_name, context)] * 2) == [b'%PDF-cached'] * 2
+
+        assert RenderedPDF.objects.get().hit_count == 3
+
+    def test_purge_removes_orphans_and_stale_entries(self, media_root):
+        _cache_store('a' * 64, 'payments/receipt_pdf.html', b'%PDF-a')
+        _cache_store('b' * 64, 'payments/receipt_pdf.html', b'%PDF-b')
+        _cache_store('c' * 64, 'payments/receipt_pdf.html', b'%PDF-c')
+        missing = RenderedPDF.objects.get(key='a' * 64)
+        default_storage.delete(missing.file.name)
+        RenderedPDF.objects.filter(key='b' * 64).update(last_used_at=timezone.now() - timedelta(days=60))
+        default_storage.save('pdf_cache/zz/orphan.pdf', ContentFile(b'%PDF-orphan'))
+
+        call_command('purge_pdf_cache', '--dry-run', stdout=None)
+        assert RenderedPDF.objects.count() == 3
+
+        call_command('purge_pdf_cache', stdout=None)
+        assert list(RenderedPDF.objects.values_list('key', flat=True)) == ['c' * 64]
+        assert not default_storage.exists('pdf_cache/zz/orphan.pdf')
+        assert not default_storage.exists(f"pdf_cache/bb/{'b' * 64}.pdf")
+
+
+@pytest.fixture
+def doc_templates(settings, tmp_path):
+    (tmp_path / "doc.html").write_text("doc {{ n }}")
+    settings.TEMPLATES = [{'BACKEND': 'django.template.backends.django.DjangoTemplates', 'DIRS': [str(tmp_path)]}]
+    settings.PDF_CACHE_ENABLED = False
+    settings.PDF_RENDER_WORKERS = 2
+
+
+def fake_render(html, uncompressed=False):
+    if html == "doc 2":
+        raise ValueError("bad document")
+    return html.replace("doc", "%PDF").encode()
+
+
+class TestPDFRenderPool:
+
+    def test_results_keep_job_order_and_isolate_failures(self, doc_templates, monkeypatch):
+        submitted = []
+
+        class ThreadPool(ThreadPoolExecutor):
+            def submit(self, fn, *args, **kwargs):
+                submitted.append(args[0])
+                return super().submit(fn, *args, **kwargs)
+
+        monkeypatch.setattr('notifications.pdf._render_html', fake_render)
+        monkeypatch.setattr('notifications.pdf._pool', ThreadPool(max_workers=2))
+        jobs = [("doc.html", {"n": n}) for n in range(4)] + [("missing.html", {})]
+
+        results = PDFService.render_many(jobs)
+
+        assert submitted == ["doc 0", "doc 1", "doc 2", "doc 3"]
+        assert results[:2] == [b"%PDF 0", b"%PDF 1"] and results[3] == b"%PDF 3"
+        assert isinstance(results[2], ValueError)
+        assert isinstance(results[4], TemplateDoesNotExist)
+
+    def test_broken_pool_falls_back_to_in_process_rendering(self, doc_templates, monkeypatch):
+        class BrokenPool:
+            def submit(self, fn, *args, **kwargs):
+                raise BrokenProcessPool("worker died")
+
+            def shutdown(self, **kwargs):
+                pass
+
+        monkeypatch.setattr('notifications.pdf._render_html', fake_render)
+        monkeypatch.setattr('notifications.pdf._pool', BrokenPool())
+
+        results = PDFService.render_many([("doc.html", {"n": 0}), ("doc.html", {"n": 1})])
+
+        assert results == [b"%PDF 0", b"%PDF 1"]
+        assert pdf._pool is None
+
+    def test_workers_are_recycled_in_either_kind_of_pool(self, settings, monkeypatch):
+        settings.PDF_RENDER_MAX_DOCUMENTS_PER_WORKER = 7
+        created = {}
+        monkeypatch.setattr('notifications.pdf._pool', None)
+        monkeypatch.setattr(
+            'notifications.pdf.ProcessPoolExecutor', lambda **kwargs: created.setdefault('stdlib', kwargs)
+        )
+        pdf._get_pool()
+        assert created['stdlib']['max_tasks_per_child'] == 7
+
+        # Celery prefork children are daemonic; multiprocessing cannot start processes there
+        class Context:
+            def Pool(self, **kwargs):
+                created['billiard'] = kwargs
+
+        monkeypatch.setattr('notifications.pdf._pool', None)
+        monkeypatch.setattr('notifications.pdf._in_daemon', lambda: True)
+        monkeypatch.setattr('billiard.get_context', lambda method: Context())
+        assert isinstance(pdf._get_pool(), pdf._BilliardPool)
+        assert created['billiard']['maxtasksperchild'] == 7
+
+
+@pytest.mark.django_db
+class TestScheduledEvents:
+
+    def setup_method(self):
+        tenant = Tenant.objects.create(
+            full_name="John Doe", nationality="Testland",
+            date_of_birth="1990-01-01", gender="male", phone_number="123456789",
+        )
+        room = Room.objects.create(
+            property=Property.objects.create(name="P1", address="Addr", property_type="apartment", total_rooms=1),
+            room_code="R101", room_number="101", monthly_rent=5000,
+        )
+        self.today = timezone.now().date()
+        self.booking = Booking.objects.create(
+            tenant=tenant, room=room, move_in_date=self.today, move_out_date=self.today + timedelta(days=60),
+            duration_months=2, monthly_rent=5000,
+        )
+
+    def events(self, **filters):
+        return set(ScheduledEvent.objects.filter(**filters).values_list('event_type', 'fire_date'))
+
+    def test_saving_a_contract_schedules_and_reschedules_its_reminders(self):
+        contract = Contract.objects.create(
+            booking=self.booking, start_date=self.today, end_date=self.today + timedelta(days=60), monthly_rent=5000,
+        )
+        assert not ScheduledEvent.objects.exists()  # drafts get no reminders
+
+        contract.status = 'signed'
+        contract.save()
+        end = contract.end_date
+        assert self.events(contract=contract) == {
+            ('contract_renewal', end - timedelta(days=21)),
+            ('contract_move_out', end - timedelta(days=21)),
+            ('contract_final_warning', end - timedelta(days=7)),
+        }
+
+        contract.end_date = end + timedelta(days=30)
+        contract.save()
+        assert self.events(contract=contract) == {
+            ('contract_renewal', end + timedelta(days=9)),
+            ('contract_move_out', end + timedelta(days=9)),
+            ('contract_final_warning', end + timedelta(days=23)),
+        }
+
+    def test_paying_drops_future_reminders(self):
+        payment = Payment.objects.create(
+            booking=self.booking, payment_type='rent', amount=5000, payment_method='bank_transfer',
+            payment_date=self.today, due_date=self.today + timedelta(days=10),
+        )
+        assert ('rent_due_soon', self.today + timedelta(days=7)) in self.events(payment=payment)
+        assert ScheduledEvent.objects.filter(payment=payment).count() == 6
+
+        payment.status = 'completed'
+        payment.save()
+        assert not ScheduledEvent.objects.filter(payment=payment).exists()
+
+    def test_missed_days_are_caught_up_once(self, mailoutbox):
+        # Due 8 days ago: the due-soon, day-1 and day-7 reminders were all missed
+        payment = Payment.objects.create(
+            booking=self.booking, payment_type='rent', amount=5000, payment_method='bank_transfer',
+            payment_date=self.today, due_date=self.today - timedelta(days=8),
+        )
+
+        assert tasks.send_rent_reminders() == 2
+        assert NotificationLog.objects.filter(related_payment=payment, status='pending').count() == 2
+        assert tasks.dispatch_notifications() == 2
+        assert len(mailoutbox) == 2  # one due-soon, one (the latest) overdue
+        fired = ScheduledEvent.objects.filter(payment=payment, fired_at__isnull=False)
+        assert set(fired.values_list('event_type', 'outcome')) == {
+            ('rent_due_soon', 'sent'), ('rent_overdue', 'sent'), ('rent_overdue', 'skipped'),
+        }
+
+        # Nothing left to send until day 14
+        assert tasks.send_rent_reminders() == 0
+        tasks.dispatch_notifications()
+        assert len(mailoutbox) == 2
+
+    def test_stale_events_are_skipped_and_failures_retried(self, monkeypatch):
+        contract = Contract.objects.create(
+            booking=self.booking, start_date=self.today, end_date=self.today + timedelta(days=10),
+            monthly_rent=5000, status='signed',
+        )
+        reminded = []
+        # No message built counts as a failed send
+        monkeypatch.setattr(EmailService, 'move_out_reminder_message', lambda contract: reminded.append(contract.pk))
+
+        # Renewed in bulk before the reminder fired
+        Contract.objects.filter(pk=contract.pk).update(renewal_status='sent')
+        assert tasks.send_contract_reminders() == 0
+        assert ScheduledEvent.objects.get(contract=contract, event_type='contract_renewal').outcome == 'skipped'
+
+        for attempt in range(3):
+            assert tasks.send_move_out_reminders() == 0
+        event = ScheduledEvent.objects.get(contract=contract, event_type='contract_move_out')
+        assert (event.attempts, event.outcome) == (3, 'failed')
+        assert len(reminded) == 3
+        tasks.send_move_out_reminders()
+        assert len(reminded) == 3
+
+    def test_contract_is_marked_reminded_only_once_delivered(self, mailoutbox, monkeypatch):
+        contract = Contract.objects.create(
+            booking=self.booking, start_date=self.today, end_date=self.today + timedelta(days=10),
+            monthly_rent=5000, status='signed',
+        )
+
+        # The mail server refuses the reminder until the outbox gives up on it
+        with monkeypatch.context() as refused:
+            refused.setattr(EmailService, 'send_batch', lambda messages, **kwargs: [False] * len(messages))
+            assert tasks.send_contract_reminders() == 1
+            for attempt in range(3):
+                NotificationLog.objects.update(scheduled_for=timezone.now())
+                tasks.dispatch_notifications()
+        contract.refresh_from_db()
+        assert contract.renewal_status == 'not_sent' and contract.renewal_sent_date is None
+        event = ScheduledEvent.objects.get(contract=contract, event_type='contract_renewal')
+        assert (event.fired_at, event.outcome, event.attempts) == (None, '', 1)
+
+        # Re-armed, so the next run queues it again
+        assert tasks.send_contract_reminders() == 1
+        tasks.dispatch_notifications()
+        assert len(mailoutbox) == 1
+        contract.refresh_from_db()
+        assert contract.renewal_status == 'sent' and contract.renewal_sent_date is not None
+        event.refresh_from_db()
+        assert (event.outcome, event.attempts) == ('sent', 2)
+
+
+class BrokenMessage(EmailMessage):
+
+    def message(self, *args, **kwargs):
+        raise ValueError("cannot serialise")
+
+
+class TestSendBatch:
+
+    def test_chunks_share_a_connection_and_report_each_message(self, mailoutbox, monkeypatch):
+        opened = []
+        real_get_connection = mail.get_connection
+
+        def get_connection(*args, **kwargs):
+            opened.append(1)
+            return real_get_connection(*args, **kwargs)
+
+        monkeypatch.setattr('notifications.services.get_connection', get_connection)
+        messages = [EmailMessage(subject=f"m{i}", to=["t@example.com"]) for i in range(5)]
+        messages[1] = BrokenMessage(subject="broken", to=["t@example.com"])
+        messages[3] = None
+
+        assert EmailService.send_batch(messages, batch_size=2) == [True, False, True, False, True]
+        assert [message.subject for message in mailoutbox] == ["m0", "m2", "m4"]
+        assert len(opened) == 2  # four messages to send, two per connection
+
+
+@pytest.mark.django_db
+class TestNotificationOutbox:
+
+    def setup_method(self):
+        self.messages = [
+            EmailMultiAlternatives(
+                subject=f"Notice {i}", body="Body", to=[f"t{i}@example.com"], reply_to=["a@example.com"],
+            )
+            for i in range(3)
+        ]
+        for message in self.messages:
+            message.attach_alternative("<p>Body</p>", "text/html")
+
+    def test_queued_emails_are_sent_by_the_dispatcher(self, mailoutbox):
+        legacy = NotificationLog.objects.create(
+            notification_type='rent_reminder', subject="Old", scheduled_for=timezone.now(),
+        )
+        enqueue(outbox_entry(message, 'rent_reminder') for message in self.messages)
+        assert not mailoutbox
+
+        assert tasks.dispatch_notifications() == 3
+        assert sorted(message.to[0] for message in mailoutbox) == ["t0@example.com", "t1@example.com", "t2@example.com"]
+        assert mailoutbox[0].alternatives[0][0] == "<p>Body</p>"
+        assert mailoutbox[0].reply_to == ["a@example.com"]
+        sent = NotificationLog.objects.filter(status='sent')
+        assert sent.count() == 3 and not sent.filter(sent_at__isnull=True).exists()
+        # Rows without a stored email are not outbox entries
+        legacy.refresh_from_db()
+        assert legacy.status == 'pending'
+
+    def test_claimed_rows_are_not_claimed_again_until_the_lease_expires(self):
+        enqueue(outbox_entry(message, 'rent_reminder') for message in self.messages)
+
+        assert len(NotificationLog.claim_outbox(limit=2)) == 2
+        assert len(NotificationLog.claim_outbox(limit=5)) == 1
+        assert NotificationLog.claim_outbox(limit=5) == []
+
+        NotificationLog.objects.update(claimed_until=timezone.now() - timedelta(seconds=1))
+        assert len(NotificationLog.claim_outbox(limit=5)) == 3
+
+    def test_failed_sends_are_retried_then_given_up(self, monkeypatch):
+        monkeypatch.setattr(EmailService, 'send_batch', lambda messages, **kwargs: [False] * len(messages))
+        log, = enqueue([outbox_entry(self.messages[0], 'rent_reminder')])
+
+        for attempt in range(3):
+            NotificationLog.objects.filter(pk=log.pk).update(scheduled_for=timezone.now())
+            tasks.dispatch_notifications()
+        log.refresh_from_db()
+        assert (log.status, log.attempts, log.claim_token) == ('failed', 3, '')
+
+    def test_token_bucket_spaces_out_sends(self):
+        now = [0.0]
+
+        def sleep(seconds):
+            now[0] += seconds
+
+        bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0], sleep=sleep)
+
+        for _ in range(6):
+            bucket.take()
+        assert now[0] == pytest.approx(2.0)  # two in the first burst, then one every half second
+
+
+@pytest.mark.django_db
+class TestMaintenanceTasks:
+
+    def setup_method(self):
+        user = User.objects.create_user(username="fixit", email="fixit@example.com", password="pass")
+        self.tenant = Tenant.objects.create(
+            user=user, full_name="John Doe", nationality="Testland",
+            date_of_birth="1990-01-01", gender="male", phone_number="123456789",
+        )
+        self.room = Room.objects.create(
+            property=Property.objects.create(name="P1", address="Addr", property_type="apartment", total_rooms=1),
+            room_code="R101", room_number="101", monthly_rent=5000,
+        )
+        self.staff = User.objects.create_user(username="staff", email="staff@example.com", password="pass")
+
+    def ticket(self, days_open, **kwargs):
+        ticket = MaintenanceTicket.objects.create(
+            tenant=self.tenant, room=self.room, title="Leaking tap", description="Drips", **kwargs,
+        )
+        MaintenanceTicket.objects.filter(pk=ticket.pk).update(reported_date=timezone.now() - timedelta(days=days_open))
+        return ticket
+
+    def test_tenant_updates_go_out_as_one_batch(self, mailoutbox, monkeypatch):
+        waiting = [self.ticket(3), self.ticket(5)]
+        self.ticket(0)
+        batches = []
+        send_batch = EmailService.send_batch
+        monkeypatch.setattr(EmailService, 'send_batch',
+                            staticmethod(lambda messages, **kwargs: batches.append(messages) or send_batch(messages)))
+
+        assert tasks.send_maintenance_updates_to_tenants() == 2
+
+        assert len(batches) == 1 and len(mailoutbox) == 2
+        notified = MaintenanceTicket.objects.filter(tenant_notified=True, last_tenant_update__isnull=False)
+        assert set(notified) == set(waiting)
+        assert MaintenanceUpdate.objects.filter(ticket__in=waiting, communicated_to_tenant=True).count() == 2
+        assert tasks.send_maintenance_updates_to_tenants() == 0
+
+    def test_overdue_tickets_alert_staff_and_management(self):
+        overdue = timezone.now().date() - timedelta(days=1)
+        self.ticket(10, assigned_staff=self.staff, estimated_completion_date=overdue)
+        self.ticket(3, estimated_completion_date=overdue)
+
+        assert tasks.check_maintenance_overdue() == 2
+
+        assert not NotificationLog.objects.filter(tenant__isnull=False).exists()
+        subjects = sorted(NotificationLog.objects.values_list('subject', flat=True))
+        assert len(subjects) == 2
+        assert subjects[0].startswith("OVERDUE 10 DAYS: Maintenance Ticket")
+        assert subjects[1].startswith("OVERDUE: Maintenance Ticket")
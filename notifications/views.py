@@ -2,6 +2,7 @@ from django.shortcuts import render
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.utils import timezone
 from datetime import datetime, timedelta
+from payments.late_fees import get_policy
 from .models import NotificationLog
 from .tasks import send_test_email
 
@@ -45,6 +46,7 @@ def notification_dashboard(request):
         'title': 'Notification System Dashboard',
         'recent_notifications': recent_notifications,
         'stats': stats,
+        'late_fee_policy': get_policy(),
         'today': today,
     }
     return render(request, 'notifications/dashboard.html', context)
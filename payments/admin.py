@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Payment, UtilityBill, ExpenseCategory, Expense
+from .models import Payment, UtilityBill, ExpenseCategory, Expense, Statement
 
 
 @admin.register(Payment)
@@ -9,6 +9,7 @@ class PaymentAdmin(admin.ModelAdmin):
     search_fields = ['receipt_number', 'booking__tenant__full_name', 'bank_reference']
     readonly_fields = ['receipt_number', 'created_at']
     list_editable = ['status']
+    raw_id_fields = ['late_fee_for']
 
     fieldsets = (
         ('Payment Information', {
@@ -25,7 +26,7 @@ class PaymentAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
         ('Late Fees', {
-            'fields': ('late_fee_days', 'late_fee_amount'),
+            'fields': ('late_fee_for', 'late_fee_days', 'late_fee_amount'),
             'classes': ('collapse',)
         })
     )
@@ -67,3 +68,11 @@ class ExpenseAdmin(admin.ModelAdmin):
     list_filter = ['category', 'payment_date', 'payment_method']
     search_fields = ['description', 'category__name']
     readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(Statement)
+class StatementAdmin(admin.ModelAdmin):
+    list_display = ['tenant', 'period_start', 'period_end', 'total_billed', 'total_paid', 'balance_due', 'generated_at']
+    list_filter = ['period_end']
+    search_fields = ['tenant__full_name']
+    raw_id_fields = ['tenant']
@@ -0,0 +1,148 @@
+"""Late fee policy and nightly accrual.
+
+Every overdue rent payment carries at most one ``late_fee`` Payment, linked
+through ``Payment.late_fee_for``. ``accrue_late_fees`` inserts the missing
+ones and then recomputes all open fees with a single UPDATE, with the days
+overdue worked out by the database from the rent's due date. Re-running it
+on the same day changes nothing.
+
+The rate, grace period and cap come from ``settings.LATE_FEE_*``; use
+``get_policy()`` wherever a late fee is shown or charged.
+"""
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import (
+    DateField, DecimalField, ExpressionWrapper, Func, IntegerField, OuterRef, Subquery, Value,
+)
+from django.db.models.functions import Greatest, Least
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+FEE_FIELD = DecimalField(max_digits=10, decimal_places=2)
+
+
+class DaysBetween(Func):
+    """Whole days from the second date to the first (``end - start``)"""
+    arity = 2
+    output_field = IntegerField()
+    template = '(%(expressions)s)'
+    arg_joiner = ' - '
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template='CAST(julianday(%(expressions)s) AS INTEGER)', arg_joiner=') - julianday(',
+            **extra_context,
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template='DATEDIFF(%(expressions)s)', arg_joiner=', ',
+                           **extra_context)
+
+
+@dataclass(frozen=True)
+class LateFeePolicy:
+    daily_amount: Decimal
+    grace_days: int = 0
+    max_amount: Decimal = None
+
+    def days_overdue(self, due_date, today=None):
+        """Days past ``due_date`` (0 when not yet due)"""
+        if not due_date:
+            return 0
+        today = today or timezone.now().date()
+        return max(0, (today - due_date).days)
+
+    def chargeable_days(self, days_overdue):
+        return max(0, days_overdue - self.grace_days)
+
+    def fee_for(self, days_overdue):
+        """Late fee owed after ``days_overdue`` days"""
+        fee = self.daily_amount * self.chargeable_days(days_overdue)
+        if self.max_amount is not None:
+            fee = min(fee, self.max_amount)
+        return fee
+
+    def fee_expression(self, days_overdue):
+        """``fee_for`` as a database expression over an integer expression"""
+        chargeable = Greatest(days_overdue - Value(self.grace_days), Value(0))
+        fee = ExpressionWrapper(chargeable * Value(self.daily_amount, output_field=FEE_FIELD), output_field=FEE_FIELD)
+        if self.max_amount is not None:
+            fee = Least(fee, Value(self.max_amount, output_field=FEE_FIELD), output_field=FEE_FIELD)
+        return fee
+
+
+def get_policy():
+    """The configured late fee policy"""
+    max_amount = getattr(settings, 'LATE_FEE_MAX_AMOUNT', 0)
+    return LateFeePolicy(
+        daily_amount=Decimal(getattr(settings, 'LATE_FEE_DAILY_AMOUNT', 100)),
+        grace_days=getattr(settings, 'LATE_FEE_GRACE_DAYS', 0),
+        max_amount=Decimal(max_amount) if max_amount else None,
+    )
+
+
+def late_fee_receipt_number(rent_payment):
+    return f"LATE-{rent_payment.pk}"
+
+
+def accrue_late_fees(today=None, policy=None):
+    """Open late fees for newly overdue rent and bring every open fee up to ``today``.
+
+    Returns ``(created_ids, updated_count)``; callers invoice the new fees.
+    """
+    from .models import Payment
+
+    today = today or timezone.now().date()
+    policy = policy or get_policy()
+
+    # Rent starts accruing once it is past due by more than the grace period
+    newly_overdue = Payment.objects.filter(
+        payment_type='rent',
+        status='pending',
+        due_date__lt=today - timedelta(days=policy.grace_days),
+        late_fee__isnull=True,
+    ).only('pk', 'booking_id')
+
+    new_fees = [
+        Payment(
+            booking_id=rent_payment.booking_id,
+            late_fee_for=rent_payment,
+            payment_type='late_fee',
+            amount=0,
+            payment_date=today,
+            due_date=today,
+            status='pending',
+            receipt_number=late_fee_receipt_number(rent_payment),
+        )
+        for rent_payment in newly_overdue
+    ]
+
+    created_ids = []
+    if new_fees:
+        try:
+            with transaction.atomic():
+                Payment.objects.bulk_create(new_fees, batch_size=500)
+        except IntegrityError as e:
+            # Another run opened (some of) these fees first; the UPDATE below still covers them
+            logger.error(f"Late fee creation raced with another run: {e}")
+        else:
+            created_ids = [fee.pk for fee in new_fees]
+
+    rent_due_date = Payment.objects.filter(pk=OuterRef('late_fee_for')).values('due_date')[:1]
+    days_overdue = DaysBetween(Value(today, output_field=DateField()), Subquery(rent_due_date))
+    fee = policy.fee_expression(days_overdue)
+    updated = Payment.objects.filter(
+        payment_type='late_fee',
+        status='pending',
+        late_fee_for__status='pending',
+    ).update(late_fee_days=days_overdue, late_fee_amount=fee, amount=fee)
+
+    logger.info(f"Late fee accrual: {len(created_ids)} opened, {updated} updated")
+    return created_ids, updated
@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from payments.models import Payment
+
+
+def parse_month(value):
+    try:
+        return datetime.strptime(value.strip(), '%Y-%m').date()
+    except ValueError:
+        raise CommandError(f"Invalid month '{value}', expected YYYY-MM")
+
+
+def next_month(month):
+    return (month + timedelta(days=32)).replace(day=1)
+
+
+class Command(BaseCommand):
+    help = "Create pending rent payments for every active/confirmed booking (next month by default)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--month',
+            type=str,
+            help='Month to invoice as YYYY-MM, or a backfill range YYYY-MM:YYYY-MM',
+        )
+
+    def handle(self, *args, **options):
+        if options['month']:
+            first, _, last = options['month'].partition(':')
+            start = parse_month(first)
+            end = parse_month(last) if last else start
+        else:
+            start = end = next_month(timezone.now().date().replace(day=1))
+
+        if end < start:
+            raise CommandError("The range ends before it starts")
+
+        total = 0
+        month = start
+        while month <= end:
+            created = Payment.generate_rent_invoices(month)
+            total += len(created)
+            self.stdout.write(f"{month:%Y-%m}: {len(created)} rent payments created")
+            month = next_month(month)
+
+        self.stdout.write(self.style.SUCCESS(f"Created {total} rent payments."))
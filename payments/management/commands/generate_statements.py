@@ -0,0 +1,51 @@
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from payments.statements import BATCH_SIZE, generate_statements
+
+
+class Command(BaseCommand):
+    help = "Render statement-of-account PDFs for every tenant (last month by default)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--month',
+            type=str,
+            help='Statement month as YYYY-MM',
+        )
+        parser.add_argument(
+            '--tenant',
+            type=int,
+            action='append',
+            dest='tenant_ids',
+            help='Only this tenant id (repeatable)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Statements rendered per batch',
+        )
+
+    def handle(self, *args, **options):
+        if options['month']:
+            try:
+                period_start = datetime.strptime(options['month'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError(f"Invalid month '{options['month']}', expected YYYY-MM")
+        else:
+            period_start = (timezone.now().date().replace(day=1) - timedelta(days=1)).replace(day=1)
+        period_end = (period_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+
+        started = time.monotonic()
+        generated, failed = generate_statements(
+            period_start, period_end, tenant_ids=options['tenant_ids'], batch_size=options['batch_size'],
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {generated} statements for {period_start:%Y-%m} in {time.monotonic() - started:.1f}s "
+            f"({failed} failed)"
+        ))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from notifications.tasks import compute_proof_hash
+from payments.models import Payment
+from payments.proof_hash import needs_proof_hash
+
+
+class Command(BaseCommand):
+    help = 'Backfill perceptual hashes of payment proofs for duplicate detection'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Rehash proofs even if their hash is up to date',
+        )
+        parser.add_argument(
+            '--async',
+            action='store_true',
+            dest='run_async',
+            help='Queue Celery tasks instead of hashing in this process',
+        )
+
+    def handle(self, *args, **options):
+        processed = 0
+        failed = 0
+        payments = Payment.objects.exclude(proof_of_payment='').exclude(proof_of_payment__isnull=True)
+        for payment in payments.only('pk', 'proof_of_payment', 'proof_hash_source').iterator():
+            if not options['force'] and not needs_proof_hash(payment):
+                continue
+
+            if options['run_async']:
+                compute_proof_hash.delay(payment.pk)
+            elif not compute_proof_hash(payment.pk):
+                failed += 1
+                self.stdout.write(self.style.WARNING(f'Failed: {payment.proof_of_payment.name}'))
+                continue
+            processed += 1
+
+        action = 'Queued' if options['run_async'] else 'Hashed'
+        self.stdout.write(self.style.SUCCESS(f'{action} {processed} payment proofs ({failed} failed)'))
@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from payments import reconciliation
+
+
+class Command(BaseCommand):
+    help = 'Match a bank CSV statement against pending payments and mark the matches completed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', type=str, help='Path to the bank statement CSV')
+        parser.add_argument(
+            '--window-days',
+            type=int,
+            default=7,
+            help='How far a transfer date may be from the due date',
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=reconciliation.AUTO_MATCH_THRESHOLD,
+            help='Minimum confidence score for an automatic match',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report the matches',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            with open(options['csv_path'], encoding='utf-8-sig', newline='') as statement:
+                result = reconciliation.reconcile_statement(
+                    statement,
+                    window_days=options['window_days'],
+                    threshold=options['threshold'],
+                    dry_run=options['dry_run'],
+                )
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not reconcile statement: {e}")
+
+        for match in result.suggestions:
+            self.stdout.write(
+                f"Line {match.line.line_number}: HK${match.line.amount} '{match.line.reference}' "
+                f"-> payment {match.payment_id}? (score {match.score}, {', '.join(match.reasons)})"
+            )
+
+        prefix = '[dry run] ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{result.lines_read} lines read in {time.monotonic() - started:.1f}s: "
+            f"{len(result.matches)} matched ({result.completed} payments completed), "
+            f"{len(result.suggestions)} to review, {len(result.unmatched)} unmatched, {result.skipped} skipped."
+        ))
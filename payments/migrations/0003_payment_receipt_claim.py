@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0002_payment_is_deposit_payment_is_key_deposit_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='receipt_claim_token',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='receipt_claimed_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
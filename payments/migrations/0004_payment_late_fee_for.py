@@ -0,0 +1,50 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:13
+
+import django.db.models.deletion
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def consolidate_daily_late_fees(apps, schema_editor):
+    """Fold the old one-row-per-day late fees into one fee linked to its rent"""
+    Payment = apps.get_model('payments', 'Payment')
+
+    latest_fee = {}
+    duplicates = []
+    old_fees = Payment.objects.filter(
+        payment_type='late_fee', status='pending', late_fee_for__isnull=True
+    ).order_by('payment_date', 'pk')
+    for fee in old_fees:
+        rent = Payment.objects.filter(
+            booking_id=fee.booking_id,
+            payment_type='rent',
+            due_date=fee.payment_date - timedelta(days=fee.late_fee_days),
+        ).first()
+        if rent is None:
+            continue
+        if rent.pk in latest_fee:
+            duplicates.append(latest_fee[rent.pk].pk)
+        latest_fee[rent.pk] = fee
+
+    # Each daily row held the cumulative fee, so only the latest one is owed
+    Payment.objects.filter(pk__in=duplicates).delete()
+    for rent_id, fee in latest_fee.items():
+        fee.late_fee_for_id = rent_id
+        fee.save(update_fields=['late_fee_for'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0003_payment_receipt_claim'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='late_fee_for',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='late_fee', to='payments.payment'),
+        ),
+        migrations.RunPython(consolidate_daily_late_fees, migrations.RunPython.noop),
+    ]
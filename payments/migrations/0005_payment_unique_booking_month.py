@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_booking_hkid_number_booking_key_deposit_and_more'),
+        ('payments', '0004_payment_late_fee_for'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='payment',
+            constraint=models.UniqueConstraint(fields=('booking', 'rent_month', 'payment_type'), name='unique_payment_per_booking_month'),
+        ),
+    ]
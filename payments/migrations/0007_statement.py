@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0006_payment_proof_hash'),
+        ('tenants', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Statement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateField()),
+                ('period_end', models.DateField()),
+                ('brought_forward', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_billed', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_paid', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('balance_due', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('pdf', models.FileField(blank=True, null=True, upload_to='statements/')),
+                ('generated_at', models.DateTimeField(auto_now=True)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='statements', to='tenants.tenant')),
+            ],
+            options={
+                'ordering': ['-period_end', 'tenant'],
+                'constraints': [models.UniqueConstraint(fields=('tenant', 'period_start', 'period_end'), name='unique_statement_per_period')],
+            },
+        ),
+    ]
@@ -1,8 +1,14 @@
+import calendar
 import logging
 from datetime import timedelta
-from django.db import models
+from decimal import Decimal
+from django.db import connection, models, transaction
+from django.db.models import Q
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from django.utils import timezone
 from bookings.models import Booking
+from .proof_hash import needs_proof_hash, queue_proof_hash
 import uuid
 
 
@@ -52,6 +58,10 @@ class Payment(models.Model):
     # Reference & Proof
     bank_reference = models.CharField(max_length=200, blank=True)
     proof_of_payment = models.FileField(upload_to='payment_proofs/', null=True, blank=True)
+    # Perceptual hash of the proof image for near-duplicate detection (see payments.proof_hash)
+    proof_hash = models.CharField(max_length=16, blank=True, editable=False)
+    proof_hash_source = models.CharField(max_length=255, blank=True, editable=False)
+    proof_hashed_at = models.DateTimeField(null=True, blank=True, editable=False, db_index=True)
 
     # For rent payments
     rent_month = models.DateField(null=True, blank=True)  # Which month's rent
@@ -60,10 +70,21 @@ class Payment(models.Model):
     # Late fee tracking
     late_fee_days = models.IntegerField(default=0)
     late_fee_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    # Set on late_fee payments: the overdue rent this fee accrues against (see payments.late_fees)
+    late_fee_for = models.OneToOneField(
+        'self',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='late_fee'
+    )
 
     receipt_generated = models.BooleanField(default=False)
     receipt_generated_date = models.DateTimeField(null=True, blank=True)
     receipt_pdf = models.FileField(upload_to='receipts/', null=True, blank=True)
+    # Lease held by the worker producing the receipt (see claim_receipts)
+    receipt_claimed_until = models.DateTimeField(null=True, blank=True)
+    receipt_claim_token = models.CharField(max_length=32, blank=True)
 
     proof_verified = models.BooleanField(default=False)
     proof_verified_by = models.ForeignKey(
@@ -96,11 +117,74 @@ class Payment(models.Model):
     receipt_notes = models.TextField(blank=True)
     is_non_refundable = models.BooleanField(default=False)
 
+    # Receipt bookkeeping that does not change the rendered document (see notifications.pdf)
+    pdf_cache_ignore_fields = (
+        'receipt_generated', 'receipt_generated_date', 'receipt_claimed_until', 'receipt_claim_token',
+        'proof_hash', 'proof_hash_source', 'proof_hashed_at',
+    )
+
+    # How long a worker may hold a receipt claim before another one can take it over
+    RECEIPT_LEASE = timedelta(minutes=15)
+
+    @staticmethod
+    def receipt_claimable_q(now):
+        """Completed payments without a receipt whose claim is free or has expired"""
+        return Q(status='completed', receipt_generated=False) & (
+            Q(receipt_claimed_until__isnull=True) | Q(receipt_claimed_until__lt=now)
+        )
+
+    @classmethod
+    def claim_receipts(cls, queryset=None, limit=50):
+        """Lease up to ``limit`` payments needing a receipt to the calling worker.
+
+        Rows are picked with SELECT ... FOR UPDATE SKIP LOCKED where the
+        database supports it; the lease itself is taken with a conditional
+        UPDATE, so on SQLite two workers racing for the same row cannot both
+        win. Returns the claimed payments.
+        """
+        now = timezone.now()
+        token = uuid.uuid4().hex
+        candidates = (queryset if queryset is not None else cls.objects.all()).filter(cls.receipt_claimable_q(now))
+
+        with transaction.atomic():
+            if connection.features.has_select_for_update_skip_locked:
+                candidates = candidates.select_for_update(skip_locked=True)
+            ids = list(candidates.order_by('pk').values_list('pk', flat=True)[:limit])
+            cls.objects.filter(cls.receipt_claimable_q(now), pk__in=ids).update(
+                receipt_claimed_until=now + cls.RECEIPT_LEASE,
+                receipt_claim_token=token,
+            )
+
+        return list(
+            cls.objects.filter(receipt_claim_token=token, receipt_generated=False)
+            .select_related('booking__tenant', 'booking__room')
+            .order_by('pk')
+        )
+
+    def claim_receipt(self):
+        """Lease this payment's receipt; False if another worker holds it or it is done"""
+        now = timezone.now()
+        token = uuid.uuid4().hex
+        claimed = Payment.objects.filter(Payment.receipt_claimable_q(now), pk=self.pk).update(
+            receipt_claimed_until=now + self.RECEIPT_LEASE,
+            receipt_claim_token=token,
+        )
+        if claimed:
+            self.receipt_claimed_until = now + self.RECEIPT_LEASE
+            self.receipt_claim_token = token
+        return bool(claimed)
+
+    def release_receipt_claim(self):
+        """Give the claim back after a failure so the next run can retry"""
+        Payment.objects.filter(pk=self.pk, receipt_claim_token=self.receipt_claim_token).update(
+            receipt_claimed_until=None, receipt_claim_token='',
+        )
+        self.receipt_claimed_until = None
+        self.receipt_claim_token = ''
+
     def generate_detailed_receipt(self):
         """Generate receipt with all required details"""
-        from weasyprint import HTML
-        from django.template.loader import render_to_string
-        from django.core.files.base import ContentFile
+        from notifications.pdf import PDFService
 
         context = {
             'payment': self,
@@ -113,19 +197,23 @@ class Payment(models.Model):
         }
 
         template_name = 'payments/deposit_receipt.html' if self.is_deposit else 'payments/payment_receipt.html'
-        html_string = render_to_string(template_name, context)
-        pdf_file = HTML(string=html_string).write_pdf()
-
-        filename = f"receipt_{self.receipt_number}_{timezone.now().strftime('%Y%m%d')}.pdf"
-        self.receipt_pdf.save(filename, ContentFile(pdf_file), save=False)
-        self.receipt_generated = True
-        self.receipt_generated_date = timezone.now()
-        self.save()
+        self.save_receipt_pdf(PDFService.render(template_name, context))
 
         return True
 
     class Meta:
         ordering = ['-payment_date']
+        constraints = [
+            # One rent (or other monthly) charge per booking and month; rows without a rent_month are unaffected
+            models.UniqueConstraint(
+                fields=['booking', 'rent_month', 'payment_type'],
+                name='unique_payment_per_booking_month',
+            ),
+        ]
+        indexes = [
+            # Reminder / overdue / late fee sweeps: type + status equality, then a due_date range
+            models.Index(fields=['payment_type', 'status', 'due_date'], name='payment_type_status_due_idx'),
+        ]
 
     def __str__(self):
         return f"Receipt {self.receipt_number} - {self.amount} - {self.get_payment_type_display()}"
@@ -135,31 +223,112 @@ class Payment(models.Model):
             self.receipt_number = f"RCPT-{uuid.uuid4().hex[:8].upper()}"
         super().save(*args, **kwargs)
 
+    @staticmethod
+    def rent_due_date(booking, rent_month):
+        """Rent falls due on the move-in day of each month (or the month's last day)"""
+        last_day = calendar.monthrange(rent_month.year, rent_month.month)[1]
+        return rent_month.replace(day=min(booking.move_in_date.day, last_day))
+
+    @classmethod
+    def generate_rent_invoices(cls, rent_month):
+        """Create the pending rent payment of ``rent_month`` for every active/confirmed booking.
+
+        Bookings still owing an invoice for the month are found in one query
+        and the payments are written with one bulk_create. Safe to re-run:
+        bookings already invoiced are skipped and the unique
+        (booking, rent_month, payment_type) constraint drops any row created
+        concurrently. Returns the payments that were built.
+        """
+        from notifications.schedule import schedule_payment_events
+
+        rent_month = rent_month.replace(day=1)
+        month_end = rent_month.replace(day=calendar.monthrange(rent_month.year, rent_month.month)[1])
+
+        bookings = Booking.objects.filter(
+            status__in=['active', 'confirmed'],
+            move_in_date__lte=month_end,
+            move_out_date__gt=rent_month,
+        ).exclude(
+            pk__in=cls.objects.filter(payment_type='rent', rent_month=rent_month).values('booking_id')
+        ).only('pk', 'move_in_date', 'move_out_date', 'monthly_rent')
+
+        new_payments = []
+        for booking in bookings:
+            due_date = cls.rent_due_date(booking, rent_month)
+            # No new month is owed if the tenant leaves before its due date
+            if not booking.move_in_date <= due_date < booking.move_out_date:
+                continue
+            new_payments.append(cls(
+                booking=booking,
+                payment_type='rent',
+                amount=booking.monthly_rent,
+                payment_method='bank_transfer',
+                payment_date=due_date,
+                due_date=due_date,
+                rent_month=rent_month,
+                status='pending',
+                receipt_number=f"RENT-{booking.pk}-{rent_month:%Y%m}",
+            ))
+
+        cls.objects.bulk_create(new_payments, batch_size=500, ignore_conflicts=True)
+        if new_payments:
+            # bulk_create skips post_save (and leaves pks unset with ignore_conflicts), so schedule reminders here
+            schedule_payment_events(cls.objects.filter(
+                payment_type='rent', rent_month=rent_month,
+                receipt_number__in=[payment.receipt_number for payment in new_payments],
+            ))
+        logger.info(f"Generated {len(new_payments)} rent invoices for {rent_month:%Y-%m}")
+        return new_payments
+
     # ADD THESE METHODS:
-    def generate_receipt_pdf(self):
-        """Generate PDF receipt for payment"""
-        try:
-            from weasyprint import HTML
-            from django.template.loader import render_to_string
-            from django.core.files.base import ContentFile
+    def receipt_pdf_job(self):
+        """(template, context) of the receipt PDF, e.g. for PDFService.render_many"""
+        context = {
+            'payment': self,
+            'tenant': self.booking.tenant,
+            'room': self.booking.room,
+            'today': timezone.now().date(),
+        }
+        return 'payments/receipt_pdf.html', context
+
+    def save_receipt_pdf(self, pdf_file):
+        """Store rendered receipt PDF bytes and mark the receipt as generated.
+
+        A caller holding a receipt claim only writes while the claim is still
+        its own; if its lease expired and another worker took the payment over,
+        the file is discarded and False is returned.
+        """
+        from django.core.files.base import ContentFile
+
+        filename = f"receipt_{self.receipt_number}_{timezone.now().strftime('%Y%m%d')}.pdf"
+        self.receipt_pdf.save(filename, ContentFile(pdf_file), save=False)
 
-            context = {
-                'payment': self,
-                'tenant': self.booking.tenant,
-                'room': self.booking.room,
-                'today': timezone.now().date(),
-            }
+        now = timezone.now()
+        target = Payment.objects.filter(pk=self.pk)
+        if self.receipt_claim_token:
+            target = target.filter(receipt_claim_token=self.receipt_claim_token, receipt_generated=False)
+        if not target.update(
+            receipt_pdf=self.receipt_pdf.name, receipt_generated=True, receipt_generated_date=now,
+            receipt_claimed_until=None, receipt_claim_token='',
+        ):
+            logger.warning(f"Receipt claim on payment {self.pk} was lost; discarding the rendered receipt")
+            self.receipt_pdf.delete(save=False)
+            return False
 
-            html_string = render_to_string('payments/receipt_pdf.html', context)
-            pdf_file = HTML(string=html_string).write_pdf()
+        self.receipt_generated = True
+        self.receipt_generated_date = now
+        self.receipt_claimed_until = None
+        self.receipt_claim_token = ''
+        return True
 
-            # Save PDF file
-            filename = f"receipt_{self.receipt_number}_{timezone.now().strftime('%Y%m%d')}.pdf"
-            self.receipt_pdf.save(filename, ContentFile(pdf_file), save=False)
+    def generate_receipt_pdf(self):
+        """Generate PDF receipt for payment"""
+        try:
+            from notifications.pdf import PDFService
 
-            self.receipt_generated = True
-            self.receipt_generated_date = timezone.now()
-            self.save()
+            template_name, context = self.receipt_pdf_job()
+            if not self.save_receipt_pdf(PDFService.render(template_name, context)):
+                return False
 
             logger.info(f"Receipt generated for payment {self.receipt_number}")
             return True
@@ -202,9 +371,12 @@ class Payment(models.Model):
             from notifications.services import EmailService
             EmailService.send_booking_confirmation(self.booking)
 
-        # Generate receipt automatically
-        self.generate_receipt_pdf()
-        self.send_receipt_email()
+        # Generate receipt automatically, unless a receipt worker already picked it up
+        if self.claim_receipt():
+            if self.generate_receipt_pdf():
+                self.send_receipt_email()
+            else:
+                self.release_receipt_claim()
 
         logger.info(f"Payment proof verified for {self.receipt_number} by {verified_by.username}")
         return True
@@ -250,6 +422,13 @@ class Payment(models.Model):
                 self.proof_status == 'pending_review')
 
 
+@receiver(post_save, sender=Payment)
+def queue_proof_hash_on_upload(sender, instance, **kwargs):
+    """Hash newly uploaded payment proofs in the background"""
+    if needs_proof_hash(instance):
+        queue_proof_hash(instance)
+
+
 class UtilityBill(models.Model):
     property_obj = models.ForeignKey('properties.Property', on_delete=models.CASCADE)
     bill_type = models.CharField(max_length=20, choices=[
@@ -275,17 +454,28 @@ class UtilityBill(models.Model):
     def __str__(self):
         return f"{self.get_bill_type_display()} - {self.property_obj.name} - {self.bill_date}"
 
-    def calculate_pro_rata_shares(self):
-        """Calculate pro-rata shares for all active tenants during bill period"""
+    def calculate_pro_rata_shares(self, bookings=None):
+        """Calculate pro-rata shares for all active tenants during bill period
+
+        ``bookings`` may be a preloaded list of active bookings (e.g. for all
+        properties in a batch); only those overlapping this bill are used.
+        """
         from bookings.models import Booking
-        from django.db.models import Q
 
-        active_bookings = Booking.objects.filter(
-            room__property=self.property_obj,
-            status='active',
-            move_in_date__lte=self.due_date,
-            move_out_date__gte=self.bill_date
-        ).select_related('tenant', 'room')
+        if bookings is None:
+            bookings = Booking.objects.filter(
+                room__property=self.property_obj,
+                status='active',
+                move_in_date__lte=self.due_date,
+                move_out_date__gte=self.bill_date
+            ).select_related('tenant', 'room')
+
+        active_bookings = [
+            booking for booking in bookings
+            if booking.room.property_id == self.property_obj_id
+            and booking.move_in_date <= self.due_date
+            and booking.move_out_date >= self.bill_date
+        ]
 
         total_share_days = 0
         tenant_shares = []
@@ -314,40 +504,80 @@ class UtilityBill(models.Model):
 
         return tenant_shares, total_share_days
 
+    def utility_receipt_number(self, booking):
+        return f"UTIL-{self.id}-{booking.id}"
+
     def create_utility_payments(self):
         """Create utility payment records for all tenants"""
-        tenant_shares, total_days = self.calculate_pro_rata_shares()
-
-        created_payments = []
-        for share in tenant_shares:
-            # Check if payment already exists
-            existing_payment = Payment.objects.filter(
-                booking=share['booking'],
-                payment_type='utility',
-                payment_date=self.due_date,
-                amount=share['share_amount']
-            ).exists()
-
-            if not existing_payment and share['share_amount'] > 0:
-                payment = Payment.objects.create(
+        return UtilityBill.allocate_bills([self]).get(self.pk, [])
+
+    @classmethod
+    def allocate_bills(cls, bills):
+        """Create tenants' utility payments for many bills at once.
+
+        Active bookings for every bill's property are loaded in one query,
+        already-allocated shares are found in one query (by their
+        UTIL-<bill>-<booking> receipt number), and the new payments and bill
+        flags are written with bulk_create / bulk_update in one transaction.
+        Returns {bill id: [created payments]} for bills that got payments.
+        """
+        from bookings.models import Booking
+
+        bills = list(bills)
+        if not bills:
+            return {}
+
+        bookings = list(Booking.objects.filter(
+            room__property_id__in={bill.property_obj_id for bill in bills},
+            status='active',
+            move_in_date__lte=max(bill.due_date for bill in bills),
+            move_out_date__gte=min(bill.bill_date for bill in bills),
+        ).select_related('tenant', 'room'))
+
+        shares_by_bill = {bill.pk: bill.calculate_pro_rata_shares(bookings)[0] for bill in bills}
+        receipt_numbers = [
+            bill.utility_receipt_number(share['booking'])
+            for bill in bills for share in shares_by_bill[bill.pk]
+        ]
+        existing = set(
+            Payment.objects.filter(receipt_number__in=receipt_numbers).values_list('receipt_number', flat=True)
+        )
+
+        new_payments = []
+        payments_by_bill = {}
+        for bill in bills:
+            for share in shares_by_bill[bill.pk]:
+                amount = Decimal(share['share_amount']).quantize(Decimal('0.01'))
+                receipt_number = bill.utility_receipt_number(share['booking'])
+                if receipt_number in existing or amount <= 0:
+                    continue
+                payment = Payment(
                     booking=share['booking'],
                     payment_type='utility',
-                    amount=share['share_amount'],
-                    payment_date=self.due_date,
-                    due_date=self.due_date + timedelta(days=14),  # 14 days to pay
+                    amount=amount,
+                    payment_date=bill.due_date,
+                    due_date=bill.due_date + timedelta(days=14),  # 14 days to pay
                     status='pending',
-                    receipt_number=f"UTIL-{self.id}-{share['booking'].id}"
+                    receipt_number=receipt_number
                 )
-                created_payments.append(payment)
+                new_payments.append(payment)
+                payments_by_bill.setdefault(bill.pk, []).append(payment)
 
         # Update bill allocation status
-        if created_payments:
-            self.is_allocated = True
-            self.allocation_date = timezone.now()
-            self.total_allocated_amount = sum(p.amount for p in created_payments)
-            self.save()
+        now = timezone.now()
+        allocated_bills = [bill for bill in bills if bill.pk in payments_by_bill]
+        for bill in allocated_bills:
+            bill.is_allocated = True
+            bill.allocation_date = now
+            bill.total_allocated_amount = sum(p.amount for p in payments_by_bill[bill.pk])
 
-        return created_payments
+        with transaction.atomic():
+            Payment.objects.bulk_create(new_payments, batch_size=500)
+            cls.objects.bulk_update(
+                allocated_bills, ['is_allocated', 'allocation_date', 'total_allocated_amount'], batch_size=500
+            )
+
+        return payments_by_bill
 
     @property
     def allocated_percentage(self):
@@ -396,3 +626,27 @@ class Expense(models.Model):
 
     class Meta:
         ordering = ['-payment_date']
+
+
+class Statement(models.Model):
+    """Statement of account PDF for one tenant and period (see payments.statements)"""
+    tenant = models.ForeignKey('tenants.Tenant', on_delete=models.CASCADE, related_name='statements')
+    period_start = models.DateField()
+    period_end = models.DateField()
+
+    brought_forward = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_billed = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_paid = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    balance_due = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    pdf = models.FileField(upload_to='statements/', null=True, blank=True)
+    generated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Statement {self.tenant.full_name} {self.period_start} - {self.period_end}"
+
+    class Meta:
+        ordering = ['-period_end', 'tenant']
+        constraints = [
+            models.UniqueConstraint(fields=['tenant', 'period_start', 'period_end'], name='unique_statement_per_period'),
+        ]
@@ -0,0 +1,349 @@
+"""Bank statement reconciliation.
+
+A CSV statement is read one line at a time and every credit is matched
+against pending payments through in-memory indexes built from a single
+``values()`` scan:
+
+* amount (in cents) -> payments sorted by due date, searched with ``bisect``
+  inside a +/- ``window_days`` date window;
+* reference keys (receipt number, bank reference) -> payments;
+* room codes -> payments;
+* tenant name words -> payments (very common words are only used for
+  scoring, not to find candidates).
+
+Each candidate gets a confidence score between 0 and 1. A line is matched
+automatically when its best candidate scores at least ``threshold`` and is
+clearly ahead of the runner-up; weaker candidates are returned as
+suggestions for staff to review. ``apply_matches`` marks the matched
+payments completed in bulk.
+"""
+import csv
+import logging
+import re
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, time
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DATE_COLUMNS = ('date', 'transaction date', 'value date', 'posting date', 'txn date')
+AMOUNT_COLUMNS = ('amount', 'credit', 'credit amount', 'deposit', 'deposits', 'paid in')
+TEXT_COLUMNS = ('reference', 'ref', 'description', 'details', 'narrative', 'particulars', 'payer', 'remarks')
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%Y/%m/%d', '%d %b %Y', '%d-%b-%Y')
+
+# Score contributions; the total is capped at 1
+AMOUNT_WEIGHT = 0.4
+DATE_WEIGHT = 0.1
+REFERENCE_WEIGHT = 0.4
+ROOM_WEIGHT = 0.15
+NAME_WEIGHT = 0.25
+
+AUTO_MATCH_THRESHOLD = 0.75
+# The best candidate must beat the runner-up by this much to be auto-matched
+AMBIGUITY_MARGIN = 0.1
+# Name words shared by more payments than this (e.g. "CHAN") do not nominate candidates
+MAX_NAME_POSTINGS = 200
+# Same-amount payments in the date window beyond this are not scored one by one
+MAX_AMOUNT_CANDIDATES = 20
+# Longest run of statement tokens joined back together when looking up references
+MAX_REFERENCE_PARTS = 5
+
+TOKEN = re.compile(r'[A-Z0-9]+')
+
+
+def _tokens(text):
+    return TOKEN.findall((text or '').upper())
+
+
+def _compact(text):
+    return ''.join(_tokens(text))
+
+
+def _cents(amount):
+    return int((amount * 100).to_integral_value())
+
+
+@dataclass
+class StatementLine:
+    line_number: int
+    date: object
+    amount: Decimal
+    reference: str
+
+    @property
+    def tokens(self):
+        return _tokens(self.reference)
+
+
+@dataclass
+class Match:
+    line: StatementLine
+    payment_id: int
+    score: float
+    reasons: list = field(default_factory=list)
+
+
+@dataclass
+class ReconciliationResult:
+    matches: list = field(default_factory=list)
+    suggestions: list = field(default_factory=list)
+    unmatched: list = field(default_factory=list)
+    skipped: int = 0
+    completed: int = 0
+
+    @property
+    def lines_read(self):
+        return len(self.matches) + len(self.suggestions) + len(self.unmatched) + self.skipped
+
+
+def _parse_date(value):
+    value = (value or '').strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_amount(value):
+    value = re.sub(r'[^0-9.\-()]', '', value or '')
+    negative = value.startswith('(') and value.endswith(')')
+    try:
+        amount = Decimal(value.strip('()'))
+    except InvalidOperation:
+        return None
+    return -amount if negative else amount
+
+
+def _find_column(header, names):
+    for name in names:
+        if name in header:
+            return header.index(name)
+    return None
+
+
+class StatementReader:
+    """Iterate over the credit lines of a bank CSV statement (any iterable of text lines).
+
+    The header row is matched case-insensitively against common column
+    names; debits and unreadable rows are counted in ``skipped``.
+    """
+
+    def __init__(self, lines):
+        self.reader = csv.reader(lines)
+        header = [column.strip().lower() for column in next(self.reader, [])]
+        self.date_column = _find_column(header, DATE_COLUMNS)
+        self.amount_column = _find_column(header, AMOUNT_COLUMNS)
+        self.text_columns = [index for index, name in enumerate(header) if name in TEXT_COLUMNS]
+        self.skipped = 0
+        if self.date_column is None or self.amount_column is None:
+            raise ValueError("Statement needs a date and an amount/credit column")
+
+    def __iter__(self):
+        for line_number, row in enumerate(self.reader, start=2):
+            if not any(row):
+                continue
+            try:
+                date = _parse_date(row[self.date_column])
+                amount = _parse_amount(row[self.amount_column])
+                reference = ' '.join(row[index] for index in self.text_columns if index < len(row))
+            except IndexError:
+                date = amount = None
+            if date is None or not amount or amount <= 0:
+                self.skipped += 1
+                continue
+            yield StatementLine(line_number, date, amount, reference.strip())
+
+
+class PaymentIndex:
+    """Hash indexes over pending payments for statement matching"""
+
+    FIELDS = (
+        'pk', 'amount', 'due_date', 'payment_date', 'receipt_number', 'bank_reference',
+        'booking__room__room_code', 'booking__tenant__full_name',
+    )
+
+    def __init__(self, rows, window_days=7):
+        self.window_days = window_days
+        self.payments = {}
+        self.by_amount = defaultdict(list)
+        self.by_reference = defaultdict(set)
+        self.by_room = defaultdict(set)
+        self.by_name = defaultdict(set)
+        self.matched = set()
+
+        for row in rows:
+            pk = row['pk']
+            day = (row['due_date'] or row['payment_date']).toordinal()
+            references = {_compact(row['receipt_number']), _compact(row['bank_reference'])}
+            references = {reference for reference in references if len(reference) >= 4}
+            room = _compact(row['booking__room__room_code'])
+            names = frozenset(token for token in _tokens(row['booking__tenant__full_name']) if len(token) >= 2)
+
+            self.payments[pk] = (_cents(row['amount']), day, references, room, names)
+            self.by_amount[_cents(row['amount'])].append((day, pk))
+            for reference in references:
+                self.by_reference[reference].add(pk)
+            if room:
+                self.by_room[room].add(pk)
+            for name in names:
+                self.by_name[name].add(pk)
+
+        for postings in self.by_amount.values():
+            postings.sort()
+
+    @classmethod
+    def from_queryset(cls, queryset, window_days=7):
+        return cls(queryset.values(*cls.FIELDS).iterator(chunk_size=5000), window_days=window_days)
+
+    def __len__(self):
+        return len(self.payments)
+
+    def _amount_window(self, line):
+        postings = self.by_amount.get(_cents(line.amount), ())
+        day = line.date.toordinal()
+        start = bisect_left(postings, (day - self.window_days, -1))
+        end = bisect_right(postings, (day + self.window_days, float('inf')))
+        return postings, start, end
+
+    def _line_keys(self, tokens):
+        """Statement tokens plus runs of them joined back together (references get split on '-')"""
+        keys = set()
+        for start in range(len(tokens)):
+            for end in range(start + 1, min(start + MAX_REFERENCE_PARTS, len(tokens)) + 1):
+                keys.add(''.join(tokens[start:end]))
+        return keys
+
+    def candidates(self, line):
+        """Scored candidates for a statement line, best first"""
+        tokens = line.tokens
+        keys = self._line_keys(tokens)
+        words = set(tokens)
+
+        nominated = set()
+        for key in keys:
+            nominated |= self.by_reference.get(key, set())
+            nominated |= self.by_room.get(key, set())
+        for word in words:
+            postings = self.by_name.get(word, set())
+            if len(postings) <= MAX_NAME_POSTINGS:
+                nominated |= postings
+
+        postings, start, end = self._amount_window(line)
+        if end - start <= MAX_AMOUNT_CANDIDATES:
+            nominated.update(pk for _, pk in postings[start:end])
+
+        cents = _cents(line.amount)
+        day = line.date.toordinal()
+        scored = []
+        for pk in nominated - self.matched:
+            amount, due_day, references, room, names = self.payments[pk]
+            score = 0.0
+            reasons = []
+            if amount == cents:
+                score += AMOUNT_WEIGHT
+                reasons.append('amount')
+            distance = abs(day - due_day)
+            if distance <= self.window_days:
+                score += DATE_WEIGHT * (1 - distance / (self.window_days + 1))
+                reasons.append('date')
+            if references & keys:
+                score += REFERENCE_WEIGHT
+                reasons.append('reference')
+            if room and room in keys:
+                score += ROOM_WEIGHT
+                reasons.append('room')
+            if names:
+                overlap = len(names & words) / len(names)
+                if overlap:
+                    score += NAME_WEIGHT * overlap
+                    reasons.append('name')
+            scored.append((min(score, 1.0), pk, reasons))
+
+        scored.sort(key=lambda candidate: (-candidate[0], candidate[1]))
+        return scored
+
+
+def reconcile(lines, index, threshold=AUTO_MATCH_THRESHOLD):
+    """Match statement lines against an index; each payment is matched at most once"""
+    result = ReconciliationResult()
+    for line in lines:
+        candidates = index.candidates(line)
+        if not candidates:
+            result.unmatched.append(line)
+            continue
+
+        score, pk, reasons = candidates[0]
+        runner_up = candidates[1][0] if len(candidates) > 1 else 0.0
+        match = Match(line, pk, round(score, 3), reasons)
+        # Exact amount is required before money is booked against a payment
+        if score >= threshold and 'amount' in reasons and score - runner_up >= AMBIGUITY_MARGIN:
+            index.matched.add(pk)
+            result.matches.append(match)
+        else:
+            result.suggestions.append(match)
+    return result
+
+
+def apply_matches(matches, batch_size=500):
+    """Mark matched payments completed in bulk; returns how many were updated"""
+    from .models import Payment
+
+    by_payment = {match.payment_id: match for match in matches}
+    ids = list(by_payment)
+    completed = 0
+
+    with transaction.atomic():
+        for start in range(0, len(ids), batch_size):
+            payments = list(Payment.objects.filter(pk__in=ids[start:start + batch_size], status='pending'))
+            for payment in payments:
+                line = by_payment[payment.pk].line
+                payment.status = 'completed'
+                payment.received_date = timezone.make_aware(datetime.combine(line.date, time.min))
+                if not payment.bank_reference:
+                    payment.bank_reference = line.reference[:200]
+                if payment.payment_type == 'rent':
+                    payment.is_rent_paid = True
+            Payment.objects.bulk_update(
+                payments, ['status', 'received_date', 'bank_reference', 'is_rent_paid'], batch_size=batch_size
+            )
+            completed += len(payments)
+
+    logger.info(f"Bank reconciliation marked {completed} payments completed")
+    if completed:
+        _queue_receipts()
+    return completed
+
+
+def _queue_receipts():
+    """bulk_update skips post_save, so ask the receipt worker to pick the payments up"""
+    from notifications.tasks import generate_payment_receipts
+
+    def enqueue():
+        try:
+            generate_payment_receipts.delay()
+        except Exception as e:
+            # process_pending_receipts will still find them on its next run
+            logger.error(f"Failed to queue receipts after reconciliation: {e}")
+
+    transaction.on_commit(enqueue)
+
+
+def reconcile_statement(lines, queryset=None, window_days=7, threshold=AUTO_MATCH_THRESHOLD, dry_run=False):
+    """Read a CSV statement, match it against pending payments and complete the matches"""
+    from .models import Payment
+
+    queryset = queryset if queryset is not None else Payment.objects.filter(status='pending')
+    statement = StatementReader(lines)
+    index = PaymentIndex.from_queryset(queryset, window_days=window_days)
+    result = reconcile(statement, index, threshold=threshold)
+    result.skipped = statement.skipped
+    if not dry_run:
+        result.completed = apply_matches(result.matches)
+    return result
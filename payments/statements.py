@@ -0,0 +1,158 @@
+"""Statement of account PDFs.
+
+``generate_statements`` streams every payment of the selected tenants in the
+period with one ordered query, groups consecutive rows per tenant, and
+renders each batch of statements with ``PDFService.render_many`` so the
+layout work is spread over the PDF worker pool. Statements are upserted on
+(tenant, period_start, period_end), so re-running a month replaces its PDFs.
+Tenants with arrears from earlier months but no payments in the period get a
+statement too, so their balance keeps showing up.
+"""
+import logging
+from decimal import Decimal
+from itertools import groupby
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_NAME = 'payments/statement_pdf.html'
+# Statements rendered (and held in memory) per render_many call
+BATCH_SIZE = 200
+# Payments that never fell due (or were handed back) and are not billed
+UNBILLED_STATUSES = ('failed', 'refunded')
+
+
+def statement_totals(payments, brought_forward=Decimal('0')):
+    """(total billed, total paid, balance due) of a tenant's payments in the period"""
+    billed = sum(
+        (p.amount for p in payments if p.payment_type != 'refund' and p.status not in UNBILLED_STATUSES),
+        Decimal('0'),
+    )
+    paid = sum((p.amount for p in payments if p.payment_type != 'refund' and p.status == 'completed'), Decimal('0'))
+    return billed, paid, brought_forward + billed - paid
+
+
+def _brought_forward(Payment, tenant_ids, period_start):
+    """Unpaid amounts from before the period, per tenant, in one aggregate query"""
+    earlier = Payment.objects.filter(status='pending', payment_date__lt=period_start).exclude(payment_type='refund')
+    if tenant_ids is not None:
+        earlier = earlier.filter(booking__tenant_id__in=tenant_ids)
+    return {
+        row['booking__tenant_id']: row['total']
+        for row in earlier.values('booking__tenant_id').annotate(total=Sum('amount'))
+    }
+
+
+def _save_batch(batch, period_start, period_end):
+    """Render one batch of (tenant, payments, brought_forward) and upsert their Statements"""
+    from notifications.pdf import PDFService
+    from .models import Statement
+
+    now = timezone.now()
+    jobs = []
+    statements = []
+    for tenant, payments, brought_forward in batch:
+        billed, paid, balance = statement_totals(payments, brought_forward)
+        statements.append(Statement(
+            tenant=tenant, period_start=period_start, period_end=period_end,
+            brought_forward=brought_forward, total_billed=billed, total_paid=paid, balance_due=balance,
+            generated_at=now,
+        ))
+        jobs.append((TEMPLATE_NAME, {
+            'tenant': tenant,
+            'payments': payments,
+            'statement': statements[-1],
+            'today': now.date(),
+        }))
+
+    existing = {
+        statement.tenant_id: statement
+        for statement in Statement.objects.filter(
+            tenant__in=[tenant for tenant, _, _ in batch], period_start=period_start, period_end=period_end,
+        )
+    }
+
+    saved = []
+    replaced_files = []
+    failed = 0
+    for statement, result in zip(statements, PDFService.render_many(jobs)):
+        if isinstance(result, Exception):
+            failed += 1
+            logger.error(f"Failed to render statement for tenant {statement.tenant_id}: {result}")
+            continue
+        old = existing.get(statement.tenant_id)
+        if old is not None:
+            statement.pk = old.pk
+            if old.pdf:
+                replaced_files.append(old.pdf.name)
+        filename = f"statement_{statement.tenant_id}_{period_start:%Y%m%d}_{period_end:%Y%m%d}.pdf"
+        statement.pdf.save(filename, ContentFile(result), save=False)
+        saved.append(statement)
+
+    with transaction.atomic():
+        Statement.objects.bulk_create([s for s in saved if s.pk is None], batch_size=500)
+        Statement.objects.bulk_update(
+            [s for s in saved if s.pk is not None],
+            ['brought_forward', 'total_billed', 'total_paid', 'balance_due', 'pdf', 'generated_at'],
+            batch_size=500,
+        )
+        # The rows point at the new files only once this commits; until then the old files must stay
+        transaction.on_commit(lambda: _delete_files(replaced_files))
+    return len(saved), failed
+
+
+def _delete_files(names):
+    from .models import Statement
+
+    storage = Statement._meta.get_field('pdf').storage
+    for name in names:
+        try:
+            storage.delete(name)
+        except OSError as e:
+            logger.warning(f"Failed to delete replaced statement PDF {name}: {e}")
+
+
+def generate_statements(period_start, period_end, tenant_ids=None, batch_size=BATCH_SIZE):
+    """Render statements for every tenant with payments in the period or arrears before it
+    (or just ``tenant_ids``).
+
+    Returns ``(generated, failed)``.
+    """
+    from tenants.models import Tenant
+    from .models import Payment
+
+    payments = Payment.objects.filter(
+        payment_date__gte=period_start, payment_date__lte=period_end,
+    ).select_related('booking__tenant', 'booking__room').order_by('booking__tenant_id', 'payment_date', 'pk')
+    if tenant_ids is not None:
+        payments = payments.filter(booking__tenant_id__in=tenant_ids)
+    brought_forward = _brought_forward(Payment, tenant_ids, period_start)
+
+    def tenant_rows():
+        seen = set()
+        for tenant_id, rows in groupby(payments.iterator(chunk_size=2000), key=lambda p: p.booking.tenant_id):
+            seen.add(tenant_id)
+            rows = list(rows)
+            yield rows[0].booking.tenant, rows
+        # Only arrears carried into the period
+        owing = [tenant_id for tenant_id, amount in brought_forward.items() if amount and tenant_id not in seen]
+        for tenant in Tenant.objects.filter(pk__in=owing).order_by('pk').iterator(chunk_size=2000):
+            yield tenant, []
+
+    generated = failed = 0
+    batch = []
+    for tenant, rows in tenant_rows():
+        batch.append((tenant, rows, brought_forward.get(tenant.pk, Decimal('0'))))
+        if len(batch) >= batch_size:
+            done, errors = _save_batch(batch, period_start, period_end)
+            generated, failed, batch = generated + done, failed + errors, []
+    if batch:
+        done, errors = _save_batch(batch, period_start, period_end)
+        generated, failed = generated + done, failed + errors
+
+    logger.info(f"Generated {generated} statements for {period_start} - {period_end} ({failed} failed)")
+    return generated, failed
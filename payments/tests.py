@@ -1,3 +1,581 @@
-from django.test import TestCase
+import io
+import os
+import random
 
-# Create your tests here.
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from bookings.models import Booking
+from notifications.services import EmailService
+from notifications.tasks import (
+    create_late_fee_payments, dispatch_notifications, generate_payment_receipts, send_utility_bill_notifications,
+)
+from payments import proof_hash
+from payments.late_fees import accrue_late_fees, get_policy
+from payments.reconciliation import reconcile_statement
+from payments.statements import generate_statements
+from payments.models import Payment, Statement, UtilityBill
+from properties.models import Property, Room
+from tenants.models import Tenant
+
+
+@pytest.mark.django_db
+class TestReceiptClaims:
+
+    def setup_method(self):
+        user = User.objects.create_user(username="tenant1", email="t1@example.com", password="pass")
+        tenant = Tenant.objects.create(
+            user=user, full_name="John Doe", nationality="Testland",
+            date_of_birth="1990-01-01", gender="male", phone_number="123456789",
+        )
+        room = Room.objects.create(
+            property=Property.objects.create(name="P1", address="Addr", property_type="apartment", total_rooms=1),
+            room_code="R101", room_number="101", monthly_rent=5000,
+        )
+        today = timezone.now().date()
+        self.booking = Booking.objects.create(
+            tenant=tenant, room=room, move_in_date=today, move_out_date=today + timedelta(days=30),
+            duration_months=1, monthly_rent=5000,
+        )
+        self.payments = [self.create_payment(status='completed') for _ in range(3)]
+
+    def create_payment(self, **kwargs):
+        defaults = dict(
+            booking=self.booking, payment_type='rent', amount=5000,
+            payment_method='cash', payment_date=timezone.now().date(),
+        )
+        defaults.update(kwargs)
+        return Payment.objects.create(**defaults)
+
+    def test_each_payment_is_claimed_by_one_worker(self):
+        self.create_payment(status='pending')
+
+        first = Payment.claim_receipts(limit=2)
+        second = Payment.claim_receipts(limit=2)
+        third = Payment.claim_receipts(limit=2)
+
+        assert len(first) == 2
+        assert len(second) == 1
+        assert third == []
+        assert {p.pk for p in first + second} == {p.pk for p in self.payments}
+
+    def test_expired_or_released_claims_can_be_taken_again(self):
+        payment = Payment.claim_receipts(limit=1)[0]
+        assert not Payment.objects.get(pk=payment.pk).claim_receipt()
+
+        payment.release_receipt_claim()
+        assert [p.pk for p in Payment.claim_receipts(limit=1)] == [payment.pk]
+
+        Payment.objects.filter(pk=payment.pk).update(receipt_claimed_until=timezone.now() - timedelta(seconds=1))
+        assert [p.pk for p in Payment.claim_receipts(limit=1)] == [payment.pk]
+
+    def test_receipt_run_processes_every_payment_once(self, settings, tmp_path, monkeypatch):
+        settings.PDF_RENDER_WORKERS = 1
+        settings.MEDIA_ROOT = str(tmp_path)
+        rendered = []
+        monkeypatch.setattr(
+            'notifications.pdf._render_html', lambda html, uncompressed=False: rendered.append(html) or b'%PDF-receipt'
+        )
+        Payment.objects.filter(pk=self.payments[0].pk).update(
+            receipt_claimed_until=timezone.now() + timedelta(minutes=5), receipt_claim_token='other-worker',
+        )
+
+        assert generate_payment_receipts() == 2
+        assert generate_payment_receipts() == 0
+        assert len(rendered) == 2
+
+        payments = Payment.objects.order_by('pk')
+        # Leased to another worker, so left alone
+        assert not payments[0].receipt_generated and payments[0].receipt_claim_token == 'other-worker'
+        for payment in payments[1:]:
+            assert payment.receipt_generated and payment.receipt_claim_token == ''
+            with payment.receipt_pdf.open('rb') as receipt:
+                assert receipt.read() == b'%PDF-receipt'
+
+    def test_receipt_emails_go_out_as_one_batch(self, settings, tmp_path, monkeypatch):
+        settings.PDF_RENDER_WORKERS = 1
+        settings.MEDIA_ROOT = str(tmp_path)
+        monkeypatch.setattr('notifications.pdf._render_html', lambda html, uncompressed=False: b'%PDF-receipt')
+        batches = []
+        send_batch = EmailService.send_batch
+        monkeypatch.setattr(EmailService, 'send_batch',
+                            staticmethod(lambda messages, **kwargs: batches.append(messages) or send_batch(messages)))
+
+        assert generate_payment_receipts() == 3
+
+        assert len(batches) == 1 and len(batches[0]) == 3
+        assert len(mail.outbox) == 3
+        assert all(message.attachments for message in mail.outbox)
+
+    def test_receipt_is_discarded_when_the_claim_was_taken_over(self, settings, tmp_path):
+        settings.MEDIA_ROOT = str(tmp_path)
+        payment = Payment.claim_receipts(limit=1)[0]
+        # The lease ran out and another worker claimed the payment
+        Payment.objects.filter(pk=payment.pk).update(receipt_claim_token='other-worker')
+
+        assert not payment.save_receipt_pdf(b'%PDF-late')
+
+        stored = Payment.objects.get(pk=payment.pk)
+        assert not stored.receipt_generated and stored.receipt_claim_token == 'other-worker'
+        assert not any((tmp_path / 'receipts').iterdir())
+
+
+@pytest.mark.django_db
+class TestUtilityBillAllocation:
+
+    def setup_method(self):
+        today = timezone.now().date()
+        self.bill_date = today - timedelta(days=29)
+        self.bills = []
+        for n in range(3):
+            prop = Property.objects.create(name=f"P{n}", address="Addr", property_type="apartment", total_rooms=2)
+            for r in range(2):
+                user = User.objects.create_user(username=f"t{n}{r}", email=f"t{n}{r}@example.com", password="pass")
+                tenant = Tenant.objects.create(
+                    user=user, full_name=f"Tenant {n}{r}", nationality="Testland",
+                    date_of_birth="1990-01-01", gender="male", phone_number="123",
+                )
+                room = Room.objects.create(property=prop, room_code=f"R{n}{r}", room_number=str(r), monthly_rent=5000)
+                Booking.objects.create(
+                    tenant=tenant, room=room, status='active', duration_months=1, monthly_rent=5000,
+                    # Second tenant moved in halfway through the bill period
+                    move_in_date=self.bill_date + timedelta(days=15 * r), move_out_date=today + timedelta(days=60),
+                )
+            self.bills.append(UtilityBill.objects.create(
+                property_obj=prop, bill_type='electricity', bill_amount=Decimal('1000.00'),
+                bill_date=self.bill_date, due_date=today,
+            ))
+
+    def test_allocates_pro_rata_shares_in_bulk(self, django_assert_max_num_queries):
+        with django_assert_max_num_queries(8):
+            allocations = UtilityBill.allocate_bills(UtilityBill.objects.all())
+
+        assert set(allocations) == {bill.pk for bill in self.bills}
+        payments = Payment.objects.filter(payment_type='utility')
+        assert payments.count() == 6
+        # 30 and 15 days of a 45 share-day total
+        assert sorted(payments.filter(booking__room__property=self.bills[0].property_obj).values_list('amount', flat=True)) == [
+            Decimal('333.33'), Decimal('666.67')
+        ]
+
+        bill = UtilityBill.objects.get(pk=self.bills[0].pk)
+        assert bill.is_allocated
+        assert bill.total_allocated_amount == Decimal('1000.00')
+
+    def test_existing_shares_are_not_duplicated(self):
+        self.bills[0].create_utility_payments()
+
+        allocations = UtilityBill.allocate_bills(UtilityBill.objects.all())
+
+        assert set(allocations) == {self.bills[1].pk, self.bills[2].pk}
+        assert Payment.objects.filter(payment_type='utility').count() == 6
+
+    def test_notifications_are_sent_as_one_batch(self, mailoutbox):
+        allocations = UtilityBill.allocate_bills(UtilityBill.objects.all())
+        notifications = [[p.id, bill_id] for bill_id, payments in allocations.items() for p in payments]
+
+        assert send_utility_bill_notifications(notifications) == 6
+        assert dispatch_notifications() == 6
+        assert len(mailoutbox) == 6
+
+
+@pytest.mark.django_db
+class TestLateFeeAccrual:
+
+    def setup_method(self):
+        user = User.objects.create_user(username="late1", email="late1@example.com", password="pass")
+        tenant = Tenant.objects.create(
+            user=user, full_name="Late Payer", nationality="Testland",
+            date_of_birth="1990-01-01", gender="male", phone_number="123",
+        )
+        room = Room.objects.create(
+            property=Property.objects.create(name="P1", address="Addr", property_type="apartment", total_rooms=1),
+            room_code="R201", room_number="201", monthly_rent=5000,
+        )
+        self.today = timezone.now().date()
+        booking = Booking.objects.create(
+            tenant=tenant, room=room, move_in_date=self.today - timedelta(days=60),
+            move_out_date=self.today + timedelta(days=30), duration_months=3, monthly_rent=5000,
+        )
+        self.rent = Payment.objects.create(
+            booking=booking, payment_type='rent', amount=5000, payment_method='bank_transfer',
+            payment_date=self.today - timedelta(days=5), due_date=self.today - timedelta(days=5),
+        )
+
+    def test_one_fee_row_accrues_day_by_day(self):
+        created, _ = accrue_late_fees(self.today)
+        accrue_late_fees(self.today)
+        accrue_late_fees(self.today + timedelta(days=2))
+
+        fee = Payment.objects.get(payment_type='late_fee')
+        assert created == [fee.pk]
+        assert fee.late_fee_for == self.rent
+        assert fee.late_fee_days == 7
+        assert fee.amount == fee.late_fee_amount == Decimal('700.00')
+
+    def test_fee_stops_accruing_once_rent_is_paid(self):
+        accrue_late_fees(self.today)
+        Payment.objects.filter(pk=self.rent.pk).update(status='completed')
+
+        assert accrue_late_fees(self.today + timedelta(days=3)) == ([], 0)
+        assert Payment.objects.get(payment_type='late_fee').amount == Decimal('500.00')
+
+    def test_policy_grace_period_and_cap(self, settings):
+        settings.LATE_FEE_DAILY_AMOUNT = 150
+        settings.LATE_FEE_GRACE_DAYS = 2
+        settings.LATE_FEE_MAX_AMOUNT = 1000
+        policy = get_policy()
+
+        accrue_late_fees(self.today)
+        assert Payment.objects.get(payment_type='late_fee').amount == policy.fee_for(5) == Decimal('450')
+
+        accrue_late_fees(self.today + timedelta(days=30))
+        assert Payment.objects.get(payment_type='late_fee').amount == policy.fee_for(35) == Decimal('1000')
+
+    def test_task_invoices_only_new_fees(self, mailoutbox):
+        assert create_late_fee_payments() == 1
+        assert create_late_fee_payments() == 0
+
+        assert Payment.objects.filter(payment_type='late_fee').count() == 1
+        assert dispatch_notifications() == 1
+        assert len(mailoutbox) == 1
+        assert "HK$100/day" in mailoutbox[0].alternatives[0][0]
+
+
+@pytest.mark.django_db
+class TestBankReconciliation:
+
+    def setup_method(self):
+        prop = Property.objects.create(name="P1", address="Addr", property_type="apartment", total_rooms=3)
+        self.today = timezone.now().date()
+        self.payments = {}
+        for code, name in [("A101", "Chan Tai Man"), ("A102", "Wong Siu Ming"), ("A103", "Chan Ka Wai")]:
+            user = User.objects.create_user(username=code, email=f"{code}@example.com", password="pass")
+            tenant = Tenant.objects.create(
+                user=user, full_name=name, nationality="Testland",
+                date_of_birth="1990-01-01", gender="male", phone_number="123",
+            )
+            room = Room.objects.create(property=prop, room_code=code, room_number=code[1:], monthly_rent=5000)
+            booking = Booking.objects.create(
+                tenant=tenant, room=room, move_in_date=self.today, move_out_date=self.today + timedelta(days=30),
+                duration_months=1, monthly_rent=5000,
+            )
+            self.payments[code] = Payment.objects.create(
+                booking=booking, payment_type='rent', amount=5000, payment_method='bank_transfer',
+                payment_date=self.today, due_date=self.today, receipt_number=f"RENT-{code}",
+            )
+
+    def statement(self, *rows):
+        lines = ["Date,Description,Deposit"] + [f"{self.today:%d/%m/%Y},{text},{amount}" for text, amount in rows]
+        return io.StringIO("\n".join(lines))
+
+    def test_matches_by_reference_and_by_room_and_name(self):
+        result = reconcile_statement(self.statement(
+            ("FPS RENT A101", "5000.00"),
+            ("TRF WONG SIU MING A102", '"5,000.00"'),
+            ("ATM WITHDRAWAL", "(300.00)"),
+        ))
+
+        assert {match.payment_id for match in result.matches} == {self.payments["A101"].pk, self.payments["A102"].pk}
+        assert result.completed == 2
+        assert result.skipped == 1
+        paid = Payment.objects.get(pk=self.payments["A102"].pk)
+        assert paid.status == 'completed' and paid.is_rent_paid
+        assert paid.bank_reference == "TRF WONG SIU MING A102"
+        assert Payment.objects.get(pk=self.payments["A103"].pk).status == 'pending'
+
+    def test_ambiguous_or_wrong_amount_lines_are_left_for_review(self):
+        result = reconcile_statement(self.statement(
+            ("TRF CHAN", "5000.00"),
+            ("FPS RENT A103", "4000.00"),
+            ("UNKNOWN PAYER", "123.00"),
+        ))
+
+        assert result.matches == []
+        assert len(result.suggestions) == 2
+        assert len(result.unmatched) == 1
+        assert not Payment.objects.filter(status='completed').exists()
+
+    def test_each_payment_is_matched_once_and_dry_run_changes_nothing(self):
+        result = reconcile_statement(self.statement(
+            ("FPS RENT A101", "5000.00"),
+            ("FPS RENT A101", "5000.00"),
+        ), dry_run=True)
+
+        assert [match.payment_id for match in result.matches] == [self.payments["A101"].pk]
+        assert result.completed == 0
+        assert not Payment.objects.filter(status='completed').exists()
+
+    def test_staff_upload(self, client):
+        client.force_login(User.objects.create_user(username="staff", password="pass", is_staff=True))
+        upload = io.BytesIO(self.statement(("FPS RENT A101", "5000.00")).getvalue().encode())
+        upload.name = "statement.csv"
+
+        response = client.post(reverse("payments:bank_reconciliation"), {"statement": upload})
+
+        assert response.status_code == 200
+        assert response.context["result"].completed == 1
+        assert Payment.objects.get(pk=self.payments["A101"].pk).status == 'completed'
+
+
+@pytest.mark.django_db
+class TestRentInvoiceGeneration:
+
+    def setup_method(self):
+        prop = Property.objects.create(name="P1", address="Addr", property_type="apartment", total_rooms=4)
+        self.bookings = {}
+        stays = {
+            'active': (date(2026, 1, 31), date(2026, 12, 31)),
+            'confirmed': (date(2026, 3, 10), date(2026, 9, 10)),
+            'pending': (date(2026, 1, 1), date(2026, 12, 31)),
+            'leaving': (date(2026, 1, 20), date(2026, 4, 5)),
+        }
+        for n, (status, (move_in, move_out)) in enumerate(stays.items()):
+            user = User.objects.create_user(username=f"rent{n}", email=f"rent{n}@example.com", password="pass")
+            tenant = Tenant.objects.create(
+                user=user, full_name=f"Tenant {n}", nationality="Testland",
+                date_of_birth="1990-01-01", gender="male", phone_number="123",
+            )
+            room = Room.objects.create(property=prop, room_code=f"B{n}", room_number=str(n), monthly_rent=5000 + n)
+            self.bookings[status] = Booking.objects.create(
+                tenant=tenant, room=room, status='active' if status == 'leaving' else status,
+                move_in_date=move_in, move_out_date=move_out, duration_months=6, monthly_rent=5000 + n,
+            )
+
+    def test_invoices_every_billable_booking_in_bulk(self, django_assert_max_num_queries):
+        # Two for the invoices, three to schedule their reminders (notifications.schedule)
+        with django_assert_max_num_queries(5):
+            Payment.generate_rent_invoices(date(2026, 4, 15))
+
+        payments = {p.booking_id: p for p in Payment.objects.filter(payment_type='rent')}
+        assert set(payments) == {self.bookings['active'].pk, self.bookings['confirmed'].pk}
+        active = payments[self.bookings['active'].pk]
+        assert active.rent_month == date(2026, 4, 1)
+        # Moved in on the 31st: due on the last day of shorter months
+        assert active.due_date == date(2026, 4, 30)
+        assert active.amount == 5000
+        assert payments[self.bookings['confirmed'].pk].due_date == date(2026, 4, 10)
+        assert active.scheduled_events.filter(event_type='rent_due_soon', fire_date=date(2026, 4, 27)).exists()
+
+    def test_rerunning_creates_nothing(self):
+        Payment.generate_rent_invoices(date(2026, 4, 1))
+
+        assert Payment.generate_rent_invoices(date(2026, 4, 1)) == []
+        assert Payment.objects.filter(payment_type='rent').count() == 2
+
+    def test_command_backfills_a_range(self):
+        call_command('generate_rent_invoices', '--month', '2026-02:2026-04', stdout=io.StringIO())
+        call_command('generate_rent_invoices', '--month', '2026-03', stdout=io.StringIO())
+
+        months = sorted(Payment.objects.filter(payment_type='rent').values_list('booking_id', 'rent_month'))
+        active, leaving, confirmed = self.bookings['active'].pk, self.bookings['leaving'].pk, self.bookings['confirmed'].pk
+        assert months == sorted([
+            (active, date(2026, 2, 1)), (active, date(2026, 3, 1)), (active, date(2026, 4, 1)),
+            (leaving, date(2026, 2, 1)), (leaving, date(2026, 3, 1)),
+            (confirmed, date(2026, 3, 1)), (confirmed, date(2026, 4, 1)),
+        ])
+
+
+def bank_slip(seed, crop=0):
+    """PNG bytes of a made-up bank slip; ``crop`` trims that many pixels off each edge"""
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    image = Image.new('RGB', (400, 600), 'white')
+    draw = ImageDraw.Draw(image)
+    for _ in range(25):
+        x, y = rng.randrange(360), rng.randrange(560)
+        draw.rectangle([x, y, x + rng.randrange(20, 120), y + rng.randrange(8, 40)], fill=rng.choice(['black', 'navy', 'gray']))
+    if crop:
+        image = image.crop((crop, crop, 400 - crop, 600 - crop))
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@pytest.mark.django_db
+class TestProofDuplicateDetection:
+
+    @pytest.fixture(autouse=True)
+    def fresh_index(self, settings, tmp_path, monkeypatch):
+        settings.MEDIA_ROOT = str(tmp_path)
+        monkeypatch.setattr(proof_hash, '_index', proof_hash.ProofHashIndex())
+
+    def setup_method(self):
+        user = User.objects.create_user(username="slip", email="slip@example.com", password="pass")
+        tenant = Tenant.objects.create(
+            user=user, full_name="Slip Uploader", nationality="Testland",
+            date_of_birth="1990-01-01", gender="male", phone_number="123",
+        )
+        room = Room.objects.create(
+            property=Property.objects.create(name="P1", address="Addr", property_type="apartment", total_rooms=1),
+            room_code="S1", room_number="1", monthly_rent=5000,
+        )
+        today = timezone.now().date()
+        self.booking = Booking.objects.create(
+            tenant=tenant, room=room, move_in_date=today, move_out_date=today + timedelta(days=90),
+            duration_months=3, monthly_rent=5000,
+        )
+
+    def upload(self, content, name='slip.png'):
+        payment = Payment.objects.create(
+            booking=self.booking, payment_type='rent', amount=5000, payment_method='bank_transfer',
+            payment_date=timezone.now().date(), proof_of_payment=SimpleUploadedFile(name, content),
+        )
+        assert proof_hash.needs_proof_hash(payment)
+        proof_hash.update_proof_hash(payment)
+        return Payment.objects.get(pk=payment.pk)
+
+    def test_cropped_reupload_is_flagged(self):
+        original = self.upload(bank_slip(1))
+        other = self.upload(bank_slip(2))
+        reupload = self.upload(bank_slip(1, crop=6))
+
+        assert not proof_hash.needs_proof_hash(reupload)
+        similar = proof_hash.find_similar_proofs(reupload)
+        assert [payment.pk for payment, _ in similar] == [original.pk]
+        assert other.pk not in [payment.pk for payment, _ in proof_hash.find_similar_proofs(original)]
+
+    def test_non_image_proofs_are_skipped(self):
+        payment = self.upload(b'%PDF-1.4 not an image', name='slip.pdf')
+
+        assert payment.proof_hash == ''
+        assert payment.proof_hashed_at is not None
+        assert proof_hash.find_similar_proofs(payment) == []
+
+    def test_index_agrees_with_a_linear_scan(self):
+        rng = random.Random(7)
+        index = proof_hash.ProofHashIndex()
+        hashes = {pk: rng.getrandbits(64) for pk in range(2000)}
+        # Plant near copies of the first few hashes
+        for pk in range(2000, 2050):
+            flips = rng.sample(range(64), rng.randrange(0, 10))
+            hashes[pk] = hashes[pk - 2000] ^ sum(1 << bit for bit in flips)
+        for pk, value in hashes.items():
+            index.add(pk, value)
+
+        for query in list(hashes.values())[:50] + list(hashes.values())[2000:]:
+            expected = sorted(
+                (pk, (value ^ query).bit_count()) for pk, value in hashes.items()
+                if (value ^ query).bit_count() <= proof_hash.MAX_DISTANCE
+            )
+            assert sorted(index.query(query)) == expected
+
+
+@pytest.mark.django_db
+class TestStatements:
+
+    @pytest.fixture(autouse=True)
+    def pdf_output(self, settings, tmp_path, monkeypatch):
+        settings.MEDIA_ROOT = str(tmp_path)
+        settings.PDF_RENDER_WORKERS = 1
+        # Stand-in for the WeasyPrint layout step; everything around it runs for real
+        self.rendered = []
+        monkeypatch.setattr('notifications.pdf._render_html', lambda html, uncompressed=False: self.rendered.append(html) or b'%PDF-1.7')
+
+    def setup_method(self):
+        prop = Property.objects.create(name="P1", address="Addr", property_type="apartment", total_rooms=3)
+        self.tenants = []
+        for n in range(3):
+            user = User.objects.create_user(username=f"stmt{n}", email=f"stmt{n}@example.com", password="pass")
+            tenant = Tenant.objects.create(
+                user=user, full_name=f"Statement Tenant {n}", nationality="Testland",
+                date_of_birth="1990-01-01", gender="male", phone_number="123",
+            )
+            room = Room.objects.create(property=prop, room_code=f"S{n}", room_number=str(n), monthly_rent=5000)
+            booking = Booking.objects.create(
+                tenant=tenant, room=room, move_in_date=date(2026, 1, 1), move_out_date=date(2026, 12, 31),
+                duration_months=12, monthly_rent=5000,
+            )
+            for month, status in [(1, 'pending'), (2, 'completed'), (3, 'pending')]:
+                Payment.objects.create(
+                    booking=booking, payment_type='rent', amount=5000, payment_method='bank_transfer',
+                    payment_date=date(2026, month, 1), due_date=date(2026, month, 1),
+                    rent_month=date(2026, month, 1), status=status,
+                )
+            self.tenants.append(tenant)
+
+    def test_one_statement_per_tenant(self):
+        with CaptureQueriesContext(connection) as queries:
+            assert generate_statements(date(2026, 2, 1), date(2026, 2, 28), batch_size=2) == (3, 0)
+
+        # The period's payments plus the brought-forward totals, whatever the batch size
+        payment_reads = [q for q in queries if q['sql'].startswith('SELECT') and 'FROM "payments_payment"' in q['sql']]
+        assert len(payment_reads) == 2
+
+        statement = Statement.objects.get(tenant=self.tenants[0])
+        assert statement.brought_forward == Decimal('5000')
+        assert statement.total_billed == statement.total_paid == Decimal('5000')
+        assert statement.balance_due == Decimal('5000')
+        assert statement.pdf.read() == b'%PDF-1.7'
+        assert "Statement Tenant 0" in self.rendered[0]
+
+    def test_tenant_with_only_arrears_gets_a_statement(self):
+        assert generate_statements(date(2026, 4, 1), date(2026, 4, 30), tenant_ids=[self.tenants[0].pk]) == (1, 0)
+
+        statement = Statement.objects.get()
+        assert statement.tenant == self.tenants[0]
+        assert statement.brought_forward == statement.balance_due == Decimal('10000')
+        assert statement.total_billed == statement.total_paid == Decimal('0')
+
+    def test_failed_and_refunded_payments_are_not_billed(self):
+        booking = Booking.objects.get(tenant=self.tenants[1])
+        for status in ('failed', 'refunded'):
+            Payment.objects.create(
+                booking=booking, payment_type='deposit', amount=1000, payment_method='bank_transfer',
+                payment_date=date(2026, 2, 10), status=status,
+            )
+
+        generate_statements(date(2026, 2, 1), date(2026, 2, 28), tenant_ids=[self.tenants[1].pk])
+
+        statement = Statement.objects.get()
+        assert statement.total_billed == statement.total_paid == Decimal('5000')
+        assert statement.balance_due == Decimal('5000')
+
+    def test_regenerating_replaces_the_statement(self, django_capture_on_commit_callbacks):
+        generate_statements(date(2026, 3, 1), date(2026, 3, 31), tenant_ids=[self.tenants[1].pk])
+        Payment.objects.filter(booking__tenant=self.tenants[1], rent_month=date(2026, 3, 1)).update(status='completed')
+        with django_capture_on_commit_callbacks(execute=True):
+            generate_statements(date(2026, 3, 1), date(2026, 3, 31), tenant_ids=[self.tenants[1].pk])
+
+        statement = Statement.objects.get()
+        assert statement.tenant == self.tenants[1]
+        assert statement.balance_due == Decimal('5000')  # January is still unpaid
+        assert os.listdir(os.path.dirname(statement.pdf.path)) == [os.path.basename(statement.pdf.name)]
+
+    def test_failed_write_keeps_the_previous_pdf(self, settings, monkeypatch):
+        settings.PDF_CACHE_ENABLED = False
+        generate_statements(date(2026, 3, 1), date(2026, 3, 31), tenant_ids=[self.tenants[1].pk])
+        previous = Statement.objects.get()
+
+        def fail(*args, **kwargs):
+            raise RuntimeError("database is locked")
+
+        monkeypatch.setattr(Statement.objects, 'bulk_update', fail)
+        monkeypatch.setattr('notifications.pdf._render_html', lambda html, uncompressed=False: b'%PDF-1.7 unsaved')
+        with pytest.raises(RuntimeError):
+            generate_statements(date(2026, 3, 1), date(2026, 3, 31), tenant_ids=[self.tenants[1].pk])
+
+        stored = Statement.objects.get()
+        assert stored.pdf.name == previous.pdf.name
+        assert stored.pdf.read() == b'%PDF-1.7'
+
+    def test_tenant_downloads_latest_statement(self, client):
+        generate_statements(date(2026, 2, 1), date(2026, 2, 28), tenant_ids=[self.tenants[2].pk])
+        generate_statements(date(2026, 3, 1), date(2026, 3, 31), tenant_ids=[self.tenants[2].pk])
+        client.force_login(self.tenants[2].user)
+
+        response = client.get(reverse('website:tenant_statement_download'))
+
+        assert response.status_code == 200
+        assert 'statement_2026_03.pdf' in response['Content-Disposition']
+        assert b''.join(response.streaming_content) == b'%PDF-1.7'
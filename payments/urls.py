@@ -6,5 +6,6 @@ app_name = 'payments'
 urlpatterns = [
     path('proof-verification/', views.payment_proof_dashboard, name='payment_proof_dashboard'),
     path('<int:payment_id>/proof/', views.payment_proof_detail, name='payment_proof_detail'),
+    path('reconcile/', views.bank_reconciliation, name='bank_reconciliation'),
     path('<int:payment_id>/upload-proof/', views.tenant_payment_proof_upload, name='tenant_payment_proof_upload'),
 ]
\ No newline at end of file
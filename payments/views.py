@@ -1,3 +1,4 @@
+import io
 from datetime import timedelta
 
 from django.shortcuts import render, get_object_or_404
@@ -7,6 +8,11 @@ from django.utils import timezone
 
 from notifications.services import EmailService
 from payments.models import Payment
+from payments import reconciliation
+from payments.proof_hash import find_similar_proofs
+
+# Rows of suggestions/unmatched lines shown after an import
+RECONCILIATION_DISPLAY_LIMIT = 200
 
 
 @login_required
@@ -67,6 +73,7 @@ def payment_proof_detail(request, payment_id):
         'payment': payment,
         'tenant': payment.booking.tenant,
         'room': payment.booking.room,
+        'similar_proofs': find_similar_proofs(payment),
     }
     return render(request, 'payments/proof_detail.html', context)
 
@@ -92,4 +99,35 @@ def tenant_payment_proof_upload(request, payment_id):
     context = {
         'payment': payment,
     }
-    return render(request, 'payments/tenant_proof_upload.html', context)
\ No newline at end of file
+    return render(request, 'payments/tenant_proof_upload.html', context)
+
+
+@login_required
+@user_passes_test(lambda u: u.is_staff)
+def bank_reconciliation(request):
+    """Import a bank CSV statement and complete the pending payments it matches"""
+    context = {'threshold': reconciliation.AUTO_MATCH_THRESHOLD}
+
+    if request.method == 'POST' and 'statement' in request.FILES:
+        dry_run = bool(request.POST.get('dry_run'))
+        lines = io.TextIOWrapper(request.FILES['statement'].file, encoding='utf-8-sig', newline='')
+        try:
+            result = reconciliation.reconcile_statement(lines, dry_run=dry_run)
+        except (ValueError, UnicodeDecodeError) as e:
+            context['error'] = f"Could not read statement: {e}"
+        else:
+            shown = result.matches[:RECONCILIATION_DISPLAY_LIMIT] + result.suggestions[:RECONCILIATION_DISPLAY_LIMIT]
+            payments = Payment.objects.select_related('booking__tenant', 'booking__room').in_bulk(
+                [match.payment_id for match in shown]
+            )
+            for match in shown:
+                match.payment = payments.get(match.payment_id)
+            context.update({
+                'result': result,
+                'dry_run': dry_run,
+                'matches': result.matches[:RECONCILIATION_DISPLAY_LIMIT],
+                'suggestions': result.suggestions[:RECONCILIATION_DISPLAY_LIMIT],
+                'unmatched': result.unmatched[:RECONCILIATION_DISPLAY_LIMIT],
+            })
+
+    return render(request, 'payments/reconcile.html', context)
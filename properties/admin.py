@@ -1,6 +1,7 @@
 from .models import Property, Owner, PropertyOwnership, PropertyImage
 from django.contrib import admin
 from .models import Room, RoomPhoto, RoomVideo
+from . import search
 from django.utils.html import format_html
 
 
@@ -19,10 +20,15 @@ class PropertyImageAdmin(admin.ModelAdmin):
 class PropertyAdmin(admin.ModelAdmin):
     list_display = ['name', 'property_type', 'total_rooms', 'created_at']
     list_filter = ['property_type', 'created_at']
-    search_fields = ['name', 'address']
+    search_fields = ['name', 'address', 'address_chinese']
     readonly_fields = ['created_at', 'updated_at']
     inlines = [PropertyImageInline]
 
+    def get_search_results(self, request, queryset, search_term):
+        if search_term and search.is_available():
+            return search.search_properties(queryset, search_term), False
+        return super().get_search_results(request, queryset, search_term)
+
 
 
 class RoomPhotoInline(admin.TabularInline):
@@ -35,7 +41,7 @@ class RoomPhotoInline(admin.TabularInline):
         if obj.image:
             return format_html(
                 '<img src="{}" style="width: 120px; height:auto; border-radius:4px;" />',
-                obj.image.url
+                obj.thumb_url
             )
         return "No Image"
 
@@ -66,9 +72,10 @@ class RoomVideoInline(admin.TabularInline):
 class RoomAdmin(admin.ModelAdmin):
     list_display = ['room_code', 'property', 'monthly_rent', 'status', 'current_tenant', 'has_private_bathroom']
     list_filter = ['status', 'property', 'has_private_bathroom', 'has_balcony']
-    search_fields = ['room_code', 'property__name', 'description']
+    search_fields = ['room_code', 'property__name', 'property__address', 'property__address_chinese', 'description']
     readonly_fields = ['created_at', 'updated_at', 'current_tenant_display']
     list_editable = ['status']
+    list_select_related = ['property', 'current_booking__tenant']
 
     inlines = [RoomPhotoInline, RoomVideoInline]
 
@@ -93,19 +100,24 @@ class RoomAdmin(admin.ModelAdmin):
     )
 
     def current_tenant(self, obj):
-        booking = obj.get_current_booking()
+        booking = obj.current_booking
         return booking.tenant.full_name if booking else "Available"
 
     current_tenant.short_description = 'Current Tenant'
 
     def current_tenant_display(self, obj):
-        booking = obj.get_current_booking()
+        booking = obj.current_booking
         if booking:
             return f"{booking.tenant.full_name} (Until {booking.move_out_date})"
         return "No current tenant"
 
     current_tenant_display.short_description = 'Current Tenant'
 
+    def get_search_results(self, request, queryset, search_term):
+        if search_term and search.is_available():
+            return search.search_rooms(queryset, search_term), False
+        return super().get_search_results(request, queryset, search_term)
+
 
 
 @admin.register(Owner)
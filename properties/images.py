@@ -0,0 +1,161 @@
+"""Responsive image renditions for room and property photos.
+
+Uploaded photos are re-encoded by a Celery task into a few widths and
+formats (EXIF stripped, orientation applied). The resulting storage paths
+are kept on the model's ``renditions`` JSON field::
+
+    {
+        'source': 'rooms/c5a/photos/x.jpg',
+        'thumb': {'width': 320, 'height': 240, 'webp': '...', 'jpeg': '...'},
+        'card': {...},
+        'full': {...},
+    }
+"""
+import io
+import logging
+import os
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# Rendition name -> maximum width in pixels (images are never upscaled)
+RENDITION_WIDTHS = {
+    'thumb': 320,
+    'card': 640,
+    'full': 1600,
+}
+
+# Output format -> (Pillow format, extension, save options)
+RENDITION_FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def rendition_path(name, rendition, extension):
+    """Storage path of a rendition next to the original upload"""
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    return f"{directory}/renditions/{stem}_{rendition}.{extension}"
+
+
+def generate_renditions(field_file):
+    """Render every width/format of an image field file and return the renditions dict"""
+    from PIL import Image, ImageOps
+
+    storage = field_file.storage
+    field_file.open('rb')
+    try:
+        with Image.open(field_file) as original:
+            # Bake EXIF orientation into the pixels; the metadata itself is dropped
+            image = ImageOps.exif_transpose(original)
+            if image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            image.load()
+    finally:
+        field_file.close()
+
+    renditions = {'source': field_file.name}
+    for rendition, max_width in RENDITION_WIDTHS.items():
+        resized = image.copy()
+        resized.thumbnail((max_width, max_width * 4), Image.LANCZOS)
+        entry = {'width': resized.width, 'height': resized.height}
+
+        for key, (pil_format, extension, save_options) in RENDITION_FORMATS.items():
+            buffer = io.BytesIO()
+            resized.save(buffer, pil_format, **save_options)
+
+            path = rendition_path(field_file.name, rendition, extension)
+            if storage.exists(path):
+                storage.delete(path)
+            entry[key] = storage.save(path, ContentFile(buffer.getvalue()))
+
+        renditions[rendition] = entry
+
+    return renditions
+
+
+def rendition_paths(renditions):
+    """Storage paths of every rendition file in a renditions dict"""
+    return {
+        path
+        for rendition in RENDITION_WIDTHS
+        for key in RENDITION_FORMATS
+        if (path := (renditions.get(rendition) or {}).get(key))
+    }
+
+
+def delete_renditions(instance, renditions=None, keep=()):
+    """Remove rendition files from storage, by default the instance's current ones.
+
+    Pass ``renditions`` to delete an earlier set, leaving any path in ``keep``.
+    """
+    storage = instance.image.storage
+    paths = rendition_paths(instance.renditions if renditions is None else renditions)
+    for path in paths - set(keep):
+        if storage.exists(path):
+            storage.delete(path)
+
+
+def needs_renditions(instance):
+    """True when the stored renditions do not belong to the current upload"""
+    return bool(instance.image) and instance.renditions.get('source') != instance.image.name
+
+
+def queue_renditions(instance):
+    """Schedule rendition generation once the surrounding transaction commits"""
+    from notifications.tasks import generate_image_renditions
+
+    label = instance._meta.label
+    pk = instance.pk
+
+    def enqueue():
+        try:
+            generate_image_renditions.delay(label, pk)
+        except Exception as e:
+            # Backfill with `manage.py generate_image_renditions` if the broker is down
+            logger.error(f"Failed to queue image renditions for {label} {pk}: {e}")
+
+    transaction.on_commit(enqueue)
+
+
+class ResponsiveImageMixin:
+    """Template helpers for models with an ``image`` field and ``renditions`` dict"""
+
+    def rendition_url(self, rendition, image_format='jpeg'):
+        path = (self.renditions.get(rendition) or {}).get(image_format)
+        if path and self.renditions.get('source') == self.image.name:
+            return self.image.storage.url(path)
+        return self.image.url if self.image else ''
+
+    def srcset(self, image_format='jpeg'):
+        if self.renditions.get('source') != self.image.name:
+            return ''
+        candidates = []
+        for rendition in RENDITION_WIDTHS:
+            entry = self.renditions.get(rendition) or {}
+            if entry.get(image_format):
+                candidates.append(f"{self.image.storage.url(entry[image_format])} {entry['width']}w")
+        return ', '.join(candidates)
+
+    @property
+    def webp_srcset(self):
+        return self.srcset('webp')
+
+    @property
+    def jpeg_srcset(self):
+        return self.srcset('jpeg')
+
+    @property
+    def thumb_url(self):
+        return self.rendition_url('thumb')
+
+    @property
+    def card_url(self):
+        return self.rendition_url('card')
+
+    @property
+    def full_url(self):
+        return self.rendition_url('full')
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+
+from notifications.tasks import generate_image_renditions
+from properties.images import needs_renditions
+from properties.models import PropertyImage, RoomPhoto
+
+
+class Command(BaseCommand):
+    help = 'Backfill thumbnail/card/full renditions for existing room and property photos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            choices=['room', 'property', 'all'],
+            default='all',
+            help='Which photos to process',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate renditions even if they are up to date',
+        )
+        parser.add_argument(
+            '--async',
+            action='store_true',
+            dest='run_async',
+            help='Queue Celery tasks instead of rendering in this process',
+        )
+
+    def handle(self, *args, **options):
+        models = {
+            'room': [RoomPhoto],
+            'property': [PropertyImage],
+            'all': [RoomPhoto, PropertyImage],
+        }[options['model']]
+
+        processed = 0
+        failed = 0
+        for model in models:
+            photos = model.objects.exclude(image='').only('pk', 'image', 'renditions')
+            for photo in photos.iterator():
+                if not options['force'] and not needs_renditions(photo):
+                    continue
+
+                if options['run_async']:
+                    generate_image_renditions.delay(model._meta.label, photo.pk)
+                elif not generate_image_renditions(model._meta.label, photo.pk):
+                    failed += 1
+                    self.stdout.write(self.style.WARNING(f'Failed: {model.__name__} {photo.image.name}'))
+                    continue
+                processed += 1
+
+        action = 'Queued' if options['run_async'] else 'Generated'
+        self.stdout.write(self.style.SUCCESS(f'{action} renditions for {processed} photos ({failed} failed)'))
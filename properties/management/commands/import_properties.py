@@ -1,11 +1,23 @@
 import pandas as pd
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
 
-from properties.models import Property
+from properties import search
+from properties.models import Property, Room
+
+
+ROOM_COLUMNS = [
+    'room_code', 'property', 'room_number', 'monthly_rent',
+    'size_sqft', 'has_private_bathroom', 'has_balcony',
+]
+OPTIONAL_ROOM_COLUMNS = ['room_number', 'size_sqft', 'has_private_bathroom', 'has_balcony']
+
+TRUE_VALUES = {'y', 'yes', 'true', '1', 't'}
 
 
 class Command(BaseCommand):
-    help = "Import property data from an Excel file."
+    help = "Import property data (and optionally rooms) from an Excel file."
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -13,49 +25,149 @@ class Command(BaseCommand):
             type=str,
             help="Path to the Excel file containing property data",
         )
+        parser.add_argument(
+            "--rooms-sheet",
+            type=str,
+            help="Sheet with room rows (columns: " + ", ".join(ROOM_COLUMNS) + ")",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Rows per bulk insert/update batch",
+        )
 
     def handle(self, *args, **options):
         excel_path = options["excel_path"]
+        rooms_sheet = options.get("rooms_sheet")
+        batch_size = options["batch_size"]
 
         try:
-            df = pd.read_excel(excel_path)
+            # Single pass over the workbook for every sheet we need
+            sheets = pd.read_excel(excel_path, sheet_name=[0] + ([rooms_sheet] if rooms_sheet else []))
         except Exception as e:
             self.stderr.write(self.style.ERROR(f"Error reading Excel: {e}"))
             return
 
+        df = sheets[0]
+
         # Ensure enough columns exist
         required_columns = [0, 3, 5, 6]  # A, D, F, G
         if any(col >= len(df.columns) for col in required_columns):
             self.stderr.write(self.style.ERROR("Excel file missing required columns."))
             return
 
-        created_count = 0
-        updated_count = 0
-
-        for _, row in df.iterrows():
-            name = row.iloc[0]
-            total_rooms = row.iloc[3]
-            address = row.iloc[5]
-            address_chinese = row.iloc[6]
-
-            if pd.isna(name):
-                continue  # Skip empty rows
-
-            obj, created = Property.objects.update_or_create(
-                name=name,
-                defaults={
-                    "total_rooms": int(total_rooms) if not pd.isna(total_rooms) else 0,
-                    "address": address if not pd.isna(address) else "",
-                    "address_chinese": address_chinese if not pd.isna(address_chinese) else "",
-                    "property_type": "apartment",  # Change if needed
-                },
-            )
+        with transaction.atomic():
+            created_count, updated_count = self.import_properties(df, batch_size)
+            self.stdout.write(self.style.SUCCESS(
+                f"Import completed: {created_count} created, {updated_count} updated."
+            ))
+
+            if rooms_sheet:
+                rooms_created, rooms_updated, skipped = self.import_rooms(sheets[rooms_sheet], batch_size)
+                self.stdout.write(self.style.SUCCESS(
+                    f"Room import completed: {rooms_created} created, {rooms_updated} updated, {skipped} skipped."
+                ))
+
+    def import_properties(self, df, batch_size):
+        """Upsert properties by name: one lookup query plus bulk writes"""
+        rows = df.iloc[:, [0, 3, 5, 6]].copy()
+        rows.columns = ["name", "total_rooms", "address", "address_chinese"]
+
+        # Skip empty rows; later rows win for duplicate names like the old per-row upsert
+        rows = rows[rows["name"].notna()]
+        rows["name"] = rows["name"].astype(str).str.strip()
+        rows = rows[rows["name"] != ""].drop_duplicates("name", keep="last")
+        rows["total_rooms"] = pd.to_numeric(rows["total_rooms"], errors="coerce").fillna(0).astype(int)
+        rows[["address", "address_chinese"]] = rows[["address", "address_chinese"]].fillna("").astype(str)
+
+        existing = {
+            prop.name: prop
+            for prop in Property.objects.filter(name__in=rows["name"].tolist())
+        }
 
-            if created:
-                created_count += 1
+        now = timezone.now()
+        to_create = []
+        to_update = []
+        for row in rows.itertuples(index=False):
+            prop = existing.get(row.name)
+            if prop is None:
+                prop = Property(name=row.name)
+                to_create.append(prop)
             else:
-                updated_count += 1
+                to_update.append(prop)
+            prop.total_rooms = row.total_rooms
+            prop.address = row.address
+            prop.address_chinese = row.address_chinese
+            prop.property_type = "apartment"  # Change if needed
+            prop.updated_at = now
+
+        Property.objects.bulk_create(to_create, batch_size=batch_size)
+        Property.objects.bulk_update(
+            to_update,
+            ["total_rooms", "address", "address_chinese", "property_type", "updated_at"],
+            batch_size=batch_size,
+        )
+        # Bulk writes skip the post_save signals that maintain the search index
+        search.index_properties([prop.pk for prop in to_create + to_update])
+        return len(to_create), len(to_update)
+
+    def import_rooms(self, df, batch_size):
+        """Upsert rooms on the unique room_code with a conflict-updating bulk insert"""
+        df = df.rename(columns=lambda col: str(col).strip().lower().replace(" ", "_"))
+        missing = [col for col in ("room_code", "property", "monthly_rent") if col not in df.columns]
+        if missing:
+            self.stderr.write(self.style.ERROR(f"Rooms sheet missing columns: {', '.join(missing)}"))
+            return 0, 0, len(df)
+
+        rows = df.reindex(columns=ROOM_COLUMNS).copy()
+        total = len(rows)
+        rows = rows[rows["room_code"].notna() & rows["property"].notna()]
+        rows["room_code"] = rows["room_code"].astype(str).str.strip()
+        rows["property"] = rows["property"].astype(str).str.strip()
+        rows["room_number"] = rows["room_number"].fillna(rows["room_code"]).astype(str)
+        rows["monthly_rent"] = pd.to_numeric(rows["monthly_rent"], errors="coerce")
+        rows["size_sqft"] = pd.to_numeric(rows["size_sqft"], errors="coerce").round(2)
+        for flag in ("has_private_bathroom", "has_balcony"):
+            rows[flag] = rows[flag].astype(str).str.strip().str.lower().isin(TRUE_VALUES)
+        rows = rows[rows["monthly_rent"] > 0].drop_duplicates("room_code", keep="last")
+
+        property_ids = dict(
+            Property.objects.filter(name__in=rows["property"].unique().tolist()).values_list("name", "id")
+        )
+        rows = rows[rows["property"].isin(property_ids.keys())]
+
+        existing_codes = set(
+            Room.objects.filter(room_code__in=rows["room_code"].tolist()).values_list("room_code", flat=True)
+        )
+
+        rooms = [
+            Room(
+                property_id=property_ids[row.property],
+                room_code=row.room_code,
+                room_number=row.room_number,
+                monthly_rent=round(row.monthly_rent, 2),
+                size_sqft=None if pd.isna(row.size_sqft) else row.size_sqft,
+                has_private_bathroom=row.has_private_bathroom,
+                has_balcony=row.has_balcony,
+            )
+            for row in rows.itertuples(index=False)
+        ]
+
+        Room.objects.bulk_create(
+            rooms,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=["room_code"],
+            # Columns the sheet does not have keep their current values on existing rooms
+            update_fields=["property", "monthly_rent", "updated_at"] + [
+                col for col in OPTIONAL_ROOM_COLUMNS if col in df.columns
+            ],
+        )
+
+        search.index_rooms(
+            Room.objects.filter(room_code__in=rows["room_code"].tolist()).values_list("pk", flat=True)
+        )
 
-        self.stdout.write(self.style.SUCCESS(
-            f"Import completed: {created_count} created, {updated_count} updated."
-        ))
+        updated = len(existing_codes)
+        return len(rooms) - updated, updated, total - len(rooms)
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from properties import search
+from properties.models import Property, Room
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for rooms and properties'
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            self.stdout.write(self.style.WARNING('Full-text search needs SQLite FTS5; nothing to rebuild.'))
+            return
+
+        search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {Room.objects.count()} rooms and {Property.objects.count()} properties.'
+        ))
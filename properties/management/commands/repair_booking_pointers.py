@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from properties.models import Room
+
+
+class Command(BaseCommand):
+    help = 'Check and repair the denormalised current/next booking pointers on rooms'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report inconsistent rooms, do not fix them',
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.now().date()
+
+        rooms = Room.objects.annotate(
+            expected_current=Room.current_booking_subquery(today),
+            expected_next=Room.next_booking_subquery(today),
+        ).values_list('pk', 'room_code', 'current_booking_id', 'expected_current',
+                      'next_booking_id', 'expected_next')
+
+        stale_ids = []
+        for pk, room_code, current_id, expected_current, next_id, expected_next in rooms:
+            if current_id != expected_current or next_id != expected_next:
+                stale_ids.append(pk)
+                self.stdout.write(self.style.WARNING(
+                    f'{room_code}: current {current_id} → {expected_current}, next {next_id} → {expected_next}'
+                ))
+
+        if not stale_ids:
+            self.stdout.write(self.style.SUCCESS('All room booking pointers are consistent'))
+            return
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{len(stale_ids)} rooms need repair (dry run)'))
+            return
+
+        Room.refresh_booking_pointers(Room.objects.filter(pk__in=stale_ids))
+        self.stdout.write(self.style.SUCCESS(f'Repaired booking pointers for {len(stale_ids)} rooms'))
@@ -1,4 +1,8 @@
+from collections import Counter
+
 from django.core.management.base import BaseCommand
+from django.utils import timezone
+
 from properties.models import Room
 
 
@@ -11,34 +15,65 @@ class Command(BaseCommand):
             type=str,
             help='Sync only a specific room by code',
         )
+        parser.add_argument(
+            '--property',
+            type=str,
+            help='Sync only rooms of a property (id or name)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show the status changes without saving them',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Rooms per bulk_update batch',
+        )
 
     def handle(self, *args, **options):
         room_code = options.get('room_code')
+        property_ref = options.get('property')
+        dry_run = options.get('dry_run')
+        today = timezone.now().date()
 
+        rooms = Room.objects.all()
         if room_code:
-            rooms = Room.objects.filter(room_code=room_code)
-        else:
-            rooms = Room.objects.all()
+            rooms = rooms.filter(room_code=room_code)
+        if property_ref:
+            if property_ref.isdigit():
+                rooms = rooms.filter(property_id=int(property_ref))
+            else:
+                rooms = rooms.filter(property__name=property_ref)
 
-        updated_count = 0
-        total_rooms = rooms.count()
+        # One query: every room with its booking flags computed in SQL
+        room_flags = rooms.annotate(
+            has_active=Room.active_booking_exists(today),
+            has_confirmed=Room.confirmed_booking_exists(today),
+        ).values_list('pk', 'room_code', 'status', 'has_active', 'has_confirmed')
 
-        self.stdout.write(f"Syncing room statuses for {total_rooms} rooms...")
+        total_rooms = 0
+        changed_rooms = []
+        transitions = Counter()
+        now = timezone.now()
 
-        for room in rooms:
-            old_status = room.status
-            room.update_status_from_bookings()
+        for pk, code, status, has_active, has_confirmed in room_flags.iterator():
+            total_rooms += 1
+            target = Room.status_from_bookings(status, has_active, has_confirmed)
+            if target != status:
+                changed_rooms.append(Room(pk=pk, room_code=code, status=target, updated_at=now))
+                transitions[(status, target)] += 1
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'{code}: {status} → {target}')
 
-            if room.status != old_status:
-                updated_count += 1
-                self.stdout.write(
-                    self.style.SUCCESS(f'Updated {room.room_code}: {old_status} → {room.status}')
-                )
-            else:
-                self.stdout.write(
-                    self.style.WARNING(f'No change for {room.room_code}: {old_status}')
-                )
+        if changed_rooms and not dry_run:
+            Room.objects.bulk_update(changed_rooms, ['status', 'updated_at'], batch_size=options['batch_size'])
+
+        for (old_status, new_status), count in sorted(transitions.items()):
+            self.stdout.write(f'  {old_status} → {new_status}: {count}')
 
+        prefix = '[dry run] Would update' if dry_run else 'Successfully updated'
         self.stdout.write(
-            self.style.SUCCESS(f'Successfully updated {updated_count} rooms out of {total_rooms}')
-        )
\ No newline at end of file
+            self.style.SUCCESS(f'{prefix} {len(changed_rooms)} rooms out of {total_rooms}')
+        )
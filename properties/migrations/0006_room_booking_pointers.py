@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+
+def populate_booking_pointers(apps, schema_editor):
+    Room = apps.get_model('properties', 'Room')
+    Booking = apps.get_model('bookings', 'Booking')
+    today = timezone.now().date()
+
+    Room.objects.update(
+        current_booking=Subquery(
+            Booking.objects.filter(
+                room=OuterRef('pk'),
+                status='active',
+                move_in_date__lte=today,
+                move_out_date__gte=today
+            ).order_by('-booking_date').values('pk')[:1]
+        ),
+        next_booking=Subquery(
+            Booking.objects.filter(
+                room=OuterRef('pk'),
+                status='confirmed',
+                move_in_date__gte=today
+            ).order_by('move_in_date', 'pk').values('pk')[:1]
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_booking_hkid_number_booking_key_deposit_and_more'),
+        ('properties', '0005_propertyimage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='room',
+            name='current_booking',
+            field=models.ForeignKey(blank=True, editable=False, help_text='Active booking covering today', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='bookings.booking'),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='next_booking',
+            field=models.ForeignKey(blank=True, editable=False, help_text='Next confirmed booking moving in', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='bookings.booking'),
+        ),
+        migrations.RunPython(populate_booking_pointers, migrations.RunPython.noop),
+    ]
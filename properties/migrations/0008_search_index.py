@@ -0,0 +1,87 @@
+import re
+
+from django.db import migrations
+
+# Frozen copy of the FTS5 tables and tokenizer as they were introduced. properties.search is for runtime
+# use only, so later changes there never change what this migration does.
+TOKENIZER = "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'"
+CREATE_TABLES = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS properties_room_search USING fts5("
+    f"room_code, room_number, description, property_name, address, address_chinese, {TOKENIZER})",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS properties_property_search USING fts5("
+    f"name, address, address_chinese, {TOKENIZER})",
+]
+DROP_TABLES = [
+    "DROP TABLE IF EXISTS properties_room_search",
+    "DROP TABLE IF EXISTS properties_property_search",
+]
+INSERT_ROOM = (
+    "INSERT INTO properties_room_search(rowid, room_code, room_number, description, "
+    "property_name, address, address_chinese) VALUES (%s, %s, %s, %s, %s, %s, %s)"
+)
+INSERT_PROPERTY = (
+    "INSERT INTO properties_property_search(rowid, name, address, address_chinese) VALUES (%s, %s, %s, %s)"
+)
+
+CJK_RUN = re.compile('[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+')
+BATCH_SIZE = 500
+
+
+def _ngrams(match):
+    run = match.group()
+    if len(run) == 1:
+        return f' {run} '
+    return ' ' + ' '.join(list(run) + [run[i:i + 2] for i in range(len(run) - 1)]) + ' '
+
+
+def _text(value):
+    """CJK runs expanded to unigrams plus bigrams, as the index stores them"""
+    return CJK_RUN.sub(_ngrams, str(value)) if value else ''
+
+
+def _insert(cursor, sql, rows):
+    batch = []
+    for row in rows:
+        batch.append([row[0], *(_text(value) for value in row[1:])])
+        if len(batch) >= BATCH_SIZE:
+            cursor.executemany(sql, batch)
+            batch = []
+    if batch:
+        cursor.executemany(sql, batch)
+
+
+def create_search_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Room = apps.get_model('properties', 'Room')
+    Property = apps.get_model('properties', 'Property')
+
+    with schema_editor.connection.cursor() as cursor:
+        for sql in CREATE_TABLES:
+            cursor.execute(sql)
+        _insert(cursor, INSERT_ROOM, Room.objects.values_list(
+            'id', 'room_code', 'room_number', 'description',
+            'property__name', 'property__address', 'property__address_chinese',
+        ).iterator(chunk_size=2000))
+        _insert(cursor, INSERT_PROPERTY, Property.objects.values_list(
+            'id', 'name', 'address', 'address_chinese',
+        ).iterator(chunk_size=2000))
+
+
+def drop_search_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for sql in DROP_TABLES:
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0007_image_renditions'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_tables, drop_search_tables),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:59
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0008_search_index'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='roomphoto',
+            options={'ordering': ['uploaded_at', 'pk']},
+        ),
+    ]
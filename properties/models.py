@@ -1,9 +1,15 @@
 from datetime import timedelta
 from django.db import models
+from django.db.models import Exists, OuterRef, Prefetch, Subquery
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 from django.utils import timezone
 
+from . import search
+from .images import ResponsiveImageMixin, delete_renditions, needs_renditions, queue_renditions
+
 
 class Property(models.Model):
     PROPERTY_TYPES = [
@@ -22,41 +28,70 @@ class Property(models.Model):
     def __str__(self):
         return f"{self.name} - {self.get_property_type_display()}"
 
+    @staticmethod
+    def images_prefetch(prefix=''):
+        """Prefetch for property images, e.g. prefetch_related(Property.images_prefetch('property__'))"""
+        return Prefetch(f'{prefix}property_images', queryset=PropertyImage.objects.all())
+
+    def get_images_by_type(self):
+        """All property images grouped by image type, primary image first.
+
+        Served from the prefetch cache when available, otherwise loaded with
+        a single query and cached on the instance.
+        """
+        if getattr(self, '_images_by_type', None) is None:
+            grouped = {image_type: [] for image_type, _ in PropertyImage.IMAGE_TYPES}
+            images = sorted(
+                self.property_images.all(),
+                key=lambda image: (not image.is_primary, image.uploaded_at, image.pk)
+            )
+            for image in images:
+                grouped.setdefault(image.image_type, []).append(image)
+            self._images_by_type = grouped
+        return self._images_by_type
+
+    def _get_images(self, image_type):
+        return self.get_images_by_type().get(image_type, [])
+
+    def _get_main_image(self, image_type):
+        images = self._get_images(image_type)
+        return images[0] if images else None
+
     def get_kitchen_images(self):
         """Get all kitchen images for this property"""
-        return self.property_images.filter(image_type='kitchen')
+        return self._get_images('kitchen')
 
     def get_living_room_images(self):
         """Get all living room images for this property"""
-        return self.property_images.filter(image_type='living_room')
+        return self._get_images('living_room')
 
     def get_toilet_images(self):
         """Get all toilet images for this property"""
-        return self.property_images.filter(image_type='toilet')
+        return self._get_images('toilet')
 
     def get_street_level_images(self):
         """Get all street level images for this property"""
-        return self.property_images.filter(image_type='street_level')
+        return self._get_images('street_level')
 
     def get_other_images(self):
         """Get all other property images"""
-        return self.property_images.filter(image_type='other')
+        return self._get_images('other')
 
     def get_main_kitchen_image(self):
         """Get the first kitchen image (useful for thumbnails)"""
-        return self.property_images.filter(image_type='kitchen').first()
+        return self._get_main_image('kitchen')
 
     def get_main_living_room_image(self):
         """Get the first living room image"""
-        return self.property_images.filter(image_type='living_room').first()
+        return self._get_main_image('living_room')
 
     def get_main_toilet_image(self):
         """Get the first toilet image"""
-        return self.property_images.filter(image_type='toilet').first()
+        return self._get_main_image('toilet')
 
     def get_main_street_level_image(self):
         """Get the first street level image"""
-        return self.property_images.filter(image_type='street_level').first()
+        return self._get_main_image('street_level')
 
 
 def property_image_upload_path(instance, filename):
@@ -64,7 +99,7 @@ def property_image_upload_path(instance, filename):
     return f"properties/{instance.property.name}/images/{instance.image_type}/{filename}"
 
 
-class PropertyImage(models.Model):
+class PropertyImage(ResponsiveImageMixin, models.Model):
     IMAGE_TYPES = [
         ('kitchen', 'Kitchen'),
         ('living_room', 'Living Room'),
@@ -78,6 +113,7 @@ class PropertyImage(models.Model):
     image_type = models.CharField(max_length=20, choices=IMAGE_TYPES)
     caption = models.CharField(max_length=200, blank=True, null=True)
     is_primary = models.BooleanField(default=False, help_text="Mark as primary image for this type")
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -124,15 +160,40 @@ class Room(models.Model):
     has_private_bathroom = models.BooleanField(default=False)
     has_balcony = models.BooleanField(default=False)
 
+    # Denormalised booking pointers, maintained by booking signals and the
+    # daily refresh task so room lists can select_related the tenant
+    current_booking = models.ForeignKey(
+        'bookings.Booking', on_delete=models.SET_NULL,
+        null=True, blank=True, related_name='+', editable=False,
+        help_text="Active booking covering today"
+    )
+    next_booking = models.ForeignKey(
+        'bookings.Booking', on_delete=models.SET_NULL,
+        null=True, blank=True, related_name='+', editable=False,
+        help_text="Next confirmed booking moving in"
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    BOOKING_POINTER_FIELDS = ('current_booking', 'next_booking')
+
     class Meta:
         ordering = ['room_code']
 
     def __str__(self):
         return f"{self.room_code} - {self.property.name}"
 
+    def save(self, *args, **kwargs):
+        # Booking pointers are only written by refresh_booking_pointers(), so a
+        # stale instance saved elsewhere must not overwrite them
+        if not self._state.adding and not kwargs.get('update_fields') and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.BOOKING_POINTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     def get_absolute_url(self):
         """URL for individual room pages - Requirement #6"""
         from django.urls import reverse
@@ -154,6 +215,86 @@ class Room(models.Model):
         except:
             return None
 
+    @staticmethod
+    def current_booking_subquery(today):
+        """Subquery selecting the active booking of the outer room for today"""
+        from bookings.models import Booking
+        return Subquery(
+            Booking.objects.filter(
+                room=OuterRef('pk'),
+                status='active',
+                move_in_date__lte=today,
+                move_out_date__gte=today
+            ).order_by('-booking_date').values('pk')[:1]
+        )
+
+    @staticmethod
+    def next_booking_subquery(today):
+        """Subquery selecting the next confirmed booking of the outer room"""
+        from bookings.models import Booking
+        return Subquery(
+            Booking.objects.filter(
+                room=OuterRef('pk'),
+                status='confirmed',
+                move_in_date__gte=today
+            ).order_by('move_in_date', 'pk').values('pk')[:1]
+        )
+
+    @classmethod
+    def refresh_booking_pointers(cls, rooms=None):
+        """Recompute current/next booking pointers for many rooms in one UPDATE"""
+        today = timezone.now().date()
+        if rooms is None:
+            rooms = cls.objects.all()
+        return rooms.update(
+            current_booking=cls.current_booking_subquery(today),
+            next_booking=cls.next_booking_subquery(today),
+        )
+
+    def sync_booking_pointers(self):
+        """Refresh this room's booking pointers and reload them on the instance"""
+        Room.refresh_booking_pointers(Room.objects.filter(pk=self.pk))
+        self.refresh_from_db(fields=list(self.BOOKING_POINTER_FIELDS))
+
+    @staticmethod
+    def status_from_bookings(current_status, has_active_booking, has_confirmed_booking):
+        """Target room status given the room's booking flags"""
+        if has_active_booking:
+            return 'occupied'
+        if has_confirmed_booking:
+            return 'reserved'
+        if current_status in ['occupied', 'reserved']:
+            # Only change to available if it was previously occupied/reserved
+            return 'available'
+        # Don't change maintenance/cleaning/temporary statuses
+        return current_status
+
+    @staticmethod
+    def active_booking_exists(today):
+        """Exists() over active bookings of the outer room covering today"""
+        from bookings.models import Booking
+        return Exists(Booking.objects.filter(
+            room=OuterRef('pk'),
+            status='active',
+            move_in_date__lte=today,
+            move_out_date__gte=today
+        ))
+
+    @staticmethod
+    def confirmed_booking_exists(today):
+        """Exists() over confirmed (upcoming) bookings of the outer room"""
+        from bookings.models import Booking
+        return Exists(Booking.objects.filter(
+            room=OuterRef('pk'),
+            status='confirmed',
+            move_in_date__gte=today
+        ))
+
+    def get_cover_photo(self):
+        """First room photo, served from the prefetch cache when available"""
+        photos = self.room_photos.all()
+        return photos[0] if photos else None
+
     def update_status_from_bookings(self):
         """Update room status based on current bookings"""
         today = timezone.now().date()
@@ -171,15 +312,7 @@ class Room(models.Model):
             move_in_date__gte=today
         ).exists()
 
-        if active_booking:
-            self.status = 'occupied'
-        elif confirmed_booking:
-            self.status = 'reserved'
-        elif self.status in ['occupied', 'reserved']:
-            # Only change to available if it was previously occupied/reserved
-            self.status = 'available'
-        # Don't change maintenance/cleaning/temporary statuses
-
+        self.status = self.status_from_bookings(self.status, active_booking, confirmed_booking)
         self.save()
 
     def needs_rent_increase_notice(self):
@@ -217,15 +350,61 @@ def room_photo_upload_path(instance, filename):
 def room_video_upload_path(instance, filename):
     return f"rooms/{instance.room.room_code}/videos/{filename}"
 
-class RoomPhoto(models.Model):
+class RoomPhoto(ResponsiveImageMixin, models.Model):
     room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="room_photos")
     image = models.ImageField(upload_to=room_photo_upload_path)
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # The first photo is the room's cover
+        ordering = ['uploaded_at', 'pk']
+
     def __str__(self):
         return f"Photo for {self.room.room_code}"
 
 
+@receiver(post_save, sender=RoomPhoto)
+@receiver(post_save, sender=PropertyImage)
+def queue_image_renditions_on_upload(sender, instance, **kwargs):
+    """Generate thumbnail/card/full renditions in the background after upload"""
+    if needs_renditions(instance):
+        queue_renditions(instance)
+
+
+@receiver(post_delete, sender=RoomPhoto)
+@receiver(post_delete, sender=PropertyImage)
+def delete_image_renditions(sender, instance, **kwargs):
+    """Remove rendition files together with the photo"""
+    delete_renditions(instance)
+
+
+@receiver(post_save, sender=Room)
+def index_room_for_search(sender, instance, update_fields=None, **kwargs):
+    """Keep the room's full-text search row in sync"""
+    if update_fields and not search.ROOM_INDEXED_FIELDS & set(update_fields):
+        return
+    search.index_rooms([instance.pk])
+
+
+@receiver(post_delete, sender=Room)
+def remove_room_from_search(sender, instance, **kwargs):
+    search.remove_rooms([instance.pk])
+
+
+@receiver(post_save, sender=Property)
+def index_property_for_search(sender, instance, update_fields=None, **kwargs):
+    """Reindex the property and its rooms, which carry its name and addresses"""
+    if update_fields and not search.PROPERTY_INDEXED_FIELDS & set(update_fields):
+        return
+    search.index_properties([instance.pk])
+
+
+@receiver(post_delete, sender=Property)
+def remove_property_from_search(sender, instance, **kwargs):
+    search.remove_properties([instance.pk])
+
+
 class RoomVideo(models.Model):
     room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="room_videos")
     video = models.FileField(upload_to=room_video_upload_path)
@@ -0,0 +1,216 @@
+"""Full-text search over rooms and properties backed by SQLite FTS5.
+
+Two external FTS5 tables are kept in sync by signals in ``models.py``:
+
+* ``properties_room_search`` - one row per room (rowid = room id) with the
+  room's own text plus its property's name and addresses, so a query such
+  as ``"mong kok balcony"`` can match across both.
+* ``properties_property_search`` - one row per property (rowid = property id).
+
+FTS5's ``unicode61`` tokenizer keeps a run of Chinese characters as a
+single token, so CJK text is indexed as unigrams plus bigrams
+(``彌敦道`` -> ``彌 敦 道 彌敦 敦道``). A one-character query matches a
+unigram and a longer one becomes a phrase of consecutive bigrams.
+
+On databases other than SQLite the search helpers fall back to
+``icontains`` lookups.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+ROOM_TABLE = 'properties_room_search'
+PROPERTY_TABLE = 'properties_property_search'
+
+CJK = '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+CJK_RUN = re.compile(f'[{CJK}]+')
+QUERY_TOKEN = re.compile(f'([{CJK}]+)|([^\\W_{CJK}]+)')
+
+# Room/Property fields that appear in the index; saves touching none of them skip reindexing
+ROOM_INDEXED_FIELDS = {'room_code', 'room_number', 'description', 'property'}
+PROPERTY_INDEXED_FIELDS = {'name', 'address', 'address_chinese'}
+
+FALLBACK_ROOM_FIELDS = [
+    'room_code', 'room_number', 'description',
+    'property__name', 'property__address', 'property__address_chinese',
+]
+FALLBACK_PROPERTY_FIELDS = ['name', 'address', 'address_chinese']
+
+TOKENIZER = "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'"
+
+ROOM_SELECT = """
+    SELECT r.id, search_text(r.room_code), search_text(r.room_number), search_text(r.description),
+           search_text(p.name), search_text(p.address), search_text(p.address_chinese)
+    FROM properties_room r
+    JOIN properties_property p ON p.id = r.property_id
+"""
+PROPERTY_SELECT = """
+    SELECT p.id, search_text(p.name), search_text(p.address), search_text(p.address_chinese)
+    FROM properties_property p
+"""
+
+# Stay well below SQLite's bound-parameter limit
+CHUNK_SIZE = 500
+
+
+def cjk_ngrams(run):
+    """Unigrams followed by bigrams of a run of CJK characters"""
+    if len(run) == 1:
+        return run
+    return ' '.join(list(run) + [run[i:i + 2] for i in range(len(run) - 1)])
+
+
+def search_text(value):
+    """Text as stored in the index: CJK runs expanded to n-grams"""
+    if not value:
+        return ''
+    return CJK_RUN.sub(lambda match: f' {cjk_ngrams(match.group())} ', str(value))
+
+
+def build_match_query(query):
+    """Turn free text into an FTS5 MATCH expression (all terms required)"""
+    terms = []
+    for cjk, word in QUERY_TOKEN.findall(query or ''):
+        if cjk:
+            if len(cjk) == 1:
+                terms.append(f'"{cjk}"')
+            else:
+                terms.append('"' + ' '.join(cjk[i:i + 2] for i in range(len(cjk) - 1)) + '"')
+        else:
+            terms.append(f'"{word}"*')
+    return ' '.join(terms)
+
+
+def is_available(conn=None):
+    """FTS5 tables only exist on SQLite"""
+    return (conn or connection).vendor == 'sqlite'
+
+
+def _cursor(conn=None):
+    conn = conn or connection
+    conn.ensure_connection()
+    conn.connection.create_function('search_text', 1, search_text, deterministic=True)
+    return conn.cursor()
+
+
+def _chunks(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), CHUNK_SIZE):
+        chunk = ids[start:start + CHUNK_SIZE]
+        yield chunk, ', '.join(['%s'] * len(chunk))
+
+
+def create_tables(conn=None):
+    """Create the FTS5 tables and fill them from the current data"""
+    with _cursor(conn) as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {ROOM_TABLE} USING fts5("
+            f"room_code, room_number, description, property_name, address, address_chinese, {TOKENIZER})"
+        )
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {PROPERTY_TABLE} USING fts5("
+            f"name, address, address_chinese, {TOKENIZER})"
+        )
+    rebuild_index(conn)
+
+
+def drop_tables(conn=None):
+    """Drop both FTS5 tables"""
+    with _cursor(conn) as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {ROOM_TABLE}")
+        cursor.execute(f"DROP TABLE IF EXISTS {PROPERTY_TABLE}")
+
+
+def rebuild_index(conn=None):
+    """Re-populate both tables from scratch with one INSERT ... SELECT each"""
+    if not is_available(conn):
+        return
+    with _cursor(conn) as cursor:
+        cursor.execute(f"DELETE FROM {ROOM_TABLE}")
+        cursor.execute(f"INSERT INTO {ROOM_TABLE}(rowid, room_code, room_number, description, "
+                       f"property_name, address, address_chinese) {ROOM_SELECT}")
+        cursor.execute(f"DELETE FROM {PROPERTY_TABLE}")
+        cursor.execute(f"INSERT INTO {PROPERTY_TABLE}(rowid, name, address, address_chinese) {PROPERTY_SELECT}")
+        cursor.execute(f"INSERT INTO {ROOM_TABLE}({ROOM_TABLE}) VALUES('optimize')")
+        cursor.execute(f"INSERT INTO {PROPERTY_TABLE}({PROPERTY_TABLE}) VALUES('optimize')")
+
+
+def index_rooms(room_ids):
+    """(Re)index the given rooms"""
+    if not is_available():
+        return
+    with _cursor() as cursor:
+        for chunk, placeholders in _chunks(room_ids):
+            cursor.execute(f"DELETE FROM {ROOM_TABLE} WHERE rowid IN ({placeholders})", chunk)
+            cursor.execute(f"INSERT INTO {ROOM_TABLE}(rowid, room_code, room_number, description, "
+                           f"property_name, address, address_chinese) {ROOM_SELECT} "
+                           f"WHERE r.id IN ({placeholders})", chunk)
+
+
+def index_properties(property_ids):
+    """(Re)index the given properties and every room in them"""
+    if not is_available():
+        return
+    with _cursor() as cursor:
+        for chunk, placeholders in _chunks(property_ids):
+            cursor.execute(f"DELETE FROM {PROPERTY_TABLE} WHERE rowid IN ({placeholders})", chunk)
+            cursor.execute(f"INSERT INTO {PROPERTY_TABLE}(rowid, name, address, address_chinese) "
+                           f"{PROPERTY_SELECT} WHERE p.id IN ({placeholders})", chunk)
+            cursor.execute(f"DELETE FROM {ROOM_TABLE} WHERE rowid IN "
+                           f"(SELECT id FROM properties_room WHERE property_id IN ({placeholders}))", chunk)
+            cursor.execute(f"INSERT INTO {ROOM_TABLE}(rowid, room_code, room_number, description, "
+                           f"property_name, address, address_chinese) {ROOM_SELECT} "
+                           f"WHERE r.property_id IN ({placeholders})", chunk)
+
+
+def remove_rooms(room_ids):
+    """Drop the given rooms from the index"""
+    if not is_available():
+        return
+    with _cursor() as cursor:
+        for chunk, placeholders in _chunks(room_ids):
+            cursor.execute(f"DELETE FROM {ROOM_TABLE} WHERE rowid IN ({placeholders})", chunk)
+
+
+def remove_properties(property_ids):
+    """Drop the given properties from the index"""
+    if not is_available():
+        return
+    with _cursor() as cursor:
+        for chunk, placeholders in _chunks(property_ids):
+            cursor.execute(f"DELETE FROM {PROPERTY_TABLE} WHERE rowid IN ({placeholders})", chunk)
+
+
+def _fallback_q(query, fields):
+    condition = Q()
+    for term in query.split():
+        term_q = Q()
+        for field in fields:
+            term_q |= Q(**{f'{field}__icontains': term})
+        condition &= term_q
+    return condition
+
+
+def _search(queryset, query, table, fallback_fields):
+    query = (query or '').strip()
+    if not query:
+        return queryset
+    if not is_available():
+        return queryset.filter(_fallback_q(query, fallback_fields))
+
+    match = build_match_query(query)
+    if not match:
+        return queryset.none()
+    return queryset.filter(pk__in=RawSQL(f"SELECT rowid FROM {table} WHERE {table} MATCH %s", [match]))
+
+
+def search_rooms(queryset, query):
+    """Filter a Room queryset to rooms matching every term of ``query``"""
+    return _search(queryset, query, ROOM_TABLE, FALLBACK_ROOM_FIELDS)
+
+
+def search_properties(queryset, query):
+    """Filter a Property queryset to properties matching every term of ``query``"""
+    return _search(queryset, query, PROPERTY_TABLE, FALLBACK_PROPERTY_FIELDS)
@@ -0,0 +1,83 @@
+import io
+import pytest
+from PIL import Image
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+
+from properties.images import rendition_paths
+from properties.models import Property, Room, RoomPhoto
+
+
+def make_jpeg(width=2000, height=1000, name="photo.jpg"):
+    exif = Image.Exif()
+    exif[0x010F] = "CameraMaker"
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "red").save(buffer, "JPEG", exif=exif)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    return tmp_path
+
+
+@pytest.mark.django_db
+class TestImageRenditions:
+
+    def setup_method(self):
+        self.property = Property.objects.create(name="Pics", address="Addr", property_type="apartment", total_rooms=1)
+        self.room = Room.objects.create(property=self.property, room_code="R1", room_number="1", monthly_rent=4000)
+
+    def test_backfill_generates_stripped_renditions(self, media_root):
+        photo = RoomPhoto.objects.create(room=self.room, image=make_jpeg())
+        assert photo.srcset() == ''
+        assert photo.card_url == photo.image.url
+
+        call_command('generate_image_renditions', '--model', 'room')
+        photo.refresh_from_db()
+
+        assert photo.renditions['source'] == photo.image.name
+        assert [photo.renditions[name]['width'] for name in ('thumb', 'card', 'full')] == [320, 640, 1600]
+        with Image.open(media_root / photo.renditions['card']['jpeg']) as card:
+            assert card.size == (640, 320)
+            assert not card.getexif()
+        with Image.open(media_root / photo.renditions['thumb']['webp']) as thumb:
+            assert thumb.format == 'WEBP'
+
+        assert photo.webp_srcset.endswith('_full.webp 1600w')
+        assert photo.thumb_url.endswith('_thumb.jpg')
+
+    def test_small_images_are_not_upscaled(self, media_root):
+        photo = RoomPhoto.objects.create(room=self.room, image=make_jpeg(500, 400))
+
+        call_command('generate_image_renditions')
+        photo.refresh_from_db()
+
+        assert photo.renditions['thumb']['width'] == 320
+        assert photo.renditions['card']['width'] == 500
+        assert photo.renditions['full']['width'] == 500
+
+    def test_replacing_the_image_deletes_the_old_renditions(self, media_root):
+        photo = RoomPhoto.objects.create(room=self.room, image=make_jpeg())
+        call_command('generate_image_renditions')
+        photo.refresh_from_db()
+        old_paths = rendition_paths(photo.renditions)
+        assert all((media_root / path).exists() for path in old_paths)
+
+        photo.image = make_jpeg(name="new.jpg")
+        photo.save()
+        call_command('generate_image_renditions')
+        photo.refresh_from_db()
+
+        assert photo.renditions['source'] == photo.image.name
+        assert not any((media_root / path).exists() for path in old_paths)
+        assert all((media_root / path).exists() for path in rendition_paths(photo.renditions))
+
+    def test_cover_photo_is_the_first_uploaded(self, media_root):
+        first = RoomPhoto.objects.create(room=self.room, image=make_jpeg(100, 100))
+        RoomPhoto.objects.create(room=self.room, image=make_jpeg(100, 100))
+
+        assert self.room.get_cover_photo() == first
+        room = Room.objects.prefetch_related('room_photos').get(pk=self.room.pk)
+        assert room.get_cover_photo() == first
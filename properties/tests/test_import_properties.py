@@ -0,0 +1,61 @@
+import pytest
+import pandas as pd
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+
+from properties.models import Property, Room
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    path = tmp_path / "properties.xlsx"
+    properties = pd.DataFrame([
+        ["C5", "F", "L", 4, "PW", "Flat A, Causeway Bay", "銅鑼灣A室"],
+        [None, None, None, None, None, None, None],
+        ["C7", "F", "L", 5, "key", "7/F, Hennessy Road", None],
+    ], columns=["Loc", "F/S", "L/W", "R", "PW", "Address", "Chinese"])
+    rooms = pd.DataFrame([
+        {"Room Code": "c5a", "Property": "C5", "Monthly Rent": 4200, "Size Sqft": 80.5, "Has Balcony": "Y"},
+        {"Room Code": "c5b", "Property": "C5", "Monthly Rent": 3900, "Has Private Bathroom": "yes"},
+        {"Room Code": "x1", "Property": "Unknown", "Monthly Rent": 3000},
+    ])
+    with pd.ExcelWriter(path) as writer:
+        properties.to_excel(writer, sheet_name="Properties", index=False)
+        rooms.to_excel(writer, sheet_name="Rooms", index=False)
+    return path
+
+
+@pytest.mark.django_db
+class TestImportPropertiesCommand:
+
+    def test_bulk_upsert_properties_and_rooms(self, workbook):
+        Property.objects.create(name="C7", address="Old", property_type="building", total_rooms=1)
+        existing = Property.objects.create(name="C5", address="Old", property_type="apartment", total_rooms=1)
+        Room.objects.create(property=existing, room_code="c5a", room_number="A", monthly_rent=1000)
+
+        out = StringIO()
+        call_command("import_properties", str(workbook), "--rooms-sheet", "Rooms", stdout=out)
+
+        assert "0 created, 2 updated" in out.getvalue()
+        assert "1 created, 1 updated, 1 skipped" in out.getvalue()
+
+        c7 = Property.objects.get(name="C7")
+        assert c7.total_rooms == 5
+        assert c7.address_chinese == ""
+
+        c5a = Room.objects.get(room_code="c5a")
+        assert c5a.monthly_rent == Decimal("4200.00")
+        assert c5a.size_sqft == Decimal("80.50")
+        assert c5a.has_balcony and not c5a.has_private_bathroom
+        assert c5a.room_number == "A"  # no Room Number column, so the existing value is kept
+        assert Room.objects.get(room_code="c5b").room_number == "c5b"
+        assert Room.objects.get(room_code="c5b").has_private_bathroom
+        assert not Room.objects.filter(room_code="x1").exists()
+
+    def test_properties_only(self, workbook):
+        out = StringIO()
+        call_command("import_properties", str(workbook), stdout=out)
+
+        assert "2 created, 0 updated" in out.getvalue()
+        assert Room.objects.count() == 0
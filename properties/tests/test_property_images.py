@@ -0,0 +1,41 @@
+import pytest
+
+from properties.models import Property, PropertyImage
+
+
+@pytest.mark.django_db
+class TestPropertyImageAccessors:
+
+    def setup_method(self):
+        self.property = Property.objects.create(name="Gallery", address="Addr", property_type="apartment", total_rooms=1)
+        self.kitchen = PropertyImage.objects.create(property=self.property, image="k1.jpg", image_type='kitchen')
+        self.kitchen_primary = PropertyImage.objects.create(
+            property=self.property, image="k2.jpg", image_type='kitchen', is_primary=True
+        )
+        self.toilet = PropertyImage.objects.create(property=self.property, image="t1.jpg", image_type='toilet')
+
+    def test_grouping_puts_primary_first(self):
+        prop = Property.objects.get(pk=self.property.pk)
+
+        assert prop.get_kitchen_images() == [self.kitchen_primary, self.kitchen]
+        assert prop.get_main_kitchen_image() == self.kitchen_primary
+        assert prop.get_toilet_images() == [self.toilet]
+        assert prop.get_living_room_images() == []
+        assert prop.get_main_street_level_image() is None
+
+    def test_accessors_share_one_query(self, django_assert_num_queries):
+        prop = Property.objects.get(pk=self.property.pk)
+
+        with django_assert_num_queries(1):
+            prop.get_kitchen_images()
+            prop.get_main_toilet_image()
+            prop.get_other_images()
+
+    def test_prefetch_serves_many_properties(self, django_assert_num_queries):
+        Property.objects.create(name="Empty", address="Addr", property_type="apartment", total_rooms=1)
+
+        with django_assert_num_queries(2):
+            properties = list(Property.objects.prefetch_related(Property.images_prefetch()))
+            for prop in properties:
+                prop.get_main_kitchen_image()
+                prop.get_toilet_images()
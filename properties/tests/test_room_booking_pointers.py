@@ -0,0 +1,88 @@
+import pytest
+from datetime import timedelta
+from django.core.management import call_command
+from django.utils import timezone
+from django.contrib.auth.models import User
+
+from tenants.models import Tenant
+from properties.models import Property, Room
+from bookings.models import Booking
+
+
+@pytest.mark.django_db
+class TestRoomBookingPointers:
+
+    def setup_method(self):
+        self.user = User.objects.create_user(username="bob", email="bob@example.com", password="pass")
+        self.tenant = Tenant.objects.create(
+            user=self.user,
+            full_name="Bob",
+            nationality="Country",
+            date_of_birth="1990-03-03",
+            gender="male",
+            phone_number="444555666"
+        )
+        self.property = Property.objects.create(name="Prop", address="Addr", property_type="apartment", total_rooms=2)
+        self.room = Room.objects.create(
+            property=self.property,
+            room_code="P1",
+            room_number="1",
+            monthly_rent=4000
+        )
+
+    def create_booking(self, **kwargs):
+        today = timezone.now().date()
+        defaults = dict(
+            tenant=self.tenant,
+            room=self.room,
+            move_in_date=today,
+            move_out_date=today + timedelta(days=10),
+            duration_months=1,
+            monthly_rent=4000,
+            status='active'
+        )
+        defaults.update(kwargs)
+        return Booking.objects.create(**defaults)
+
+    def test_pointers_follow_booking_signals(self):
+        today = timezone.now().date()
+        current = self.create_booking()
+        upcoming = self.create_booking(
+            status='confirmed', move_in_date=today + timedelta(days=20), move_out_date=today + timedelta(days=50)
+        )
+
+        self.room.refresh_from_db()
+        assert self.room.current_booking == current
+        assert self.room.next_booking == upcoming
+
+        current.status = 'completed'
+        current.save()
+        self.room.refresh_from_db()
+        assert self.room.current_booking is None
+
+        upcoming.delete()
+        self.room.refresh_from_db()
+        assert self.room.next_booking is None
+
+    def test_stale_room_save_keeps_pointers(self):
+        stale_room = Room.objects.get(pk=self.room.pk)
+        booking = self.create_booking()
+
+        stale_room.description = "Updated"
+        stale_room.save()
+
+        self.room.refresh_from_db()
+        assert self.room.description == "Updated"
+        assert self.room.current_booking == booking
+
+    def test_repair_command_fixes_drift(self):
+        booking = self.create_booking()
+        Room.objects.filter(pk=self.room.pk).update(current_booking=None)
+
+        call_command('repair_booking_pointers', '--dry-run')
+        self.room.refresh_from_db()
+        assert self.room.current_booking is None
+
+        call_command('repair_booking_pointers')
+        self.room.refresh_from_db()
+        assert self.room.current_booking == booking
@@ -0,0 +1,92 @@
+import importlib
+from types import SimpleNamespace
+
+import pytest
+from django.apps import apps as django_apps
+from django.core.management import call_command
+from django.db import connection
+
+from properties import search
+from properties.models import Property, Room
+
+
+@pytest.mark.django_db
+class TestRoomSearch:
+
+    def setup_method(self):
+        self.property = Property.objects.create(
+            name="Nathan Court",
+            address="123 Nathan Road, Mong Kok",
+            address_chinese="九龍旺角彌敦道123號",
+            property_type="apartment",
+            total_rooms=2,
+        )
+        self.room = Room.objects.create(
+            property=self.property, room_code="NC1", room_number="1",
+            monthly_rent=5000, description="Bright room with balcony",
+        )
+        self.other = Room.objects.create(
+            property=Property.objects.create(name="Harbour View", address="8 Queen's Road", property_type="building", total_rooms=1),
+            room_code="HV1", room_number="1", monthly_rent=6000, description="Quiet room",
+        )
+
+    def search(self, query):
+        return set(search.search_rooms(Room.objects.all(), query).values_list('room_code', flat=True))
+
+    def test_terms_match_across_room_and_property_fields(self):
+        assert self.search("nathan balcony") == {"NC1"}
+        assert self.search("bal") == {"NC1"}
+        assert self.search("room") == {"NC1", "HV1"}
+        assert self.search("queen balcony") == set()
+
+    def test_chinese_address_matches_words_and_single_characters(self):
+        assert self.search("彌敦道") == {"NC1"}
+        assert self.search("旺角") == {"NC1"}
+        assert self.search("旺") == {"NC1"}
+        assert self.search("彌道") == set()
+
+    def test_index_follows_saves_and_deletes(self):
+        self.property.name = "Kowloon Heights"
+        self.property.save()
+        assert self.search("kowloon") == {"NC1"}
+        assert self.search("nathan") == {"NC1"}  # still in the address
+        assert self.search("court") == set()
+
+        self.room.description = "Cosy room"
+        self.room.save()
+        assert self.search("balcony") == set()
+
+        self.room.delete()
+        assert self.search("kowloon") == set()
+
+    def test_blank_and_symbol_only_queries(self):
+        assert self.search("") == {"NC1", "HV1"}
+        assert self.search('"*') == set()
+
+    def test_property_search_and_rebuild(self):
+        Property.objects.filter(pk=self.property.pk).update(name="Renamed Tower")
+        found = search.search_properties(Property.objects.all(), "renamed")
+        assert not found.exists()
+
+        call_command('rebuild_search_index', stdout=None)
+        assert list(search.search_properties(Property.objects.all(), "renamed")) == [self.property]
+        assert self.search("renamed") == {"NC1"}
+
+    def test_migration_builds_the_same_index_as_the_runtime_code(self):
+        migration = importlib.import_module('properties.migrations.0008_search_index')
+        editor = SimpleNamespace(connection=connection)
+
+        def contents():
+            with connection.cursor() as cursor:
+                return [
+                    cursor.execute(f"SELECT rowid, * FROM {table} ORDER BY rowid").fetchall()
+                    for table in (search.ROOM_TABLE, search.PROPERTY_TABLE)
+                ]
+
+        search.rebuild_index()
+        expected = contents()
+        migration.drop_search_tables(django_apps, editor)
+        migration.create_search_tables(django_apps, editor)
+
+        assert contents() == expected
+        assert self.search("彌敦道 balcony") == {"NC1"}
@@ -0,0 +1,63 @@
+import pytest
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.utils import timezone
+from django.contrib.auth.models import User
+
+from tenants.models import Tenant
+from properties.models import Property, Room
+from bookings.models import Booking
+
+
+@pytest.mark.django_db
+class TestSyncRoomStatusCommand:
+
+    def setup_method(self):
+        user = User.objects.create_user(username="carol", email="carol@example.com", password="pass")
+        self.tenant = Tenant.objects.create(
+            user=user,
+            full_name="Carol",
+            nationality="Country",
+            date_of_birth="1991-04-04",
+            gender="female",
+            phone_number="777888999"
+        )
+        self.property = Property.objects.create(name="Sync", address="Addr", property_type="apartment", total_rooms=3)
+        self.other_property = Property.objects.create(name="Other", address="Addr", property_type="apartment", total_rooms=1)
+        self.occupied = Room.objects.create(property=self.property, room_code="S1", room_number="1", monthly_rent=4000)
+        self.stale = Room.objects.create(property=self.property, room_code="S2", room_number="2", monthly_rent=4000)
+        self.maintenance = Room.objects.create(property=self.property, room_code="S3", room_number="3", monthly_rent=4000)
+        self.other = Room.objects.create(property=self.other_property, room_code="O1", room_number="1", monthly_rent=4000)
+
+        today = timezone.now().date()
+        Booking.objects.create(
+            tenant=self.tenant, room=self.occupied, move_in_date=today,
+            move_out_date=today + timedelta(days=30), duration_months=1, monthly_rent=4000, status='active'
+        )
+        # Simulate drift that the nightly sync has to fix
+        Room.objects.filter(pk=self.occupied.pk).update(status='available')
+        Room.objects.filter(pk__in=[self.stale.pk, self.other.pk]).update(status='reserved')
+        Room.objects.filter(pk=self.maintenance.pk).update(status='maintenance')
+
+    def statuses(self):
+        return dict(Room.objects.values_list('room_code', 'status'))
+
+    def test_dry_run_reports_without_saving(self):
+        out = StringIO()
+        call_command('sync_room_status', '--dry-run', stdout=out)
+
+        assert 'Would update 3 rooms out of 4' in out.getvalue()
+        assert self.statuses()['S1'] == 'available'
+
+    def test_sync_updates_only_changed_rooms(self):
+        call_command('sync_room_status', stdout=StringIO())
+
+        assert self.statuses() == {'S1': 'occupied', 'S2': 'available', 'S3': 'maintenance', 'O1': 'available'}
+
+    def test_property_filter(self):
+        call_command('sync_room_status', '--property', 'Sync', stdout=StringIO())
+
+        statuses = self.statuses()
+        assert statuses['S2'] == 'available'
+        assert statuses['O1'] == 'reserved'
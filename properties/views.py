@@ -1,7 +1,8 @@
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 
-from properties.models import Room
+from properties.models import Property, Room
+from properties.search import search_rooms
 
 
 def staff_required(view_func):
@@ -15,10 +16,14 @@ def staff_required(view_func):
 
 @staff_required
 def crm_room_detail(request, room_code):
-    room = get_object_or_404(Room, room_code=room_code)
+    room = get_object_or_404(
+        Room.objects.select_related('property', 'current_booking__tenant', 'next_booking__tenant')
+        .prefetch_related(Property.images_prefetch('property__')),
+        room_code=room_code
+    )
 
     # Get current booking if any
-    current_booking = room.get_current_booking()
+    current_booking = room.current_booking
 
     # Get payment history for this room
     from payments.models import Payment
@@ -35,6 +40,7 @@ def crm_room_detail(request, room_code):
     context = {
         'room': room,
         'current_booking': current_booking,
+        'next_booking': room.next_booking,
         'payment_history': payment_history,
         'maintenance_tickets': maintenance_tickets,
         'title': f'Room {room.room_code} - CRM'
@@ -45,17 +51,23 @@ def crm_room_detail(request, room_code):
 @staff_required
 def crm_room_list(request):
     """CRM room list - all rooms with status"""
-    rooms = Room.objects.all().select_related('property').order_by('room_code')
+    all_rooms = Room.objects.all()
 
     # Calculate room statistics
-    total_rooms = rooms.count()
-    available_rooms = rooms.filter(status='available').count()
-    occupied_rooms = rooms.filter(status='occupied').count()
-    reserved_rooms = rooms.filter(status='reserved').count()
-    maintenance_rooms = rooms.filter(status='maintenance').count()
+    total_rooms = all_rooms.count()
+    available_rooms = all_rooms.filter(status='available').count()
+    occupied_rooms = all_rooms.filter(status='occupied').count()
+    reserved_rooms = all_rooms.filter(status='reserved').count()
+    maintenance_rooms = all_rooms.filter(status='maintenance').count()
+
+    query = request.GET.get('q', '').strip()
+    rooms = search_rooms(all_rooms, query).select_related(
+        'property', 'current_booking__tenant'
+    ).order_by('room_code')
 
     context = {
         'rooms': rooms,
+        'query': query,
         'title': 'All Rooms - CRM',
         'stats': {
             'total_rooms': total_rooms,
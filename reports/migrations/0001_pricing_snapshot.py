@@ -0,0 +1,60 @@
+# Generated by Django 5.2.7 on 2026-10-18 23:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('properties', '0008_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyPricingSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('room_count', models.IntegerField(default=0)),
+                ('sized_room_count', models.IntegerField(default=0, help_text='Rooms with a size, used for rent/sqft figures')),
+                ('advertised_room_count', models.IntegerField(default=0)),
+                ('rent_p25', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('rent_median', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('rent_p75', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('rent_per_sqft_p25', models.FloatField(blank=True, null=True)),
+                ('rent_per_sqft_median', models.FloatField(blank=True, null=True)),
+                ('rent_per_sqft_p75', models.FloatField(blank=True, null=True)),
+                ('rent_per_sqft_mean', models.FloatField(blank=True, null=True)),
+                ('outlier_count', models.IntegerField(default=0)),
+                ('total_ad_gap', models.DecimalField(decimal_places=2, default=0, help_text='Sum of (advertised price - current rent)', max_digits=12)),
+                ('generated_at', models.DateTimeField()),
+                ('property', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='pricing_summary', to='properties.property')),
+            ],
+            options={
+                'ordering': ['property__name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RoomPricingSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('monthly_rent', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('post_ad_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('size_sqft', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True)),
+                ('rent_per_sqft', models.FloatField(blank=True, null=True)),
+                ('rent_percentile', models.FloatField(help_text='Share of rooms in the property with rent at or below this one (%)')),
+                ('rent_per_sqft_zscore', models.FloatField(blank=True, null=True)),
+                ('outlier', models.CharField(blank=True, choices=[('', 'Normal'), ('low', 'Below range'), ('high', 'Above range')], default='', max_length=4)),
+                ('ad_gap', models.DecimalField(blank=True, decimal_places=2, help_text='Advertised price - current rent', max_digits=10, null=True)),
+                ('ad_gap_pct', models.FloatField(blank=True, null=True)),
+                ('generated_at', models.DateTimeField()),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='room_pricing_snapshots', to='properties.property')),
+                ('room', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='pricing_snapshot', to='properties.room')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['property', 'rent_per_sqft'], name='reports_roo_propert_20c726_idx'), models.Index(fields=['outlier', 'rent_per_sqft'], name='reports_roo_outlier_842273_idx'), models.Index(fields=['ad_gap'], name='reports_roo_ad_gap_8d2476_idx')],
+            },
+        ),
+    ]
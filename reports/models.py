@@ -1,3 +1,63 @@
 from django.db import models
 
-# Create your models here.
+
+class PropertyPricingSummary(models.Model):
+    """Cached per-property rent distribution, rebuilt by reports.pricing.refresh_pricing_snapshot()"""
+    property = models.OneToOneField('properties.Property', on_delete=models.CASCADE, related_name='pricing_summary')
+    room_count = models.IntegerField(default=0)
+    sized_room_count = models.IntegerField(default=0, help_text="Rooms with a size, used for rent/sqft figures")
+    advertised_room_count = models.IntegerField(default=0)
+
+    rent_p25 = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    rent_median = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    rent_p75 = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+
+    rent_per_sqft_p25 = models.FloatField(null=True, blank=True)
+    rent_per_sqft_median = models.FloatField(null=True, blank=True)
+    rent_per_sqft_p75 = models.FloatField(null=True, blank=True)
+    rent_per_sqft_mean = models.FloatField(null=True, blank=True)
+
+    outlier_count = models.IntegerField(default=0)
+    total_ad_gap = models.DecimalField(max_digits=12, decimal_places=2, default=0,
+                                       help_text="Sum of (advertised price - current rent)")
+    generated_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['property__name']
+
+    def __str__(self):
+        return f"Pricing summary for {self.property.name}"
+
+
+class RoomPricingSnapshot(models.Model):
+    """Cached per-room pricing metrics so the CRM can sort and filter without recomputing"""
+    OUTLIER_CHOICES = [
+        ('', 'Normal'),
+        ('low', 'Below range'),
+        ('high', 'Above range'),
+    ]
+
+    room = models.OneToOneField('properties.Room', on_delete=models.CASCADE, related_name='pricing_snapshot')
+    property = models.ForeignKey('properties.Property', on_delete=models.CASCADE, related_name='room_pricing_snapshots')
+    monthly_rent = models.DecimalField(max_digits=10, decimal_places=2)
+    post_ad_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    size_sqft = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+
+    rent_per_sqft = models.FloatField(null=True, blank=True)
+    rent_percentile = models.FloatField(help_text="Share of rooms in the property with rent at or below this one (%)")
+    rent_per_sqft_zscore = models.FloatField(null=True, blank=True)
+    outlier = models.CharField(max_length=4, choices=OUTLIER_CHOICES, blank=True, default='')
+    ad_gap = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True,
+                                 help_text="Advertised price - current rent")
+    ad_gap_pct = models.FloatField(null=True, blank=True)
+    generated_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['property', 'rent_per_sqft']),
+            models.Index(fields=['outlier', 'rent_per_sqft']),
+            models.Index(fields=['ad_gap']),
+        ]
+
+    def __str__(self):
+        return f"Pricing snapshot for room {self.room_id}"
@@ -0,0 +1,161 @@
+"""Rent and rent-per-sqft analytics computed with NumPy.
+
+Room prices are read with a single ``values_list`` query into column arrays,
+all metrics are computed on those arrays, and the result is written to the
+``PropertyPricingSummary`` / ``RoomPricingSnapshot`` tables, which the
+pricing report then reads like any other queryset.
+"""
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+# Tukey fences: rent/sqft outside [Q1 - k*IQR, Q3 + k*IQR] is an outlier
+OUTLIER_IQR_FACTOR = 1.5
+# Fewer sized rooms than this in a property gives no meaningful quartiles
+MIN_ROOMS_FOR_OUTLIERS = 4
+
+
+def _money(value):
+    return None if np.isnan(value) else Decimal(f"{value:.2f}")
+
+
+def _float(value):
+    return None if np.isnan(value) else float(round(value, 4))
+
+
+def _nan_quantiles(values, quantiles):
+    valid = values[~np.isnan(values)]
+    if not valid.size:
+        return [np.nan] * len(quantiles)
+    return np.percentile(valid, quantiles)
+
+
+def load_room_prices():
+    """Room pricing columns as NumPy arrays (missing values are NaN)"""
+    from properties.models import Room
+
+    rows = list(Room.objects.values_list('pk', 'property_id', 'monthly_rent', 'post_ad_price', 'size_sqft'))
+    if not rows:
+        empty = np.array([], dtype=float)
+        return {'room_id': np.array([], dtype=np.int64), 'property_id': np.array([], dtype=np.int64),
+                'rent': empty, 'ad_price': empty, 'size': empty}
+
+    room_ids, property_ids, rents, ad_prices, sizes = zip(*rows)
+    return {
+        'room_id': np.array(room_ids, dtype=np.int64),
+        'property_id': np.array(property_ids, dtype=np.int64),
+        'rent': np.array(rents, dtype=float),
+        'ad_price': np.array(ad_prices, dtype=float),  # None -> NaN
+        'size': np.array(sizes, dtype=float),
+    }
+
+
+def compute_pricing(columns):
+    """Per-room metrics and per-property summaries for the given column arrays"""
+    rent = columns['rent']
+    size = columns['size']
+    ad_price = columns['ad_price']
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rent_per_sqft = np.where(size > 0, rent / size, np.nan)
+        ad_gap = ad_price - rent
+        ad_gap_pct = np.where(rent > 0, ad_gap / rent * 100, np.nan)
+
+    percentile = np.zeros_like(rent)
+    zscore = np.full_like(rent, np.nan)
+    outlier = np.full(rent.shape, '', dtype='<U4')
+
+    summaries = {}
+    # Sort once by property; each property is then a contiguous slice
+    order = np.argsort(columns['property_id'], kind='stable')
+    property_ids, starts, counts = np.unique(columns['property_id'][order], return_index=True, return_counts=True)
+
+    for property_id, start, count in zip(property_ids, starts, counts):
+        idx = order[start:start + count]
+        group_rent = rent[idx]
+        group_rps = rent_per_sqft[idx]
+        sized = ~np.isnan(group_rps)
+
+        sorted_rent = np.sort(group_rent)
+        percentile[idx] = np.searchsorted(sorted_rent, group_rent, side='right') / count * 100
+
+        rps_q1, rps_median, rps_q3 = _nan_quantiles(group_rps, [25, 50, 75])
+        rps_mean = group_rps[sized].mean() if sized.any() else np.nan
+        rps_std = group_rps[sized].std() if sized.any() else np.nan
+        if rps_std > 0:
+            zscore[idx] = (group_rps - rps_mean) / rps_std
+
+        if sized.sum() >= MIN_ROOMS_FOR_OUTLIERS:
+            iqr = rps_q3 - rps_q1
+            low = sized & (group_rps < rps_q1 - OUTLIER_IQR_FACTOR * iqr)
+            high = sized & (group_rps > rps_q3 + OUTLIER_IQR_FACTOR * iqr)
+            outlier[idx[low]] = 'low'
+            outlier[idx[high]] = 'high'
+
+        rent_q1, rent_median, rent_q3 = np.percentile(group_rent, [25, 50, 75])
+        group_gap = ad_gap[idx]
+        summaries[int(property_id)] = {
+            'room_count': int(count),
+            'sized_room_count': int(sized.sum()),
+            'advertised_room_count': int((~np.isnan(group_gap)).sum()),
+            'rent_p25': _money(rent_q1),
+            'rent_median': _money(rent_median),
+            'rent_p75': _money(rent_q3),
+            'rent_per_sqft_p25': _float(rps_q1),
+            'rent_per_sqft_median': _float(rps_median),
+            'rent_per_sqft_p75': _float(rps_q3),
+            'rent_per_sqft_mean': _float(rps_mean),
+            'outlier_count': int((outlier[idx] != '').sum()),
+            'total_ad_gap': _money(np.nansum(group_gap)),
+        }
+
+    rooms = {
+        'rent_per_sqft': rent_per_sqft,
+        'rent_percentile': percentile,
+        'rent_per_sqft_zscore': zscore,
+        'outlier': outlier,
+        'ad_gap': ad_gap,
+        'ad_gap_pct': ad_gap_pct,
+    }
+    return rooms, summaries
+
+
+def refresh_pricing_snapshot(batch_size=1000):
+    """Recompute pricing analytics and replace the snapshot tables; returns the room count"""
+    from .models import PropertyPricingSummary, RoomPricingSnapshot
+
+    columns = load_room_prices()
+    rooms, summaries = compute_pricing(columns)
+    now = timezone.now()
+
+    snapshots = [
+        RoomPricingSnapshot(
+            room_id=int(columns['room_id'][i]),
+            property_id=int(columns['property_id'][i]),
+            monthly_rent=_money(columns['rent'][i]),
+            post_ad_price=_money(columns['ad_price'][i]),
+            size_sqft=_money(columns['size'][i]),
+            rent_per_sqft=_float(rooms['rent_per_sqft'][i]),
+            rent_percentile=_float(rooms['rent_percentile'][i]),
+            rent_per_sqft_zscore=_float(rooms['rent_per_sqft_zscore'][i]),
+            outlier=str(rooms['outlier'][i]),
+            ad_gap=_money(rooms['ad_gap'][i]),
+            ad_gap_pct=_float(rooms['ad_gap_pct'][i]),
+            generated_at=now,
+        )
+        for i in range(len(columns['room_id']))
+    ]
+    property_summaries = [
+        PropertyPricingSummary(property_id=property_id, generated_at=now, **values)
+        for property_id, values in summaries.items()
+    ]
+
+    with transaction.atomic():
+        RoomPricingSnapshot.objects.all().delete()
+        PropertyPricingSummary.objects.all().delete()
+        PropertyPricingSummary.objects.bulk_create(property_summaries, batch_size=batch_size)
+        RoomPricingSnapshot.objects.bulk_create(snapshots, batch_size=batch_size)
+
+    return len(snapshots)
@@ -0,0 +1,75 @@
+import pytest
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from properties.models import Property, Room
+from reports.models import PropertyPricingSummary, RoomPricingSnapshot
+from reports.pricing import refresh_pricing_snapshot
+
+
+@pytest.mark.django_db
+class TestPricingSnapshot:
+
+    def setup_method(self):
+        self.property = Property.objects.create(name="P1", address="Somewhere", property_type="apartment", total_rooms=6)
+        # rent/sqft: 20, 21, 22, 23, 24 and one far above the range (80)
+        for i, (rent, size) in enumerate([(2000, 100), (2100, 100), (2200, 100), (2300, 100), (2400, 100), (4000, 50)]):
+            Room.objects.create(
+                property=self.property, room_code=f"R{i}", room_number=str(i),
+                monthly_rent=rent, size_sqft=size,
+                post_ad_price=rent + 300 if i < 2 else None,
+            )
+        self.unsized = Room.objects.create(property=self.property, room_code="R9", room_number="9", monthly_rent=1000)
+
+    def test_room_metrics_and_outliers(self):
+        assert refresh_pricing_snapshot() == 7
+
+        cheapest = RoomPricingSnapshot.objects.get(room__room_code="R0")
+        assert cheapest.rent_per_sqft == 20.0
+        assert cheapest.ad_gap == Decimal("300.00")
+        assert cheapest.ad_gap_pct == pytest.approx(15.0)
+        assert cheapest.outlier == ''
+
+        assert RoomPricingSnapshot.objects.get(room__room_code="R5").outlier == 'high'
+        assert RoomPricingSnapshot.objects.get(room__room_code="R5").rent_percentile == 100.0
+
+        unsized = RoomPricingSnapshot.objects.get(room=self.unsized)
+        assert unsized.rent_per_sqft is None
+        assert unsized.rent_percentile == pytest.approx(100 / 7, abs=1e-3)
+        assert unsized.ad_gap is None
+
+    def test_property_summary_replaces_previous_snapshot(self):
+        refresh_pricing_snapshot()
+        refresh_pricing_snapshot()
+
+        assert RoomPricingSnapshot.objects.count() == 7
+        summary = PropertyPricingSummary.objects.get()
+        assert summary.room_count == 7
+        assert summary.sized_room_count == 6
+        assert summary.advertised_room_count == 2
+        assert summary.rent_median == Decimal("2200.00")
+        assert summary.rent_per_sqft_median == pytest.approx(22.5)
+        assert summary.outlier_count == 1
+        assert summary.total_ad_gap == Decimal("600.00")
+
+    def test_report_filters_outliers(self, client):
+        User.objects.create_user(username='staff', password='pass', is_staff=True)
+        client.login(username='staff', password='pass')
+        refresh_pricing_snapshot()
+
+        response = client.get(reverse('reports:pricing_report'), {'outlier': 'high'})
+
+        assert response.status_code == 200
+        assert [s.room.room_code for s in response.context['page_obj']] == ["R5"]
+
+    def test_report_ignores_a_malformed_property_filter(self, client):
+        User.objects.create_user(username='staff', password='pass', is_staff=True)
+        client.login(username='staff', password='pass')
+        refresh_pricing_snapshot()
+
+        response = client.get(reverse('reports:pricing_report'), {'property': 'abc'})
+
+        assert response.status_code == 200
+        assert response.context['selected_property'] == ''
+        assert len(response.context['page_obj']) == RoomPricingSnapshot.objects.count()
@@ -1,16 +1,20 @@
 from django.db import models
-from django.shortcuts import render
+from django.core.paginator import Paginator
+from django.shortcuts import redirect, render
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.http import HttpResponse
 from django.utils import timezone
 from datetime import datetime, timedelta
 import csv
 
-from properties.models import Room, Owner, PropertyOwnership
+from properties.models import Room, Owner, Property, PropertyOwnership
 from bookings.models import Booking
+from payments.late_fees import get_policy
 from payments.models import Payment, UtilityBill, Expense
 from tenants.models import Tenant
 from contracts.models import Contract
+from .models import PropertyPricingSummary, RoomPricingSnapshot
+from .pricing import refresh_pricing_snapshot
 
 
 def staff_required(view_func):
@@ -35,11 +39,12 @@ def dashboard(request):
         due_date__lt=today
     ).select_related('booking__tenant', 'booking__room')
 
-    # Calculate late fees (HK$100 per day)
+    # Calculate late fees (configured policy, see payments.late_fees)
+    late_fee_policy = get_policy()
     total_late_fees = 0
     for payment in rent_owed_payments:
-        days_overdue = (today - payment.due_date).days
-        payment.late_fee_amount = days_overdue * 100
+        days_overdue = late_fee_policy.days_overdue(payment.due_date, today)
+        payment.late_fee_amount = late_fee_policy.fee_for(days_overdue)
         total_late_fees += payment.late_fee_amount
 
     # Move Out Report (Requirement #8)
@@ -66,6 +71,7 @@ def dashboard(request):
         'rent_owed_count': rent_owed_payments.count(),
         'total_rent_owed': sum(p.amount for p in rent_owed_payments),
         'total_late_fees': total_late_fees,
+        'late_fee_policy': late_fee_policy,
         'upcoming_move_outs': upcoming_move_outs,
         'ending_contracts': ending_contracts,
         'total_rooms': Room.objects.count(),
@@ -122,13 +128,14 @@ def rent_owed_report(request):
         due_date__lt=today
     ).select_related('booking__tenant', 'booking__room')
 
-    # Calculate late fees (HK$100 per day - Requirement #9)
+    # Calculate late fees (configured policy - Requirement #9)
+    late_fee_policy = get_policy()
     total_rent = 0
     total_late_fees = 0
     for payment in overdue_rent:
-        days_overdue = (today - payment.due_date).days
+        days_overdue = late_fee_policy.days_overdue(payment.due_date, today)
         payment.late_fee_days = days_overdue
-        payment.late_fee_amount = days_overdue * 100  # HK$100 per day
+        payment.late_fee_amount = late_fee_policy.fee_for(days_overdue)
         payment.total_owed = payment.amount + payment.late_fee_amount
         total_rent += payment.amount
         total_late_fees += payment.late_fee_amount
@@ -157,6 +164,7 @@ def rent_owed_report(request):
         'total_rent_owed': total_rent,
         'total_late_fees': total_late_fees,
         'total_owed': total_rent + total_late_fees,
+        'late_fee_policy': late_fee_policy,
         'today': today,
     }
     return render(request, 'reports/rent_owed.html', context)
@@ -665,6 +673,83 @@ def rent_increase_report(request):
     return render(request, 'reports/rent_increase.html', context)
 
 
+@staff_required
+def pricing_report(request):
+    """Rent vs size vs advertised price, served from the cached pricing snapshot"""
+    if request.method == 'POST':
+        refresh_pricing_snapshot()
+        return redirect(request.get_full_path())
+
+    sort_options = {
+        'rent_per_sqft': 'rent_per_sqft',
+        '-rent_per_sqft': '-rent_per_sqft',
+        'ad_gap': 'ad_gap',
+        '-ad_gap': '-ad_gap',
+        'rent': 'monthly_rent',
+        '-rent': '-monthly_rent',
+        'percentile': 'rent_percentile',
+        'room': 'room__room_code',
+    }
+    sort = request.GET.get('sort', '-rent_per_sqft')
+    property_id = request.GET.get('property', '')
+    if not property_id.isdigit():
+        # Ignore anything that is not a property id rather than failing the query
+        property_id = ''
+    outlier = request.GET.get('outlier')
+
+    snapshots = RoomPricingSnapshot.objects.select_related('room', 'property')
+    if property_id:
+        snapshots = snapshots.filter(property_id=property_id)
+    if outlier == 'any':
+        snapshots = snapshots.exclude(outlier='')
+    elif outlier in ('low', 'high'):
+        snapshots = snapshots.filter(outlier=outlier)
+    snapshots = snapshots.order_by(sort_options.get(sort, '-rent_per_sqft'), 'room_id')
+
+    summaries = PropertyPricingSummary.objects.select_related('property')
+    generated_at = summaries.values_list('generated_at', flat=True).first()
+
+    # CSV Export
+    if 'export' in request.GET:
+        response = HttpResponse(content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="pricing_report.csv"'
+        writer = csv.writer(response)
+
+        writer.writerow(['Wing Kong Property Management - Pricing Report'])
+        writer.writerow(['Snapshot generated on:', generated_at.strftime('%Y-%m-%d %H:%M') if generated_at else 'never'])
+        writer.writerow([])
+        writer.writerow(['Room Code', 'Property', 'Monthly Rent', 'Advertised Price', 'Size (sqft)',
+                         'Rent/sqft', 'Rent Percentile', 'Outlier', 'Ad Gap', 'Ad Gap %'])
+        for snapshot in snapshots:
+            writer.writerow([
+                snapshot.room.room_code,
+                snapshot.property.name,
+                snapshot.monthly_rent,
+                snapshot.post_ad_price or '',
+                snapshot.size_sqft or '',
+                f"{snapshot.rent_per_sqft:.2f}" if snapshot.rent_per_sqft is not None else '',
+                f"{snapshot.rent_percentile:.0f}",
+                snapshot.get_outlier_display(),
+                snapshot.ad_gap if snapshot.ad_gap is not None else '',
+                f"{snapshot.ad_gap_pct:.1f}" if snapshot.ad_gap_pct is not None else '',
+            ])
+        return response
+
+    page_obj = Paginator(snapshots, 100).get_page(request.GET.get('page'))
+
+    context = {
+        'title': 'Pricing Report',
+        'summaries': summaries,
+        'page_obj': page_obj,
+        'properties': Property.objects.order_by('name'),
+        'selected_property': property_id,
+        'selected_outlier': outlier,
+        'sort': sort,
+        'generated_at': generated_at,
+    }
+    return render(request, 'reports/pricing.html', context)
+
+
 @login_required
 @user_passes_test(lambda u: u.is_staff)
 def daily_invoice_summary(request):
@@ -683,9 +768,11 @@ def daily_invoice_summary(request):
     else:
         report_date = today
 
-    # Get all notification logs for the selected date
+    # Get all notification logs for the selected date (as a range so the created_at index applies)
+    day_start = timezone.make_aware(datetime.combine(report_date, datetime.min.time()))
     daily_notifications = NotificationLog.objects.filter(
-        created_at__date=report_date
+        created_at__gte=day_start,
+        created_at__lt=day_start + timedelta(days=1)
     ).order_by('-created_at')
 
     # Break down by type
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:43
+
+import django.db.models.functions.datetime
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tenant',
+            name='birth_day',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.datetime.ExtractDay('date_of_birth'), output_field=models.PositiveSmallIntegerField()),
+        ),
+        migrations.AddField(
+            model_name='tenant',
+            name='birth_month',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.datetime.ExtractMonth('date_of_birth'), output_field=models.PositiveSmallIntegerField()),
+        ),
+        migrations.AddIndex(
+            model_name='tenant',
+            index=models.Index(fields=['birth_month', 'birth_day'], name='tenant_birthday_idx'),
+        ),
+        # Registration and tenant lookups filter auth_user by email, which django.contrib.auth leaves unindexed
+        migrations.RunSQL(
+            sql='CREATE INDEX auth_user_email_idx ON auth_user (email);',
+            reverse_sql='DROP INDEX auth_user_email_idx;',
+        ),
+    ]
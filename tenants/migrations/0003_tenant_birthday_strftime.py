@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-19 03:10
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0002_tenant_birthday_index'),
+    ]
+
+    # Generated columns cannot be altered in place, so they are dropped and re-added around the index
+    operations = [
+        migrations.RemoveIndex(
+            model_name='tenant',
+            name='tenant_birthday_idx',
+        ),
+        migrations.RemoveField(
+            model_name='tenant',
+            name='birth_day',
+        ),
+        migrations.RemoveField(
+            model_name='tenant',
+            name='birth_month',
+        ),
+        migrations.AddField(
+            model_name='tenant',
+            name='birth_month',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Cast(models.Func(models.Value('%m'), 'date_of_birth', function='strftime'), models.IntegerField()), output_field=models.PositiveSmallIntegerField()),
+        ),
+        migrations.AddField(
+            model_name='tenant',
+            name='birth_day',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Cast(models.Func(models.Value('%d'), 'date_of_birth', function='strftime'), models.IntegerField()), output_field=models.PositiveSmallIntegerField()),
+        ),
+        migrations.AddIndex(
+            model_name='tenant',
+            index=models.Index(fields=['birth_month', 'birth_day'], name='tenant_birthday_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.db.models.functions import Cast
 from django.core.validators import RegexValidator
 
 
@@ -24,6 +25,17 @@ class Tenant(models.Model):
     passport_number = models.CharField(max_length=50, blank=True, null=True)
     nationality = models.CharField(max_length=100)
     date_of_birth = models.DateField()
+    # Stored copies of the birthday so the daily birthday wishes can use an index. Built from SQLite's own
+    # strftime: ExtractMonth/ExtractDay compile to django_date_extract(), which only Django's connections
+    # register, so no other client (dbshell, sqlite3, backup tools) could write this table
+    birth_month = models.GeneratedField(
+        expression=Cast(models.Func(models.Value('%m'), 'date_of_birth', function='strftime'), models.IntegerField()),
+        output_field=models.PositiveSmallIntegerField(), db_persist=True,
+    )
+    birth_day = models.GeneratedField(
+        expression=Cast(models.Func(models.Value('%d'), 'date_of_birth', function='strftime'), models.IntegerField()),
+        output_field=models.PositiveSmallIntegerField(), db_persist=True,
+    )
     gender = models.CharField(max_length=10, choices=GENDER_CHOICES)
 
     # Contact Information
@@ -39,6 +51,11 @@ class Tenant(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['birth_month', 'birth_day'], name='tenant_birthday_idx'),
+        ]
+
     def __str__(self):
         return f"{self.full_name} - {self.hkid_number or self.passport_number}"
 
@@ -0,0 +1,100 @@
+"""EXPLAIN QUERY PLAN checks for the hot reminder / report queries.
+
+Each query below must be answered through an index. If a model or query
+change makes SQLite fall back to scanning the whole table, the matching
+test fails with the plan it got.
+"""
+import re
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.utils import timezone
+
+from bookings.models import Booking
+from contracts.models import Contract
+from maintenance.models import MaintenanceTicket
+from notifications.models import NotificationLog
+from notifications.schedule import due_events
+from payments.models import Payment
+from tenants.models import Tenant
+
+pytestmark = pytest.mark.skipif(connection.vendor != 'sqlite', reason="EXPLAIN QUERY PLAN is SQLite syntax")
+
+TODAY = timezone.now().date()
+DAY_START = timezone.make_aware(datetime.combine(TODAY, datetime.min.time()))
+
+HOT_QUERIES = {
+    'rent_due_soon': lambda: Payment.objects.filter(
+        payment_type='rent', status='pending', due_date=TODAY + timedelta(days=3)
+    ).select_related('booking__tenant', 'booking__room'),
+    'rent_overdue': lambda: Payment.objects.filter(
+        payment_type='rent', status='pending', due_date__lt=TODAY
+    ).select_related('booking__tenant', 'booking__room'),
+    'rent_court_notice': lambda: Payment.objects.filter(
+        payment_type='rent', status='pending', due_date__lte=TODAY - timedelta(days=14)
+    ),
+    'utility_overdue': lambda: Payment.objects.filter(payment_type='utility', status='pending', due_date__lt=TODAY),
+    'contract_renewals': lambda: Contract.objects.filter(
+        end_date=TODAY + timedelta(days=21), status='signed', renewal_status='not_sent'
+    ).select_related('booking__tenant', 'booking__room'),
+    'contracts_ending': lambda: Contract.objects.filter(
+        end_date__lte=TODAY + timedelta(days=21), end_date__gte=TODAY, status='signed'
+    ),
+    'birthdays': lambda: Tenant.objects.filter(birth_month=TODAY.month, birth_day=TODAY.day),
+    'room_occupant': lambda: Booking.objects.filter(
+        room_id=1, status='active', move_in_date__lte=TODAY, move_out_date__gte=TODAY
+    ),
+    'upcoming_move_outs': lambda: Booking.objects.filter(
+        move_out_date__lte=TODAY + timedelta(days=30), move_out_date__gte=TODAY, status='active'
+    ).select_related('tenant', 'room'),
+    'overdue_tickets': lambda: MaintenanceTicket.objects.filter(
+        estimated_completion_date__lt=TODAY, status__in=['open', 'in_progress']
+    ).select_related('tenant', 'room', 'assigned_staff'),
+    'recent_notifications': lambda: NotificationLog.objects.filter(
+        created_at__gte=DAY_START - timedelta(days=7)
+    ).select_related('tenant')[:50],
+    'daily_notification_report': lambda: NotificationLog.objects.filter(
+        created_at__gte=DAY_START, created_at__lt=DAY_START + timedelta(days=1), notification_type='rent_reminder'
+    ),
+    'user_by_email': lambda: User.objects.filter(email='tenant@example.com'),
+    'due_reminders': lambda: due_events(['rent_due_soon', 'rent_overdue'], TODAY),
+}
+
+
+def query_plan(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', sorted(HOT_QUERIES))
+def test_hot_query_uses_an_index(name):
+    queryset = HOT_QUERIES[name]()
+    table = queryset.model._meta.db_table
+    plan = query_plan(queryset)
+
+    assert any(re.match(rf'SEARCH {table} USING (COVERING )?INDEX ', step) for step in plan), plan
+    assert not any(re.match(rf'SCAN {table}\b', step) for step in plan), plan
+
+
+@pytest.mark.django_db
+def test_birthday_columns_are_writable_outside_django():
+    # The generated birthday columns must not depend on functions only Django's connections register
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'tenants_tenant'")
+        table_sql = cursor.fetchone()[0]
+
+    plain = sqlite3.connect(':memory:')
+    plain.execute('CREATE TABLE auth_user (id integer PRIMARY KEY)')
+    plain.execute(table_sql)
+    plain.execute(
+        "INSERT INTO tenants_tenant (full_name, nationality, date_of_birth, gender, phone_number,"
+        " emergency_contact_name, emergency_contact_phone, job_search_status, created_at, updated_at)"
+        " VALUES ('T', 'X', '1990-03-07', 'male', '1', '', '', 0, '2026-01-01', '2026-01-01')"
+    )
+    assert plain.execute('SELECT birth_month, birth_day FROM tenants_tenant').fetchone() == (3, 7)
@@ -32,6 +32,7 @@ urlpatterns = [
     path('tenant/dashboard/', views.tenant_dashboard, name='tenant_dashboard'),
     path('tenant/booking/<int:booking_id>/', views.tenant_booking_detail, name='tenant_booking_detail'),
     path('tenant/payments/', views.tenant_payments, name='tenant_payments'),
+    path('tenant/statement/', views.tenant_statement_download, name='tenant_statement_download'),
     path('tenant/maintenance/', views.tenant_maintenance, name='tenant_maintenance'),
     path('tenant/contract/<int:contract_id>/', views.tenant_contract_view, name='tenant_contract_view'),
     path('tenant/contract/<int:contract_id>/renew/', views.tenant_renewal_response, name='tenant_renewal_response'),
@@ -1,3 +1,4 @@
+from django.http import FileResponse, Http404
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views.generic import ListView, DetailView, TemplateView, CreateView
 from django.contrib import messages
@@ -8,7 +9,8 @@ from django.db.models import Q
 from datetime import datetime, timedelta
 import json
 
-from properties.models import Room, Property, PropertyImage
+from properties.models import Room, Property
+from properties.search import search_rooms
 from bookings.models import Booking
 from payments.models import Payment
 from maintenance.models import MaintenanceTicket
@@ -93,6 +95,10 @@ class RoomListView(ListView):
         if has_balcony:
             queryset = queryset.filter(has_balcony=True)
 
+        query = self.request.GET.get('q')
+        if query:
+            queryset = search_rooms(queryset, query)
+
         return queryset
 
     def get_context_data(self, **kwargs):
@@ -121,7 +127,7 @@ class RoomDetailView(DetailView):
         room_code = self.kwargs.get('room_code')
         return get_object_or_404(
             Room.objects.select_related('property')
-            .prefetch_related('room_photos', 'room_videos'),
+            .prefetch_related('room_photos', 'room_videos', Property.images_prefetch('property__')),
             room_code=room_code
         )
 
@@ -130,8 +136,8 @@ class RoomDetailView(DetailView):
         room = self.object
         config = WebsiteConfig.objects.first()
 
-        # Get property images
-        property_images = PropertyImage.objects.filter(property=room.property)
+        # Get property images (already prefetched with the room)
+        property_images = room.property.property_images.all()
 
         # Check if room is available for specific dates
         check_in = self.request.GET.get('check_in')
@@ -360,10 +366,25 @@ def tenant_payments(request):
     context = {
         'config': config,
         'payments': payments,
+        'latest_statement': tenant.statements.exclude(pdf='').first(),
     }
     return render(request, 'website/tenant/payments.html', context)
 
 
+@tenant_login_required
+def tenant_statement_download(request):
+    """Download the tenant's latest statement of account"""
+    statement = request.user.tenant.statements.exclude(pdf='').first()
+    if statement is None:
+        raise Http404("No statement available yet")
+    return FileResponse(
+        statement.pdf.open('rb'),
+        as_attachment=True,
+        filename=f"statement_{statement.period_start:%Y_%m}.pdf",
+        content_type='application/pdf',
+    )
+
+
 @tenant_login_required
 def tenant_maintenance(request):
     """Tenant maintenance request management"""
@@ -871,9 +892,30 @@ def tenant_renewal_response(request, contract_id):
             # Tenant wants to renew
             new_duration = int(request.POST.get('new_duration_months', 3))
             new_end_date = contract.end_date + timedelta(days=30 * new_duration)
+            old_booking = contract.booking
+
+            # Renewal already offered in bulk (contracts.renewals): sign that one
+            offered = Contract.objects.filter(
+                booking__tenant_id=old_booking.tenant_id,
+                booking__room_id=old_booking.room_id,
+                start_date=contract.end_date,
+                status__in=['draft', 'sent'],
+            ).select_related('booking').first()
+            if offered:
+                # Give the unsigned offer the length the tenant just chose
+                unsigned = not (offered.tenant_signed_date or offered.staff_signed_date)
+                if unsigned and offered.booking.duration_months != new_duration:
+                    offered.end_date = new_end_date
+                    offered.save(update_fields=['end_date', 'updated_at'])
+                    offered.booking.duration_months = new_duration
+                    offered.booking.move_out_date = new_end_date
+                    offered.booking.save(update_fields=['duration_months', 'move_out_date'])
+                contract.renewal_status = 'renewed'
+                contract.save(update_fields=['renewal_status', 'updated_at'])
+                messages.success(request, 'Thank you! Your renewal contract is ready. Please check your email to sign the new agreement.')
+                return redirect('website:tenant_contract_view', contract_id=offered.id)
 
             # Create new booking for renewal
-            old_booking = contract.booking
             new_booking = Booking.objects.create(
                 tenant=old_booking.tenant,
                 room=old_booking.room,
@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from celery.signals import worker_process_shutdown
 from django.conf import settings
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'wing_kon_property.settings')
@@ -8,6 +9,15 @@ app = Celery('wing_kon_property')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
 
+
+@worker_process_shutdown.connect
+def stop_pdf_render_pool(**kwargs):
+    """Stop a prefork child's PDF render workers with it"""
+    from notifications.pdf import PDFService
+
+    PDFService.shutdown()
+
+
 @app.task(bind=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
\ No newline at end of file
@@ -109,8 +109,33 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 
 
+# PDF rendering pool (notifications.pdf.PDFService)
+PDF_RENDER_WORKERS = env.int('PDF_RENDER_WORKERS', default=min(4, os.cpu_count() or 1))
+PDF_RENDER_MAX_DOCUMENTS_PER_WORKER = env.int('PDF_RENDER_MAX_DOCUMENTS_PER_WORKER', default=50)
+# Seconds a pooled render may take before the rest of the batch is rendered in-process
+PDF_RENDER_TIMEOUT = env.int('PDF_RENDER_TIMEOUT', default=120)
+PDF_STYLESHEETS = []
+PDF_CACHE_ENABLED = env.bool('PDF_CACHE_ENABLED', default=True)
+# Change to invalidate every cached PDF, e.g. after editing templates included by a variable name
+PDF_CACHE_VERSION = env('PDF_CACHE_VERSION', default='')
+# Stamp contract signatures onto a cached body instead of re-rendering the whole contract
+CONTRACT_PDF_STAMPING = env.bool('CONTRACT_PDF_STAMPING', default=True)
+# Threads hashing contract PDFs in the integrity sweep
+CONTRACT_HASH_WORKERS = env.int('CONTRACT_HASH_WORKERS', default=4)
+
+
+# Late fee policy (payments.late_fees)
+LATE_FEE_DAILY_AMOUNT = env.int('LATE_FEE_DAILY_AMOUNT', default=100)  # HK$ per day overdue
+LATE_FEE_GRACE_DAYS = env.int('LATE_FEE_GRACE_DAYS', default=0)
+LATE_FEE_MAX_AMOUNT = env.int('LATE_FEE_MAX_AMOUNT', default=0)  # 0 = no cap
+
+
 # Celery Beat Schedule
 CELERY_BEAT_SCHEDULE = {
+    'dispatch-notifications': {
+        'task': 'notifications.tasks.dispatch_notifications',
+        'schedule': 60.0,  # Every minute
+    },
     'send-rent-reminders': {
         'task': 'notifications.tasks.send_rent_reminders',
         'schedule': 86400.0,  # Every 24 hours
@@ -139,10 +164,22 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'notifications.tasks.sync_room_status',
         'schedule': 86400.0,  # Every 24 hours
     },
+    'refresh-room-booking-pointers': {
+        'task': 'notifications.tasks.refresh_room_booking_pointers',
+        'schedule': 86400.0,  # Every 24 hours
+    },
+    'refresh-pricing-snapshot': {
+        'task': 'notifications.tasks.refresh_pricing_snapshot',
+        'schedule': 86400.0,  # Every 24 hours
+    },
     'detect-rent-increases': {
         'task': 'notifications.tasks.detect_rent_increases',
         'schedule': 86400.0,  # Every 24 hours
     },
+    'generate-rent-invoices': {
+        'task': 'notifications.tasks.generate_rent_invoices',
+        'schedule': 86400.0,  # Every 24 hours
+    },
     'create-late-fee-payments': {
         'task': 'notifications.tasks.create_late_fee_payments',
         'schedule': 86400.0,  # Every 24 hours
@@ -179,6 +216,10 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'notifications.tasks.check_temp_stay_switches',
         'schedule': 86400.0,  # Every 24 hours
     },
+    'verify-contract-hashes': {
+        'task': 'notifications.tasks.verify_contract_hashes',
+        'schedule': 86400.0,  # Every 24 hours
+    },
 }
 
 # Internationalization
@@ -237,6 +278,10 @@ EMAIL_HOST_USER = env('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = env('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = env('DEFAULT_FROM_EMAIL')
 TO_EMAIL = env('TO_EMAIL')
+# Messages sent over one SMTP connection by EmailService.send_batch
+EMAIL_BATCH_SIZE = env.int('EMAIL_BATCH_SIZE', default=100)
+# Emails per second each outbox dispatcher sends (0 = no limit)
+NOTIFICATION_RATE_PER_SECOND = env.int('NOTIFICATION_RATE_PER_SECOND', default=10)
 
 # Departmental Email Settings
 ACCOUNTS_EMAIL = env('ACCOUNTS_EMAIL', default=TO_EMAIL)